@@ -0,0 +1,90 @@
+"""
+Short-lived cache of the users API requests authenticate as.
+
+``accounts.authentication.CachedJWTAuthentication`` resolves the token's user
+here instead of querying the user table on every request. With
+``AUTH_USER_CACHE_WALLET`` the user's wallet is loaded in the same query and
+cached with it, so ``request.user.wallet`` is free as well.
+
+Each user's entry lives under a per-user version token. ``invalidate`` (called
+for every saved or deleted user, see ``accounts.signals``) replaces the token
+once the transaction commits, so password changes, deactivation and profile
+edits apply from the next request, and a request that loaded the old row
+concurrently can only cache it under the retired token. ``wallet_changed``
+does the same for balance changes. Entries and tokens expire after
+``AUTH_USER_CACHE_TIMEOUT`` seconds.
+
+Invalidation only reaches other workers through a shared cache. With a
+process-local one (the local-memory default, see ``core.checks``) a worker
+would keep authenticating a deactivated user or a changed password until its
+own copy expired, so ``get_user`` then skips the cache and reads the row.
+"""
+import uuid
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework_simplejwt.settings import api_settings
+
+from core.checks import is_process_local
+
+
+def get_user(user_id):
+    """The user whose ``USER_ID_FIELD`` is ``user_id``, or ``None`` if there is none."""
+    if is_process_local():
+        return _load(user_id)
+    key = f'accounts:user:{user_id}:{_version(user_id)}'
+    user = cache.get(key)
+    if user is None:
+        user = _load(user_id)
+        if user is None:
+            return None
+        cache.set(key, user, _timeout())
+    return user
+
+
+def invalidate(*user_ids):
+    """Retire the cached copies of these users when the current transaction commits."""
+    if user_ids:
+        transaction.on_commit(partial(_bump, user_ids))
+
+
+def wallet_changed(*user_ids):
+    """Like ``invalidate``, for a change to the users' wallets; a no-op unless wallets are cached."""
+    if _with_wallet():
+        invalidate(*user_ids)
+
+
+def _load(user_id):
+    queryset = get_user_model()._default_manager.all()
+    if _with_wallet():
+        queryset = queryset.select_related('wallet')
+    return queryset.filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+
+
+def _version(user_id):
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(key, version, _timeout()):
+            version = cache.get(key, version)
+    return version
+
+
+def _bump(user_ids):
+    cache.set_many({_version_key(user_id): uuid.uuid4().hex for user_id in user_ids}, _timeout())
+
+
+def _version_key(user_id):
+    return f'accounts:user:{user_id}:version'
+
+
+def _timeout():
+    return getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 60)
+
+
+def _with_wallet():
+    return getattr(settings, 'AUTH_USER_CACHE_WALLET', False)
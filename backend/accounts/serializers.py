@@ -1,3 +1,4 @@
+from django.db import transaction
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
@@ -6,6 +7,8 @@ from django.contrib.auth.tokens import PasswordResetTokenGenerator
 from django.utils.encoding import force_bytes, force_str
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 
+from core import outbox
+
 
 
 User = get_user_model()
@@ -34,11 +37,13 @@ class RegisterSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         validated_data.pop("password2")
-        user = User.objects.create_user(
-            username=validated_data["username"],
-            email=validated_data["email"],
-            password=validated_data["password"]
-        )
+        with transaction.atomic():
+            user = User.objects.create_user(
+                username=validated_data["username"],
+                email=validated_data["email"],
+                password=validated_data["password"]
+            )
+            outbox.publish("user.registered", user_id=user.pk)
         return user
 
 
@@ -48,6 +53,13 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ("id", "username", "email", "is_verified", "balance")
 
 
+class UserSummarySerializer(serializers.ModelSerializer):
+    """Who a record belongs to, for ``?expand=user`` on other apps' serializers."""
+    class Meta:
+        model = User
+        fields = ("id", "username", "email")
+
+
 
 # change password serializer
 class ChangePasswordSerializer(serializers.Serializer):
@@ -1,3 +1,79 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache as django_cache
 from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from wallets.models import Wallet
+from . import cache
+
+User = get_user_model()
+
+
+class UserCacheTests(TestCase):
+    def setUp(self):
+        django_cache.clear()
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'pw')
+        Wallet.objects.create(user=self.user)
+        shared = mock.patch('accounts.cache.is_process_local', return_value=False)
+        shared.start()
+        self.addCleanup(shared.stop)
+
+    def test_user_and_wallet_are_cached(self):
+        cache.get_user(self.user.pk)
+
+        with self.assertNumQueries(0):
+            user = cache.get_user(self.user.pk)
+            self.assertEqual(user.wallet.user_id, self.user.pk)
+
+    def test_save_invalidates_on_commit(self):
+        cache.get_user(self.user.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.filter(pk=self.user.pk).update(first_name='Alice')
+            self.user.refresh_from_db()
+            self.user.save()
+
+        self.assertEqual(cache.get_user(self.user.pk).first_name, 'Alice')
+
+    def test_missing_user(self):
+        self.assertIsNone(cache.get_user(0))
+
+    def test_process_local_cache_is_bypassed(self):
+        cache.get_user(self.user.pk)
+        # Another worker's change: this process sees no signal for it.
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+
+        with mock.patch('accounts.cache.is_process_local', return_value=True):
+            self.assertFalse(cache.get_user(self.user.pk).is_active)
+        self.assertTrue(cache.get_user(self.user.pk).is_active)
+
+
+class AuthenticationTests(TestCase):
+    def setUp(self):
+        django_cache.clear()
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'old-password')
+        Wallet.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def test_profile_update_saves_a_fresh_row(self):
+        self.assertEqual(self.client.get('/api/accounts/profile/').status_code, 200)
+        User.objects.filter(pk=self.user.pk).update(first_name='Alice')
+
+        response = self.client.patch('/api/accounts/profile/', {'email': 'new@example.com'}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.first_name, self.user.email), ('Alice', 'new@example.com'))
+
+    def test_deactivated_user_is_refused_on_the_next_request(self):
+        self.assertEqual(self.client.get('/api/accounts/profile/').status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
 
-# Create your tests here.
+        self.assertEqual(self.client.get('/api/accounts/profile/').status_code, 401)
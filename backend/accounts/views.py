@@ -29,7 +29,10 @@ class ProfileView(generics.RetrieveUpdateAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
-        return self.request.user
+        # request.user may be a cached copy (accounts.cache); updates save over a fresh row.
+        if self.request.method in permissions.SAFE_METHODS:
+            return self.request.user
+        return User.objects.get(pk=self.request.user.pk)
 
 
 # Change password endpoint
@@ -41,7 +44,8 @@ class ChangePasswordView(generics.UpdateAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self, queryset=None):
-        return self.request.user
+        # request.user may be a cached copy (accounts.cache); check and save a fresh row.
+        return User.objects.get(pk=self.request.user.pk)
 
     def update(self, request, *args, **kwargs):
         user = self.get_object()
@@ -54,7 +58,7 @@ class ChangePasswordView(generics.UpdateAPIView):
 
             # set new password
             user.set_password(serializer.validated_data.get("new_password"))
-            user.save()
+            user.save(update_fields=["password"])
 
             return Response({"detail": "Password updated successfully."}, status=status.HTTP_200_OK)
 
@@ -90,6 +94,6 @@ class ResetPasswordConfirmView(APIView):
         user = serializer.validated_data["user"]
         new_password = serializer.validated_data["new_password"]
         user.set_password(new_password)
-        user.save()
+        user.save(update_fields=["password"])
 
         return Response({"detail": "Password has been reset successfully."})
\ No newline at end of file
@@ -0,0 +1,17 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import OutboxEvent
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ('id', 'topic', 'created_at', 'processed_at', 'attempts', 'last_error')
+    list_filter = ('topic',)
+    readonly_fields = ('topic', 'payload', 'created_at', 'processed_at', 'attempts', 'available_at', 'last_error')
+    actions = ['retry']
+
+    @admin.action(description="Retry selected events now")
+    def retry(self, request, queryset):
+        count = queryset.filter(processed_at__isnull=True).update(attempts=0, available_at=timezone.now(), last_error='')
+        self.message_user(request, f"{count} event(s) queued for retry.")
@@ -0,0 +1,51 @@
+"""
+Helpers for async views.
+
+Django's async ORM methods all funnel through one thread per request, so they
+never overlap. ``run_concurrently`` instead runs each blocking function in the
+event loop's thread pool, each on its own database connection, and awaits them
+together. Connections are tidied with ``close_old_connections`` before and
+after, like any other non-request thread, so ``CONN_MAX_AGE`` (or a backend
+connection pool) decides whether they are reused.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+from accounts.authentication import CachedJWTAuthentication
+
+
+async def run_concurrently(*funcs):
+    """Call each zero-argument function in its own thread and return their results in order."""
+    return await asyncio.gather(*(sync_to_async(_isolated(func), thread_sensitive=False)() for func in funcs))
+
+
+def _isolated(func):
+    def call():
+        close_old_connections()
+        try:
+            return func()
+        finally:
+            close_old_connections()
+    return call
+
+
+async def authenticate(request):
+    """
+    Authenticate a plain Django request with the API's JWT header.
+    Returns the user, or ``None`` when the token is missing or invalid.
+    """
+    def check():
+        try:
+            result = CachedJWTAuthentication().authenticate(request)
+        except (InvalidToken, AuthenticationFailed):
+            return None
+        return result[0] if result else None
+
+    user, = await run_concurrently(check)
+    if user is not None:
+        request.user = user
+    return user
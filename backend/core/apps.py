@@ -0,0 +1,19 @@
+from django.apps import AppConfig
+from django.core import checks
+from django.db.backends.signals import connection_created
+
+
+def _install_query_tracking(sender, connection, **kwargs):
+    from .middleware import track_queries
+    if track_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(track_queries)
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'core'
+
+    def ready(self):
+        connection_created.connect(_install_query_tracking)
+        from .checks import check_idempotency_store
+        checks.register(check_idempotency_store)
@@ -0,0 +1,433 @@
+"""
+API benchmark suite.
+
+``seed()`` fills the database with a reproducible, realistic dataset using
+bulk inserts: users with wallets, plans, investments, deposits, withdrawals and
+a time-ordered transaction history whose running balances add up. Seeded users
+are named ``bench_*``, so the dataset can be told apart from (and flushed
+without touching) anything else. Run it against a dedicated database.
+
+``run()`` replays the hot endpoints through Django's test client with real JWT
+headers and records latency percentiles and queries per request. Mutating
+endpoints (the approve flows) run inside a savepoint that is rolled back after
+each request, so every iteration sees the same state and runs are repeatable.
+
+``compare()`` diffs a result against a saved baseline. ``serialization()``
+times the list endpoints' DRF serializers against the ``core.serialization``
+fast path on the same rows. The ``seed_benchmark_data`` and
+``run_benchmarks`` commands wrap these.
+"""
+import json
+import math
+import platform
+import random
+import statistics
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from decimal import Decimal
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.db.models import F
+from django.test import Client, RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework_simplejwt.tokens import AccessToken
+
+from investments.interest import simple_profit
+from investments.models import Deposit, InvestmentPlan, UserInvestment, Withdrawal
+from investments.serializers import DepositSerializer, UserInvestmentSerializer, WithdrawalSerializer
+from transactions.models import TransactionHistory
+from transactions.serializers import TransactionHistorySerializer
+from wallets.ledger import TOTAL_FIELDS
+from wallets.models import Wallet
+from .ids import UUID7Generator
+from .serialization import FastJSONRenderer, RowSerializer
+
+PREFIX = 'bench_'
+ADMIN_USERNAME = f'{PREFIX}admin'
+PASSWORD = 'bench-password'
+
+PLANS = [
+    # name, min, max, daily_roi %, duration_days
+    ('Bench Starter', 10, 999, Decimal('1.20'), 7),
+    ('Bench Silver', 1000, 9999, Decimal('1.50'), 14),
+    ('Bench Gold', 10000, 99999, Decimal('1.80'), 30),
+    ('Bench Platinum', 100000, 999999, Decimal('2.10'), 60),
+]
+
+# Relative frequency of each ledger entry type in the seeded history.
+TRANSACTION_MIX = [
+    ('deposit', 25),
+    ('profit', 45),
+    ('investment', 15),
+    ('withdrawal', 10),
+    ('principal_return', 5),
+]
+CREDIT_TYPES = {'deposit', 'profit', 'principal_return'}
+
+
+@dataclass
+class Endpoint:
+    name: str
+    method: str
+    path: str
+    admin: bool = False
+    # Pending rows ('deposit' or 'withdrawal') to approve, one per iteration
+    # via ``{pk}`` in the path, or ``BULK_BATCH`` at a time when ``bulk``.
+    payload: str = ''
+    bulk: bool = False
+
+
+ENDPOINTS = [
+    Endpoint('transaction-history', 'GET', '/api/transactions/'),
+    Endpoint('transaction-history-type', 'GET', '/api/transactions/?type=profit'),
+    Endpoint('my-investments', 'GET', '/api/investments/my/'),
+    Endpoint('active-investments', 'GET', '/api/investments/active/'),
+    Endpoint('deposit-list', 'GET', '/api/investments/deposits/', admin=True),
+    Endpoint('withdrawal-list', 'GET', '/api/investments/withdrawals/', admin=True),
+    Endpoint('user-wallet', 'GET', '/api/investments/wallet/'),
+    Endpoint('wallet-detail', 'GET', '/api/wallet/'),
+    Endpoint('wallet-overview', 'GET', '/api/investments/overview/'),
+    Endpoint('approve-deposit', 'PATCH', '/api/investments/approve-deposit/{pk}/', admin=True, payload='deposit'),
+    Endpoint('approve-withdrawal', 'PATCH', '/api/investments/approve-withdrawal/{pk}/', admin=True, payload='withdrawal'),
+    Endpoint('bulk-approve-deposits', 'POST', '/api/investments/approve-deposits/', admin=True, payload='deposit', bulk=True),
+]
+
+BULK_BATCH = 50
+
+
+# -----------------------------
+# Seeding
+# -----------------------------
+
+def seeded_users():
+    return get_user_model().objects.filter(username__startswith=PREFIX)
+
+
+def flush():
+    """Delete every seeded user (and, by cascade, everything they own) and the bench plans."""
+    seeded_users().delete()
+    InvestmentPlan.objects.filter(name__in=[plan[0] for plan in PLANS]).delete()
+
+
+def seed(users=1000, transactions=1_000_000, investments_per_user=3, deposits_per_user=5,
+         withdrawals_per_user=3, days=365, batch_size=5000, random_seed=42, log=print):
+    """Create the benchmark dataset and return a dict of row counts."""
+    rng = random.Random(random_seed)
+    now = timezone.now()
+    started = time.monotonic()
+
+    password = make_password(PASSWORD)
+    User = get_user_model()
+    User.objects.bulk_create(
+        [User(username=ADMIN_USERNAME, email=f'{ADMIN_USERNAME}@example.com', password=password,
+              is_staff=True, is_superuser=True)]
+        + [User(username=f'{PREFIX}{n:07d}', email=f'{PREFIX}{n:07d}@example.com', password=password)
+           for n in range(users)],
+        batch_size=batch_size,
+    )
+    user_ids = list(seeded_users().exclude(username=ADMIN_USERNAME).order_by('pk').values_list('pk', flat=True))
+    admin_id = User.objects.values_list('pk', flat=True).get(username=ADMIN_USERNAME)
+    log(f"users: {len(user_ids)}")
+
+    plans = InvestmentPlan.objects.bulk_create([
+        InvestmentPlan(name=name, min_amount=low, max_amount=high, daily_roi=roi, duration_days=duration,
+                       total_return=roi * duration)
+        for name, low, high, roi, duration in PLANS
+    ])
+    if plans[0].pk is None:
+        plans = list(InvestmentPlan.objects.filter(name__in=[plan[0] for plan in PLANS]).order_by('min_amount'))
+
+    wallets = _seed_transactions(rng, user_ids, transactions, now - timedelta(days=days), now, batch_size, log)
+    Wallet.objects.bulk_create(
+        [Wallet(user_id=user_id, **fields) for user_id, fields in wallets.items()]
+        + [Wallet(user_id=admin_id)],
+        batch_size=batch_size,
+    )
+
+    investments = []
+    for user_id in user_ids:
+        for _ in range(investments_per_user):
+            plan = rng.choice(plans)
+            amount = Decimal(rng.randint(int(plan.min_amount), int(plan.max_amount)))
+            profit = simple_profit(amount, plan.daily_roi, plan.duration_days)
+            investments.append(UserInvestment(
+                user_id=user_id, plan=plan, amount=amount,
+                end_date=now + timedelta(days=rng.randint(-plan.duration_days, plan.duration_days)),
+                status=rng.choices(['active', 'completed'], [3, 1])[0],
+                expected_profit=profit, total_payout=amount + profit,
+            ))
+    UserInvestment.objects.bulk_create(investments, batch_size=batch_size)
+    log(f"investments: {len(investments)}")
+
+    Deposit.objects.bulk_create([
+        Deposit(user_id=user_id, amount=Decimal(rng.randint(10, 50000)), proof='deposits/bench.png',
+                proof_status='processed', status=rng.choices(['pending', 'approved', 'rejected'], [3, 6, 1])[0])
+        for user_id in user_ids for _ in range(deposits_per_user)
+    ], batch_size=batch_size)
+    Withdrawal.objects.bulk_create([
+        Withdrawal(user_id=user_id, amount=Decimal(rng.randint(10, 5000)), wallet_address=f'bench-{user_id}',
+                   status=rng.choices(['pending', 'approved', 'rejected'], [3, 6, 1])[0])
+        for user_id in user_ids for _ in range(withdrawals_per_user)
+    ], batch_size=batch_size)
+    log(f"deposits: {len(user_ids) * deposits_per_user}, withdrawals: {len(user_ids) * withdrawals_per_user}")
+
+    log(f"seeded in {time.monotonic() - started:.1f}s")
+    return dataset_counts()
+
+
+def _seed_transactions(rng, user_ids, count, start, end, batch_size, log):
+    """
+    Write ``count`` ledger rows spread evenly from ``start`` to ``end`` and
+    return each user's resulting wallet fields.
+    """
+    generator = UUID7Generator()
+    types = [name for name, _ in TRANSACTION_MIX]
+    weights = [weight for _, weight in TRANSACTION_MIX]
+    wallets = {user_id: {'balance': Decimal('0.00')} for user_id in user_ids}
+    step = (end - start) / max(count, 1)
+    rows = []
+    for n in range(count):
+        user_id = rng.choice(user_ids)
+        wallet = wallets[user_id]
+        transaction_type = rng.choices(types, weights)[0]
+        amount = Decimal(rng.randint(1000, 500000)) / 100
+        if transaction_type not in CREDIT_TYPES and amount > wallet['balance']:
+            transaction_type = 'deposit'
+        delta = amount if transaction_type in CREDIT_TYPES else -amount
+
+        created_at = start + step * n
+        pk = generator(int(created_at.timestamp() * 1000))
+        balance_before = wallet['balance']
+        wallet['balance'] = balance_before + delta
+        total_field = TOTAL_FIELDS.get(transaction_type)
+        if total_field:
+            wallet[total_field] = wallet.get(total_field, Decimal('0.00')) + amount
+        wallet.update(last_transaction_type=transaction_type, last_transaction_amount=amount,
+                      last_transaction_status='successful', last_transaction_at=created_at)
+
+        rows.append(TransactionHistory(
+            id=pk, user_id=user_id, transaction_type=transaction_type, amount=amount,
+            status='successful', balance_before=balance_before, balance_after=wallet['balance'],
+            reference=TransactionHistory.reference_for(pk), created_at=created_at,
+        ))
+        if len(rows) >= batch_size:
+            TransactionHistory.objects.bulk_create(rows)
+            rows = []
+            if (n + 1) % (batch_size * 20) == 0:
+                log(f"transactions: {n + 1}/{count}")
+    TransactionHistory.objects.bulk_create(rows)
+    log(f"transactions: {count}")
+    return wallets
+
+
+def dataset_counts():
+    users = seeded_users()
+    return {
+        'users': users.count(),
+        'transactions': TransactionHistory.objects.filter(user__in=users).count(),
+        'investments': UserInvestment.objects.filter(user__in=users).count(),
+        'deposits': Deposit.objects.filter(user__in=users).count(),
+        'withdrawals': Withdrawal.objects.filter(user__in=users).count(),
+    }
+
+
+# -----------------------------
+# Running
+# -----------------------------
+
+def run(iterations=200, warmup=20, sample_users=50, only=None, random_seed=42, log=print):
+    """Benchmark ``ENDPOINTS`` (or the names in ``only``) and return the result dict."""
+    rng = random.Random(random_seed)
+    User = get_user_model()
+    users = list(seeded_users().exclude(username=ADMIN_USERNAME).order_by('?')[:sample_users])
+    if not users:
+        raise ValueError("No benchmark data found; run seed_benchmark_data first.")
+    admin = User.objects.get(username=ADMIN_USERNAME)
+    tokens = {user.pk: f"Bearer {AccessToken.for_user(user)}" for user in users + [admin]}
+    payloads = _payload_sources(users)
+
+    results = {}
+    # Server errors are counted in the results, not raised.
+    client = Client(raise_request_exception=False)
+    with override_settings(ALLOWED_HOSTS=['testserver']):
+        for endpoint in ENDPOINTS:
+            if only and endpoint.name not in only:
+                continue
+            if endpoint.payload and not payloads[endpoint.payload]:
+                log(f"{endpoint.name}: skipped (no pending rows to act on)")
+                continue
+            timings, queries, errors = [], [], 0
+            for n in range(warmup + iterations):
+                user = admin if endpoint.admin else rng.choice(users)
+                path, body = _request_for(endpoint, payloads, rng)
+                elapsed, query_count, status_code = _timed_request(client, endpoint, path, body, tokens[user.pk])
+                if n < warmup:
+                    continue
+                timings.append(elapsed * 1000)
+                queries.append(query_count)
+                errors += status_code >= 400
+            results[endpoint.name] = _summarise(timings, queries, errors)
+            log(f"{endpoint.name}: p50 {results[endpoint.name]['p50_ms']}ms "
+                f"p95 {results[endpoint.name]['p95_ms']}ms queries {results[endpoint.name]['queries_max']}")
+
+    return {
+        'created_at': timezone.now().isoformat(),
+        'environment': {
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'debug': settings.DEBUG,
+        },
+        'dataset': dataset_counts(),
+        'iterations': iterations,
+        'warmup': warmup,
+        'endpoints': results,
+    }
+
+
+def _payload_sources(users):
+    user_ids = [user.pk for user in users]
+    return {
+        'deposit': list(Deposit.objects.filter(user_id__in=user_ids, status='pending').values_list('pk', flat=True)),
+        'withdrawal': list(
+            Withdrawal.objects.filter(user_id__in=user_ids, status='pending', amount__lte=F('user__wallet__balance'))
+            .values_list('pk', flat=True)
+        ),
+    }
+
+
+def _request_for(endpoint, payloads, rng):
+    if endpoint.bulk:
+        ids = payloads[endpoint.payload]
+        return endpoint.path, {'ids': rng.sample(ids, min(BULK_BATCH, len(ids))), 'status': 'approved'}
+    if endpoint.payload:
+        return endpoint.path.format(pk=rng.choice(payloads[endpoint.payload])), {'status': 'approved'}
+    return endpoint.path, None
+
+
+def _timed_request(client, endpoint, path, body, authorization):
+    request = getattr(client, endpoint.method.lower())
+    kwargs = {'HTTP_AUTHORIZATION': authorization}
+    if body is not None:
+        kwargs.update(data=json.dumps(body), content_type='application/json')
+
+    with CaptureQueriesContext(connection) as captured:
+        if endpoint.method == 'GET':
+            started = time.perf_counter()
+            response = request(path, **kwargs)
+            elapsed = time.perf_counter() - started
+        else:
+            # Roll the write back so the next iteration starts from the same state.
+            with transaction.atomic():
+                started = time.perf_counter()
+                response = request(path, **kwargs)
+                elapsed = time.perf_counter() - started
+                transaction.set_rollback(True)
+    return elapsed, len(captured), response.status_code
+
+
+def _summarise(timings, queries, errors):
+    timings.sort()
+    return {
+        'samples': len(timings),
+        'p50_ms': round(_percentile(timings, 50), 3),
+        'p95_ms': round(_percentile(timings, 95), 3),
+        'p99_ms': round(_percentile(timings, 99), 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'queries_mean': round(statistics.fmean(queries), 2),
+        'queries_max': max(queries),
+        'errors': errors,
+    }
+
+
+def _percentile(ordered, percent):
+    """Nearest-rank percentile of an already sorted list."""
+    return ordered[max(math.ceil(percent / 100 * len(ordered)) - 1, 0)]
+
+
+# -----------------------------
+# Serialization
+# -----------------------------
+
+# The list endpoints' serializers and querysets, as their views build them.
+SERIALIZATION_CASES = [
+    ('transactions', TransactionHistorySerializer, lambda: TransactionHistory.objects.order_by('-id')),
+    ('investments', UserInvestmentSerializer, lambda: UserInvestment.objects.order_by('-start_date')),
+    ('deposits', DepositSerializer, lambda: Deposit.objects.order_by('-created_at')),
+    ('withdrawals', WithdrawalSerializer, lambda: Withdrawal.objects.order_by('-created_at')),
+]
+
+
+def serialization(rows=2000, repeat=5, log=print):
+    """
+    Fetch, serialize and render ``rows`` rows of each list endpoint through its
+    DRF serializer and through ``RowSerializer`` + ``FastJSONRenderer``, and
+    return the best of ``repeat`` timings per path, the speedup and whether
+    both produced the same bytes.
+    """
+    # The request builds absolute media URLs, which validates its host.
+    with override_settings(ALLOWED_HOSTS=['testserver']):
+        request = Request(RequestFactory().get('/'))
+        context = {'request': request}
+        results = {}
+        for name, serializer_class, queryset in SERIALIZATION_CASES:
+
+            def drf():
+                return JSONRenderer().render(serializer_class(queryset()[:rows], many=True, context=context).data)
+
+            def fast():
+                serializer = RowSerializer(serializer_class, context=context)
+                return FastJSONRenderer().render(serializer.to_representation(serializer.values(queryset()[:rows])))
+
+            timings = {}
+            for label, func in (('drf', drf), ('fast', fast)):
+                best = math.inf
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    body = func()
+                    best = min(best, time.perf_counter() - started)
+                timings[label] = (best * 1000, body)
+            (drf_ms, drf_body), (fast_ms, fast_body) = timings['drf'], timings['fast']
+            results[name] = {
+                'rows': len(json.loads(fast_body)),
+                'drf_ms': round(drf_ms, 3),
+                'fast_ms': round(fast_ms, 3),
+                'speedup': round(drf_ms / fast_ms, 2) if fast_ms else None,
+                'identical': drf_body == fast_body,
+            }
+            log(f"{name}: {results[name]['rows']} rows, DRF {drf_ms:.1f}ms, fast path {fast_ms:.1f}ms "
+                f"({results[name]['speedup']}x), identical output: {results[name]['identical']}")
+    return results
+
+
+# -----------------------------
+# Comparing
+# -----------------------------
+
+def compare(result, baseline, threshold=0.2):
+    """
+    Return ``(rows, regressions)``. A regression is a p95 more than
+    ``threshold`` slower than the baseline, or more queries per request.
+    """
+    rows, regressions = [], []
+    for name, current in result['endpoints'].items():
+        previous = baseline.get('endpoints', {}).get(name)
+        if previous is None:
+            rows.append((name, None, current['p95_ms'], None, None, current['queries_max']))
+            continue
+        change = (current['p95_ms'] - previous['p95_ms']) / previous['p95_ms'] if previous['p95_ms'] else 0
+        rows.append((name, previous['p95_ms'], current['p95_ms'], change,
+                     previous['queries_max'], current['queries_max']))
+        if change > threshold:
+            regressions.append(f"{name}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms ({change:+.0%})")
+        if current['queries_max'] > previous['queries_max']:
+            regressions.append(f"{name}: queries {previous['queries_max']} -> {current['queries_max']}")
+    return rows, regressions
@@ -0,0 +1,26 @@
+"""
+System checks for settings that only work with a cache shared by every
+worker process.
+"""
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error
+
+
+def is_process_local(alias='default'):
+    """True if ``alias`` is a cache other worker processes can't see (local-memory or dummy)."""
+    return isinstance(caches[alias], (LocMemCache, DummyCache))
+
+
+def check_idempotency_store(app_configs, **kwargs):
+    from .idempotency import get_setting
+
+    if get_setting('STORE') == 'cache' and is_process_local():
+        return [Error(
+            'IDEMPOTENCY["STORE"] is "cache" but the default cache is process-local.',
+            hint='Duplicate requests served by different workers would both run. '
+                 'Use "database", or a shared cache such as Redis or Memcached.',
+            id='core.E001',
+        )]
+    return []
@@ -0,0 +1,92 @@
+"""
+Conditional GET for polled per-user reads.
+
+Clients poll the wallet, investment and transaction endpoints every few
+seconds, and most polls get back exactly what the last one did.
+``ConditionalGetMixin`` asks the view for a cheap version of the data it
+would serialize (``get_version``, typically one indexed row read), sends it
+as the ``ETag`` and ``Last-Modified`` validators, and answers
+``304 Not Modified`` without building the payload when the client already
+has it.
+
+The version is read before the payload, so a write landing in between can
+only make the ETag older than the body (the next poll gets a 200), never
+newer. ``Last-Modified`` only has whole-second precision, so it is left out
+while the data changed within the current second; ``If-None-Match`` is the
+validator to rely on.
+"""
+import hashlib
+from datetime import timedelta
+
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+
+class NotModified(Exception):
+    """Raised from ``initial()`` to answer with the conditional ``response`` instead of the handler."""
+
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+
+class ConditionalGetMixin:
+    """
+    Answer GETs with 304 when ``get_version()`` is unchanged (see module docs).
+    The check runs after authentication and permissions, before the handler.
+
+    Views must define ``get_version()``, returning ``(parts, last_modified)``:
+    values that change whenever the response would, and the aware datetime of
+    the last change (or ``None``). Defining a view without it fails at import.
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if not callable(getattr(cls, 'get_version', None)):
+            raise ImproperlyConfigured(f"{cls.__qualname__} uses ConditionalGetMixin but defines no get_version().")
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.validators = None
+        if request.method not in ('GET', 'HEAD'):
+            return
+        parts, last_modified = self.get_version()
+        if last_modified and timezone.now() - last_modified < timedelta(seconds=1):
+            last_modified = None
+        self.validators = (self.get_etag(parts), last_modified)
+
+        response = get_conditional_response(
+            request, etag=self.validators[0], last_modified=last_modified and int(last_modified.timestamp()),
+        )
+        if response is not None:
+            raise NotModified(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if getattr(self, 'validators', None) and (200 <= response.status_code < 300 or response.status_code == 304):
+            etag, last_modified = self.validators
+            response['ETag'] = etag
+            if last_modified:
+                response['Last-Modified'] = http_date(last_modified.timestamp())
+            # Responses are per user and must be revalidated on every poll.
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ['Authorization', 'Cookie'])
+        return response
+
+    def get_etag(self, parts):
+        request = self.request
+        key = '\n'.join(map(str, [
+            type(self).__qualname__,
+            request.get_full_path(),
+            request.accepted_media_type,
+            request.user.pk,
+            *parts,
+        ]))
+        return f'"{hashlib.md5(key.encode()).hexdigest()}"'
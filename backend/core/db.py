@@ -0,0 +1,77 @@
+"""
+Primary/replica routing.
+
+When ``settings.DATABASES`` has a ``"replica"`` alias, list and reporting
+views read from it (``ReplicaReadMixin`` for DRF views,
+``ReplicaChangeListMixin`` for admin changelists); everything else, and every
+write, uses ``"default"``. ``PrimaryReplicaRouter`` makes sure an object
+loaded from the replica is still saved to the primary.
+
+For read-your-writes, ``core.middleware.ReadYourWritesMiddleware`` pins a user
+to the primary for ``REPLICA_PIN_SECONDS`` after any successful write they
+make. Pins live in the default cache, which must be shared between processes
+(Redis, Memcached) when the app runs in more than one.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+
+PRIMARY = 'default'
+REPLICA = 'replica'
+
+
+class PrimaryReplicaRouter:
+    """Send all writes to the primary; reads stay on whatever alias the queryset asked for."""
+
+    def db_for_read(self, model, **hints):
+        return None
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data.
+        return True
+
+
+def replica_configured():
+    return REPLICA in settings.DATABASES
+
+
+def pin_to_primary(user):
+    cache.set(_pin_key(user.pk), True, getattr(settings, 'REPLICA_PIN_SECONDS', 5))
+
+
+def read_alias(request):
+    """The alias a read-only request should query: the replica unless the user just wrote."""
+    if not replica_configured() or request.method not in SAFE_METHODS:
+        return PRIMARY
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated and cache.get(_pin_key(user.pk)):
+        return PRIMARY
+    return REPLICA
+
+
+def _pin_key(user_id):
+    return f'replica-pin:{user_id}'
+
+
+class ReplicaReadMixin:
+    """Run a DRF view's safe-method queries against the replica (see module docs)."""
+
+    def filter_queryset(self, queryset):
+        return super().filter_queryset(queryset).using(read_alias(self.request))
+
+
+class ReplicaChangeListMixin:
+    """Serve a ModelAdmin's changelist pages from the replica."""
+
+    def changelist_view(self, request, extra_context=None):
+        # Only GETs: a changelist POST runs admin actions, which write.
+        request.read_alias = read_alias(request)
+        return super().changelist_view(request, extra_context)
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        alias = getattr(request, 'read_alias', None)
+        return queryset.using(alias) if alias else queryset
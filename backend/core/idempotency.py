@@ -0,0 +1,223 @@
+"""
+Idempotency-Key support for money-moving API endpoints.
+
+A client that repeats a POST/PUT/PATCH with the same ``Idempotency-Key``
+header gets the stored response of the first attempt instead of running the
+view again. Keys are scoped to the user and the path. While the first attempt
+is still running, duplicates wait for its outcome instead of re-executing it.
+5xx responses are not stored, so retrying after a server error runs again.
+
+The store is picked by ``settings.IDEMPOTENCY["STORE"]``: ``"database"`` (the
+default) keeps records in ``core.IdempotencyRecord``, whose unique key locks
+across processes (expired rows are removed by the ``purge_idempotency_keys``
+command); ``"cache"`` keeps them in the default cache (bounded and TTL-evicted
+by the cache itself), which must then be shared by every worker. The
+``core.E001`` system check refuses a process-local one.
+"""
+import hashlib
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from .models import IdempotencyRecord
+
+HEADER = 'Idempotency-Key'
+
+DEFAULTS = {
+    'STORE': 'database',
+    'TTL': 60 * 60 * 24,
+    'LOCK_TIMEOUT': 60,
+    'WAIT_TIMEOUT': 10,
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'IDEMPOTENCY', {}).get(name, DEFAULTS[name])
+
+
+class IdempotencyConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "A request with this Idempotency-Key is still being processed."
+    default_code = 'idempotency_conflict'
+
+
+class IdempotencyKeyReused(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = "This Idempotency-Key was already used for a different request."
+    default_code = 'idempotency_key_reused'
+
+
+class _Replay(Exception):
+    def __init__(self, stored):
+        self.stored = stored
+
+
+class CacheStore:
+    """Records live in the default cache as ``{"fingerprint", "response"}``."""
+
+    def acquire(self, key, fingerprint):
+        """Return ``(True, None)`` if the caller now owns the key, else ``(False, record)``."""
+        if cache.add(self._key(key), {'fingerprint': fingerprint, 'response': None}, get_setting('LOCK_TIMEOUT')):
+            return True, None
+        return False, cache.get(self._key(key))
+
+    def complete(self, key, fingerprint, response):
+        cache.set(self._key(key), {'fingerprint': fingerprint, 'response': response}, get_setting('TTL'))
+
+    def release(self, key):
+        cache.delete(self._key(key))
+
+    @staticmethod
+    def _key(key):
+        return f'idempotency:{key}'
+
+
+class DatabaseStore:
+    """Records live in ``IdempotencyRecord``; the unique key is the lock."""
+
+    def acquire(self, key, fingerprint):
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                IdempotencyRecord.objects.create(
+                    key=key, fingerprint=fingerprint,
+                    expires_at=now + timedelta(seconds=get_setting('LOCK_TIMEOUT')),
+                )
+            return True, None
+        except IntegrityError:
+            pass
+
+        record = IdempotencyRecord.objects.filter(key=key).first()
+        if record is None:
+            return False, None
+        if record.expires_at <= now:
+            IdempotencyRecord.objects.filter(pk=record.pk, expires_at__lte=now).delete()
+            return False, None
+        response = None
+        if record.completed:
+            response = (record.status_code, record.content_type, bytes(record.content))
+        return False, {'fingerprint': record.fingerprint, 'response': response}
+
+    def complete(self, key, fingerprint, response):
+        status_code, content_type, content = response
+        IdempotencyRecord.objects.filter(key=key).update(
+            completed=True,
+            status_code=status_code,
+            content_type=content_type,
+            content=content,
+            expires_at=timezone.now() + timedelta(seconds=get_setting('TTL')),
+        )
+
+    def release(self, key):
+        IdempotencyRecord.objects.filter(key=key).delete()
+
+
+STORES = {
+    'cache': CacheStore,
+    'database': DatabaseStore,
+}
+
+
+def get_store():
+    return STORES[get_setting('STORE')]()
+
+
+class IdempotentMixin:
+    """
+    Honour ``Idempotency-Key`` on a DRF view. List it before the DRF base
+    class: ``class MyView(IdempotentMixin, generics.CreateAPIView)``.
+    """
+    idempotent_methods = ('POST', 'PUT', 'PATCH')
+    idempotency_key = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        client_key = request.headers.get(HEADER)
+        if not client_key or request.method not in self.idempotent_methods:
+            return
+
+        key = _digest(f"{request.user.pk}:{request.path}:{client_key}")
+        fingerprint = _fingerprint(request)
+        store = get_store()
+        deadline = time.monotonic() + get_setting('WAIT_TIMEOUT')
+        delay = 0.05
+        while True:
+            acquired, record = store.acquire(key, fingerprint)
+            if acquired:
+                self.idempotency_key = (key, fingerprint)
+                return
+            if record is not None:
+                if record['fingerprint'] != fingerprint:
+                    raise IdempotencyKeyReused()
+                if record['response'] is not None:
+                    raise _Replay(record['response'])
+            if time.monotonic() >= deadline:
+                raise IdempotencyConflict()
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, _Replay):
+            status_code, content_type, content = exc.stored
+            response = HttpResponse(content, status=status_code, content_type=content_type)
+            response['Idempotent-Replayed'] = 'true'
+            return response
+        try:
+            return super().handle_exception(exc)
+        except Exception:
+            self._release_key()
+            raise
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if self.idempotency_key:
+            key, fingerprint = self.idempotency_key
+            if response.status_code >= 500:
+                self._release_key()
+            else:
+                response.render()
+                get_store().complete(key, fingerprint, (response.status_code, response['Content-Type'], response.content))
+            self.idempotency_key = None
+        return response
+
+    def _release_key(self):
+        if self.idempotency_key:
+            get_store().release(self.idempotency_key[0])
+            self.idempotency_key = None
+
+
+def _digest(value):
+    return hashlib.sha256(value.encode()).hexdigest()
+
+
+def _fingerprint(request):
+    if request.content_type.startswith('multipart/'):
+        body = _multipart_body(request)
+    else:
+        body = request._request.body
+    return hashlib.sha256(request.method.encode() + b'\n' + body).hexdigest()
+
+
+def _multipart_body(request):
+    """
+    Multipart bodies (file uploads) can exceed what Django will buffer, so
+    they are identified by their parsed fields plus a digest of each
+    uploaded file, read in chunks.
+    """
+    files = []
+    for name, uploads in sorted(request.FILES.lists()):
+        for upload in uploads:
+            digest = hashlib.sha256()
+            for chunk in upload.chunks():
+                digest.update(chunk)
+            upload.seek(0)
+            files.append([name, upload.name, digest.hexdigest()])
+    return json.dumps([sorted(request.POST.lists()), files]).encode()
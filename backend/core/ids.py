@@ -0,0 +1,80 @@
+"""
+Time-ordered identifiers.
+
+``uuid7()`` returns RFC 9562 version 7 UUIDs: a 48-bit Unix millisecond
+timestamp, a 12-bit counter and 62 random bits. New keys land at the right-hand
+edge of a primary-key index instead of at random pages, and sorting by the key
+sorts by creation time, to the millisecond.
+
+Within one process the values are strictly increasing, even when several are
+made in the same millisecond. Across processes only the millisecond is
+ordered: ids two workers make in the same millisecond (or under clocks that
+disagree) compare by counter and random bits, not by which came first. They
+are still unique (62 random bits), so a keyset cursor over ``id`` pages
+through a fixed set of rows without gaps or repeats, but code that needs the
+real order of writes must not take it from ``id`` alone; the ledger's
+balance chain is one (see ``wallets.reconcile``).
+
+``base32()`` renders a UUID as 26 Crockford base32 characters, which sort in
+the same order as the UUID and are safe to read out over the phone.
+"""
+import secrets
+import threading
+import time
+import uuid
+
+CROCKFORD = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+
+_COUNTER_MAX = 0xFFF
+
+
+class UUID7Generator:
+    """Monotonic UUIDv7 source. ``uuid7`` uses one shared instance."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._counter = 0
+
+    def __call__(self, timestamp_ms=None):
+        if timestamp_ms is None:
+            timestamp_ms = time.time_ns() // 1_000_000
+        with self._lock:
+            if timestamp_ms > self._last_ms:
+                # Start low in the counter range so the millisecond has room to grow.
+                self._counter = secrets.randbits(10)
+            else:
+                timestamp_ms = self._last_ms
+                self._counter += 1
+                if self._counter > _COUNTER_MAX:
+                    timestamp_ms += 1
+                    self._counter = 0
+            self._last_ms = timestamp_ms
+            counter = self._counter
+
+        value = (
+            (timestamp_ms & 0xFFFF_FFFF_FFFF) << 80
+            | 0x7 << 76
+            | counter << 64
+            | 0b10 << 62
+            | secrets.randbits(62)
+        )
+        return uuid.UUID(int=value)
+
+
+_generator = UUID7Generator()
+
+
+def uuid7():
+    """A new UUIDv7 for the current time."""
+    return _generator()
+
+
+def base32(value):
+    """Encode a UUID as 26 sortable Crockford base32 characters."""
+    number = value.int
+    chars = []
+    for _ in range(26):
+        chars.append(CROCKFORD[number & 0x1F])
+        number >>= 5
+    return ''.join(reversed(chars))
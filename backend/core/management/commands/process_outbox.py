@@ -0,0 +1,37 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core import outbox
+from core.models import OutboxEvent
+
+
+class Command(BaseCommand):
+    help = "Deliver pending outbox events to their handlers."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Events claimed per transaction.")
+        parser.add_argument('--loop', action='store_true', help="Keep polling instead of exiting when idle.")
+        parser.add_argument('--interval', type=float, default=1.0, help="Seconds to sleep when idle with --loop.")
+        parser.add_argument('--purge-days', type=int,
+                            help="Also delete events processed more than this many days ago.")
+
+    def handle(self, *args, **options):
+        processed = failed = 0
+        while True:
+            done, errors = outbox.process_batch(options['batch_size'])
+            processed += done
+            failed += errors
+            if done or errors:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        if options['purge_days'] is not None:
+            cutoff = timezone.now() - timedelta(days=options['purge_days'])
+            deleted, _ = OutboxEvent.objects.filter(processed_at__lt=cutoff).delete()
+            self.stdout.write(f"Purged {deleted} processed event(s).")
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} event(s), {failed} failed."))
@@ -0,0 +1,64 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import benchmark
+
+
+class Command(BaseCommand):
+    help = "Measure latency percentiles and queries per request for the hot API endpoints."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200, help="Measured requests per endpoint.")
+        parser.add_argument('--warmup', type=int, default=20, help="Unmeasured requests per endpoint first.")
+        parser.add_argument('--sample-users', type=int, default=50, help="Seeded users to spread requests over.")
+        parser.add_argument('--only', help="Comma-separated endpoint names, e.g. transaction-history,approve-deposit.")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', help="Write the result JSON here.")
+        parser.add_argument('--baseline', help="Compare against this earlier result JSON.")
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help="Allowed p95 slowdown against the baseline (0.2 = 20%%).")
+        parser.add_argument('--serialization', action='store_true',
+                            help="Instead, time the list serializers against the fast path on the same rows.")
+        parser.add_argument('--rows', type=int, default=2000, help="Rows per list for --serialization.")
+
+    def handle(self, *args, **options):
+        if options['serialization']:
+            results = benchmark.serialization(rows=options['rows'], log=self.stdout.write)
+            if not all(result['identical'] for result in results.values()):
+                raise CommandError("The fast path's output differs from the DRF serializers'.")
+            return
+
+        only = set(options['only'].split(',')) if options['only'] else None
+        try:
+            result = benchmark.run(
+                iterations=options['iterations'],
+                warmup=options['warmup'],
+                sample_users=options['sample_users'],
+                only=only,
+                random_seed=options['seed'],
+                log=self.stdout.write,
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                json.dump(result, handle, indent=2)
+            self.stdout.write(f"Wrote {options['output']}")
+
+        if not options['baseline']:
+            return
+        with open(options['baseline']) as handle:
+            baseline = json.load(handle)
+        rows, regressions = benchmark.compare(result, baseline, options['threshold'])
+        self.stdout.write(f"{'endpoint':<28}{'p95 before':>12}{'p95 now':>10}{'change':>9}{'queries':>10}")
+        for name, before, now, change, queries_before, queries_now in rows:
+            self.stdout.write(
+                f"{name:<28}{'-' if before is None else f'{before:.1f}':>12}{now:>10.1f}"
+                f"{'new' if change is None else f'{change:+.0%}':>9}"
+                f"{f'{queries_before} -> {queries_now}' if queries_before is not None else str(queries_now):>10}"
+            )
+        if regressions:
+            raise CommandError("Regressions against the baseline:\n  " + "\n  ".join(regressions))
+        self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import benchmark
+
+
+class Command(BaseCommand):
+    help = "Seed a large, reproducible dataset for run_benchmarks (use a dedicated database)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--transactions', type=int, default=1_000_000, help="Total ledger rows to create.")
+        parser.add_argument('--investments-per-user', type=int, default=3)
+        parser.add_argument('--deposits-per-user', type=int, default=5)
+        parser.add_argument('--withdrawals-per-user', type=int, default=3)
+        parser.add_argument('--days', type=int, default=365, help="Spread the history over this many days.")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Rows per bulk insert.")
+        parser.add_argument('--seed', type=int, default=42, help="Random seed, for a repeatable dataset.")
+        parser.add_argument('--flush', action='store_true', help="Delete an existing benchmark dataset first.")
+        parser.add_argument('--force', action='store_true', help="Allow seeding when DEBUG is off.")
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['force']:
+            raise CommandError("Refusing to seed with DEBUG off; pass --force if this really is a benchmark database.")
+        if benchmark.seeded_users().exists():
+            if not options['flush']:
+                raise CommandError("A benchmark dataset already exists; pass --flush to replace it.")
+            self.stdout.write("Flushing existing benchmark data...")
+            benchmark.flush()
+
+        counts = benchmark.seed(
+            users=options['users'],
+            transactions=options['transactions'],
+            investments_per_user=options['investments_per_user'],
+            deposits_per_user=options['deposits_per_user'],
+            withdrawals_per_user=options['withdrawals_per_user'],
+            days=options['days'],
+            batch_size=options['batch_size'],
+            random_seed=options['seed'],
+            log=self.stdout.write,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            "Seeded " + ", ".join(f"{count} {name}" for name, count in counts.items()) + "."
+        ))
@@ -0,0 +1,87 @@
+"""
+Prometheus metrics.
+
+``core.middleware.MetricsMiddleware`` records, per URL name, request latency,
+database query count and time, response size and status; the wallet ledger
+records entry counters. Everything is served in the Prometheus text format by
+``core.views.metrics`` at ``/metrics``.
+
+Under gunicorn (or any multi-process server) set ``PROMETHEUS_MULTIPROC_DIR``
+to an empty directory writable by the workers before they start; each worker
+then writes its samples there and ``/metrics`` sums them across processes.
+Add this to the gunicorn config so dead workers' live samples are dropped::
+
+    from core.metrics import child_exit
+"""
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', "Time spent handling a request.",
+    ['view', 'method'],
+)
+REQUESTS = Counter(
+    'http_requests_total', "Requests handled, by response status.",
+    ['view', 'method', 'status'],
+)
+REQUEST_EXCEPTIONS = Counter(
+    'http_request_exceptions_total', "Requests that raised an unhandled exception.",
+    ['view', 'exception'],
+)
+REQUEST_QUERIES = Histogram(
+    'http_request_db_queries', "Database queries run per request.",
+    ['view'], buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144),
+)
+REQUEST_DB_TIME = Histogram(
+    'http_request_db_duration_seconds', "Time spent in the database per request.",
+    ['view'],
+)
+RESPONSE_SIZE = Histogram(
+    'http_response_size_bytes', "Size of non-streaming response bodies.",
+    ['view'], buckets=tuple(2 ** n for n in range(8, 24, 2)),
+)
+
+LEDGER_ENTRIES = Counter(
+    'ledger_entries_total', "Wallet ledger entries written.",
+    ['direction', 'transaction_type'],
+)
+LEDGER_AMOUNT = Counter(
+    'ledger_amount_naira_total', "Amount moved by wallet ledger entries.",
+    ['direction', 'transaction_type'],
+)
+LEDGER_REJECTED = Counter(
+    'ledger_insufficient_funds_total', "Debits refused for insufficient funds.",
+    ['transaction_type'],
+)
+
+
+def record_ledger(direction, entries):
+    """Count ``(transaction_type, amount)`` pairs written in one direction."""
+    for transaction_type, amount in entries:
+        LEDGER_ENTRIES.labels(direction, transaction_type).inc()
+        LEDGER_AMOUNT.labels(direction, transaction_type).inc(float(amount))
+
+
+def render():
+    """Return ``(body, content_type)`` for the current samples."""
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def child_exit(server, worker):
+    """gunicorn hook: forget the samples of a worker that has exited."""
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        multiprocess.mark_process_dead(worker.pid)
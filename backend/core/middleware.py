@@ -0,0 +1,135 @@
+import contextvars
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from rest_framework.permissions import SAFE_METHODS
+
+from . import db, metrics
+
+# The current request's tracker. Context variables follow the request into
+# sync_to_async worker threads, so queries made there are counted too.
+_query_tracker = contextvars.ContextVar('query_tracker', default=None)
+
+
+class QueryTracker:
+    """``execute_wrapper`` that counts queries and the time spent in them."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        # Async views (core.aio) run one request's queries on several threads.
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.count += 1
+                self.seconds += elapsed
+
+
+class MetricsMiddleware:
+    """
+    Record latency, DB queries/time, response size and status for every
+    request, labelled by URL name. Place it first in ``MIDDLEWARE`` so the
+    timing covers the rest of the stack.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        tracker = QueryTracker()
+        token = _query_tracker.set(tracker)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _query_tracker.reset(token)
+        return self.record(request, response, tracker, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        tracker = QueryTracker()
+        token = _query_tracker.set(tracker)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _query_tracker.reset(token)
+        return self.record(request, response, tracker, time.perf_counter() - started)
+
+    def record(self, request, response, tracker, elapsed):
+        view = _view_name(request)
+        metrics.REQUEST_LATENCY.labels(view, request.method).observe(elapsed)
+        metrics.REQUESTS.labels(view, request.method, str(response.status_code)).inc()
+        metrics.REQUEST_QUERIES.labels(view).observe(tracker.count)
+        metrics.REQUEST_DB_TIME.labels(view).observe(tracker.seconds)
+        if not response.streaming:
+            metrics.RESPONSE_SIZE.labels(view).observe(len(response.content))
+        return response
+
+    def process_exception(self, request, exception):
+        metrics.REQUEST_EXCEPTIONS.labels(_view_name(request), type(exception).__name__).inc()
+
+
+class ReadYourWritesMiddleware:
+    """
+    After a user's successful write, keep their reads on the primary for a
+    few seconds so they never see a replica that hasn't caught up (core.db).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        if self.wrote(request, response):
+            db.pin_to_primary(request.user)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if self.wrote(request, response):
+            await sync_to_async(db.pin_to_primary)(request.user)
+        return response
+
+    @staticmethod
+    def wrote(request, response):
+        if request.method in SAFE_METHODS or response.status_code >= 400 or not db.replica_configured():
+            return False
+        # DRF copies the user it authenticated (e.g. from a JWT) onto the request.
+        user = getattr(request, 'user', None)
+        return user is not None and user.is_authenticated
+
+
+def track_queries(execute, sql, params, many, context):
+    """``execute_wrapper`` installed on every connection (see ``CoreConfig.ready``)."""
+    tracker = _query_tracker.get()
+    if tracker is None:
+        return execute(sql, params, many, context)
+    return tracker(execute, sql, params, many, context)
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '<unresolved>'
+    if match.url_name:
+        return f"{match.namespace}:{match.url_name}" if match.namespace else match.url_name
+    return match.route or '<unnamed>'
@@ -0,0 +1,45 @@
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class IdempotencyRecord(models.Model):
+    """
+    Stored outcome of a request made with an ``Idempotency-Key`` header
+    (database backend of ``core.idempotency``).
+    """
+    key = models.CharField(max_length=64, unique=True, help_text="Hash of user, path and client key")
+    fingerprint = models.CharField(max_length=64)
+    completed = models.BooleanField(default=False)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    content_type = models.CharField(max_length=100, blank=True)
+    content = models.BinaryField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return self.key
+
+
+class OutboxEvent(models.Model):
+    """
+    A domain event written in the same transaction as the change it describes
+    and handed to its handler later by the ``process_outbox`` worker.
+    """
+    topic = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    created_at = models.DateTimeField(default=timezone.now)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    # Not delivered before this time; pushed back after each failed attempt.
+    available_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            # The worker only ever scans unprocessed events, oldest first.
+            models.Index(fields=['id'], condition=Q(processed_at__isnull=True), name='outbox_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.topic} #{self.pk}"
@@ -0,0 +1,84 @@
+"""
+Transactional outbox for domain events.
+
+Code that changes state calls ``publish(topic, **payload)`` inside its
+transaction; the event row commits or rolls back with the change. The
+``process_outbox`` worker claims unprocessed events in id order, hands each
+topic's batch to the function registered with ``@handler(topic)`` and marks
+them processed. A handler that raises has its events retried with
+exponential backoff; after ``MAX_ATTEMPTS`` failures they are left alone for
+inspection in the admin.
+
+Handlers receive a list of payload dicts and must be idempotent: an event is
+delivered at least once.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OutboxEvent
+
+MAX_ATTEMPTS = 10
+MAX_BACKOFF = timedelta(hours=1)
+
+_handlers = {}
+
+
+def handler(topic):
+    """Register ``func(payloads)`` as the consumer of ``topic``."""
+    def register(func):
+        _handlers[topic] = func
+        return func
+    return register
+
+
+def publish(topic, **payload):
+    """Record an event in the current transaction."""
+    return OutboxEvent.objects.create(topic=topic, payload=payload)
+
+
+def process_batch(batch_size=500):
+    """Deliver up to ``batch_size`` pending events; return ``(processed, failed)``."""
+    now = timezone.now()
+    with transaction.atomic():
+        events = list(
+            OutboxEvent.objects.select_for_update(skip_locked=True)
+            .filter(processed_at__isnull=True, attempts__lt=MAX_ATTEMPTS, available_at__lte=now)
+            .order_by('id')
+            .values_list('id', 'topic', 'payload', 'attempts')[:batch_size]
+        )
+        by_topic = defaultdict(list)
+        attempts = {}
+        for pk, topic, payload, tries in events:
+            by_topic[topic].append((pk, payload))
+            attempts[pk] = tries
+
+        done, failed = [], {}
+        for topic, batch in by_topic.items():
+            ids = [pk for pk, _ in batch]
+            func = _handlers.get(topic)
+            if func is None:
+                failed[f"No handler registered for {topic!r}."] = ids
+                continue
+            try:
+                with transaction.atomic():
+                    func([payload for _, payload in batch])
+            except Exception as exc:
+                failed.setdefault(f"{type(exc).__name__}: {exc}", []).extend(ids)
+            else:
+                done.extend(ids)
+
+        if done:
+            OutboxEvent.objects.filter(pk__in=done).update(processed_at=timezone.now(), attempts=F('attempts') + 1)
+        for error, ids in failed.items():
+            for tries in {attempts[pk] for pk in ids}:
+                OutboxEvent.objects.filter(pk__in=[pk for pk in ids if attempts[pk] == tries]).update(
+                    attempts=tries + 1,
+                    last_error=error,
+                    available_at=now + min(timedelta(seconds=2 ** tries), MAX_BACKOFF),
+                )
+
+    return len(done), sum(len(ids) for ids in failed.values())
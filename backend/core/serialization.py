@@ -0,0 +1,271 @@
+"""
+Fast path for large read-only lists.
+
+A ``ModelSerializer`` builds a model instance per row and then resolves every
+field through DRF's attribute and ``SkipField`` machinery, which is where list
+endpoints returning thousands of rows spend most of their CPU.
+``RowSerializer`` compiles the same serializer, once per request, into a
+``values_list()`` query and one plain converter per field:
+
+* model columns become lookups (``user.username`` becomes ``user__username``,
+  a join in the same query instead of a query per row);
+* ``get_<field>_display`` becomes a lookup in the field's choice labels;
+* decimals and ISO 8601 datetimes use converters that do what DRF's do,
+  minus the per-value context copy and timezone checks; every other field
+  keeps its own ``to_representation``.
+
+The output equals ``serializer_class(queryset, many=True).data``. A field it
+cannot compile raises ``TypeError``, so a serializer change cannot silently
+drift from the fast path.
+
+``FastJSONRenderer`` renders with orjson when it is installed, producing the
+same bytes as ``JSONRenderer`` for the plain JSON types ``RowSerializer``
+emits. ``FastListMixin`` wires both into a ``ListAPIView``.
+
+``SparseFieldsMixin`` lets clients pick fields (``?fields=``) and expand
+relations (``?expand=``). Since ``RowSerializer`` compiles whatever fields
+remain, list queries then read only those columns and joins.
+"""
+import re
+from decimal import Decimal, getcontext
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.relations import RelatedField
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+try:
+    import orjson
+except ImportError:  # optional; JSONRenderer gives the same bytes, only slower
+    orjson = None
+else:
+    # Types orjson would format differently from JSONRenderer go to ``default``.
+    PASSTHROUGH_OPTIONS = (
+        orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_PASSTHROUGH_SUBCLASS
+    )
+
+DISPLAY = re.compile(r'get_(\w+)_display')
+
+
+class RowSerializer:
+    """A ``ModelSerializer`` class compiled to ``values_list`` rows (see module docs)."""
+
+    def __init__(self, serializer_class, context=None):
+        serializer = serializer_class(context=context or {})
+        # The pk comes first, so rows have ``.pk`` for keyset pagination.
+        self.lookups = ['pk']
+        self.fields = self.compile(serializer, serializer.Meta.model, [])
+
+    def compile(self, serializer, model, prefix):
+        """``(name, index, converter, nested)`` for each of ``serializer``'s fields."""
+        fields = []
+        for field in serializer._readable_fields:
+            if isinstance(field, serializers.ModelSerializer):
+                # A nested object, read through a join; None when the relation is.
+                attrs = [*prefix, *field.source_attrs]
+                related_model = _model_field(model, field.source_attrs, field).related_model
+                nested = self.compile(field, related_model, attrs)
+                fields.append((field.field_name, self.index('__'.join(attrs)), None, nested))
+                continue
+            lookup, convert = _compile(field, model)
+            if lookup == model._meta.pk.name:
+                # The row's own pk, or the foreign key a nested object hangs off.
+                path = '__'.join(prefix) or 'pk'
+            else:
+                path = '__'.join([*prefix, lookup])
+            fields.append((field.field_name, self.index(path), convert, None))
+        return fields
+
+    def index(self, lookup):
+        if lookup not in self.lookups:
+            self.lookups.append(lookup)
+        return self.lookups.index(lookup)
+
+    def values(self, queryset):
+        """``queryset`` as the named rows ``to_representation`` expects."""
+        return queryset.values_list(*self.lookups, named=True)
+
+    def to_representation(self, rows):
+        fields = self.fields
+        return [_represent(fields, row) for row in rows]
+
+
+def _represent(fields, row):
+    return {
+        name: None if row[index] is None else convert(row[index]) if nested is None else _represent(nested, row)
+        for name, index, convert, nested in fields
+    }
+
+
+def _compile(field, model):
+    """``(lookup, converter)`` reproducing ``field`` on ``model`` rows."""
+    attrs = field.source_attrs
+    display = DISPLAY.fullmatch(attrs[0]) if len(attrs) == 1 else None
+    if display:
+        model_field = _model_field(model, [display[1]], field)
+        labels = dict(model_field.flatchoices)
+        to_representation = field.to_representation
+        return display[1], lambda value: to_representation(labels.get(value, value))
+
+    model_field = _model_field(model, attrs, field)
+    lookup = '__'.join(attrs)
+    if isinstance(field, RelatedField):
+        if not field.use_pk_only_optimization() or getattr(field, 'pk_field', None) is not None:
+            raise TypeError(f"{field.field_name}: only plain primary-key related fields are supported.")
+        return lookup, _same
+    if isinstance(field, serializers.FileField):
+        to_representation = field.to_representation
+        attr_class = model_field.attr_class
+        return lookup, lambda name: to_representation(attr_class(None, model_field, name))
+    if isinstance(field, serializers.DecimalField):
+        return lookup, _decimal(field)
+    if isinstance(field, serializers.DateTimeField):
+        return lookup, _datetime(field)
+    if isinstance(field, (serializers.BaseSerializer, serializers.SerializerMethodField, serializers.FloatField)):
+        raise TypeError(f"{field.field_name}: {type(field).__name__} is not supported.")
+    return lookup, field.to_representation
+
+
+def _model_field(model, attrs, field):
+    for attr in attrs[:-1]:
+        try:
+            model = model._meta.get_field(attr).related_model
+        except FieldDoesNotExist:
+            model = None
+        if model is None:
+            break
+    try:
+        model_field = model._meta.get_field(attrs[-1]) if model else None
+    except FieldDoesNotExist:
+        model_field = None
+    if not isinstance(model_field, models.Field):
+        raise TypeError(f"{field.field_name}: source {field.source!r} is not a model column.")
+    return model_field
+
+
+def _same(value):
+    return value
+
+
+def _decimal(field):
+    coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    if field.decimal_places is None or field.normalize_output or field.localize or not coerce_to_string:
+        return field.to_representation
+    exponent = Decimal('.1') ** field.decimal_places
+    rounding = field.rounding
+    context = getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+
+    def convert(value):
+        if not isinstance(value, Decimal):
+            value = Decimal(str(value).strip())
+        return f'{value.quantize(exponent, rounding=rounding, context=context):f}'
+    return convert
+
+
+def _datetime(field):
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if output_format is None or output_format.lower() != ISO_8601 or field_timezone is None:
+        return field.to_representation
+    to_representation = field.to_representation
+
+    def convert(value):
+        if isinstance(value, str) or timezone.is_naive(value):
+            return to_representation(value)
+        value = value.astimezone(field_timezone).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return convert
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    ``JSONRenderer`` through orjson when it is installed. Indented output,
+    non-default JSON settings, datetimes and other non-JSON types fall back to
+    ``JSONRenderer`` itself. orjson writes floats, UUIDs and enums its own way,
+    so use it for data without them, like ``RowSerializer`` output.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None or data is None or self.ensure_ascii or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=_unsupported, option=PASSTHROUGH_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Escaped like JSONRenderer does, to stay a strict JavaScript subset.
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+def _unsupported(value):
+    # Datetimes, dataclasses and str/int/dict/list subclasses end up here.
+    raise TypeError
+
+
+class FastListMixin:
+    """``list()`` through ``RowSerializer`` and ``FastJSONRenderer`` for a ``ListAPIView``."""
+    renderer_classes = [
+        FastJSONRenderer if renderer is JSONRenderer else renderer
+        for renderer in api_settings.DEFAULT_RENDERER_CLASSES
+    ]
+
+    def list(self, request, *args, **kwargs):
+        serializer = RowSerializer(self.get_serializer_class(), context=self.get_serializer_context())
+        queryset = serializer.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serializer.to_representation(page))
+        return Response(serializer.to_representation(queryset))
+
+
+class SparseFieldsMixin:
+    """
+    For a ``ModelSerializer``: ``?fields=a,b`` keeps only those fields, and
+    ``?expand=x`` swaps field ``x`` for (or adds) the nested representation
+    declared in ``Meta.expandable_fields`` as ``{name: (field_class, kwargs)}``.
+    Only applies to the outermost serializer of a safe-method request; unknown
+    names are a 400.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS or not self.is_outermost():
+            return fields
+
+        expandable = getattr(self.Meta, 'expandable_fields', {})
+        expand = _names(request, 'expand')
+        unknown = expand - expandable.keys()
+        if unknown:
+            raise ValidationError({'expand': f"Unknown: {', '.join(sorted(unknown))}. "
+                                             f"Can expand: {', '.join(expandable) or 'nothing'}."})
+        for name in expand:
+            field_class, kwargs = expandable[name]
+            fields[name] = field_class(**kwargs)
+
+        only = _names(request, 'fields')
+        if not only:
+            return fields
+        unknown = only - fields.keys()
+        if unknown:
+            raise ValidationError({'fields': f"Unknown: {', '.join(sorted(unknown))}. "
+                                             f"Available: {', '.join(fields)}."})
+        return {name: field for name, field in fields.items() if name in only}
+
+    def is_outermost(self):
+        parent = self.parent
+        return parent is None or (isinstance(parent, serializers.ListSerializer) and parent.parent is None)
+
+
+def _names(request, param):
+    return {name.strip() for name in request.query_params.get(param, '').split(',') if name.strip()}
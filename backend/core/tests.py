@@ -0,0 +1,326 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework.views import APIView
+
+from investments.models import Deposit, InvestmentPlan, UserInvestment
+from investments.serializers import DepositSerializer, UserInvestmentSerializer
+from transactions.models import TransactionHistory
+from transactions.serializers import TransactionHistorySerializer
+from wallets import ledger
+from wallets.models import Wallet
+from . import db, ids, outbox
+from .checks import check_idempotency_store
+from .conditional import ConditionalGetMixin
+from .idempotency import DatabaseStore
+from .models import IdempotencyRecord, OutboxEvent
+from .serialization import FastJSONRenderer, RowSerializer
+
+User = get_user_model()
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+SHARED = {'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'cache'}}
+
+
+class IdempotencyStoreCheckTests(SimpleTestCase):
+    @override_settings(IDEMPOTENCY={'STORE': 'cache'}, CACHES=LOCMEM)
+    def test_cache_store_needs_a_shared_cache(self):
+        self.assertEqual([error.id for error in check_idempotency_store(None)], ['core.E001'])
+
+    @override_settings(IDEMPOTENCY={'STORE': 'cache'}, CACHES=SHARED)
+    def test_shared_cache_is_accepted(self):
+        self.assertEqual(check_idempotency_store(None), [])
+
+    @override_settings(IDEMPOTENCY={}, CACHES=LOCMEM)
+    def test_database_store_is_the_default(self):
+        self.assertEqual(check_idempotency_store(None), [])
+
+
+class ConditionalGetMixinTests(SimpleTestCase):
+    def test_view_without_get_version_is_refused(self):
+        with self.assertRaisesMessage(ImproperlyConfigured, 'Unversioned uses ConditionalGetMixin'):
+            class Unversioned(ConditionalGetMixin, APIView):
+                pass
+
+    def test_get_version_may_come_from_a_base(self):
+        class Versioned(ConditionalGetMixin, APIView):
+            def get_version(self):
+                return (), None
+
+        class Child(Versioned):
+            pass
+
+        self.assertTrue(callable(Child.get_version))
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'pw')
+        Wallet.objects.create(user=self.user)
+
+    @override_settings(METRICS_TOKEN='')
+    def test_hidden_without_a_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 404)
+
+    @override_settings(METRICS_TOKEN='s3cret')
+    def test_needs_the_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+
+    @override_settings(METRICS_TOKEN='s3cret')
+    def test_reports_requests_and_ledger_entries(self):
+        # Ledger entries are counted once their transaction commits.
+        with self.captureOnCommitCallbacks(execute=True):
+            ledger.credit(self.user.pk, Decimal('5.00'), 'deposit', reference='DEP-1')
+        self.client.get('/api/transactions/')
+
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer s3cret')
+
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('ledger_entries_total{direction="credit",transaction_type="deposit"}', body)
+        self.assertIn('http_requests_total{method="GET",status="401",view="transaction-history"}', body)
+
+
+@mock.patch('core.db.replica_configured', return_value=True)
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'old-password')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def request(self, method='get', user=None):
+        request = getattr(RequestFactory(), method)('/')
+        request.user = user or self.user
+        return request
+
+    def change_password(self, old_password):
+        return self.client.put(
+            '/api/accounts/change-password/',
+            {'old_password': old_password, 'new_password': 'new-password-123'}, format='json',
+        )
+
+    def test_reads_go_to_the_replica_and_writes_to_the_primary(self, configured):
+        self.assertEqual(db.read_alias(self.request()), db.REPLICA)
+        self.assertEqual(db.read_alias(self.request('post')), db.PRIMARY)
+        self.assertEqual(db.PrimaryReplicaRouter().db_for_write(User), db.PRIMARY)
+
+    def test_a_write_pins_its_user_to_the_primary(self, configured):
+        self.assertEqual(self.change_password('old-password').status_code, 200)
+
+        self.assertEqual(db.read_alias(self.request()), db.PRIMARY)
+        bob = User.objects.create_user('bob', 'bob@example.com', 'pw')
+        self.assertEqual(db.read_alias(self.request(user=bob)), db.REPLICA)
+
+    def test_a_failed_write_does_not_pin(self, configured):
+        self.assertEqual(self.change_password('wrong').status_code, 400)
+
+        self.assertEqual(db.read_alias(self.request()), db.REPLICA)
+
+    def test_primary_only_without_a_replica(self, configured):
+        configured.return_value = False
+
+        self.assertEqual(db.read_alias(self.request()), db.PRIMARY)
+
+
+class DatabaseStoreTests(TestCase):
+    def test_key_is_held_until_released(self):
+        store = DatabaseStore()
+
+        self.assertEqual(store.acquire('k', 'f1'), (True, None))
+        self.assertEqual(store.acquire('k', 'f1'), (False, {'fingerprint': 'f1', 'response': None}))
+        store.release('k')
+        self.assertEqual(store.acquire('k', 'f1'), (True, None))
+
+    def test_completed_response_is_returned(self):
+        store = DatabaseStore()
+        store.acquire('k', 'f1')
+
+        store.complete('k', 'f1', (201, 'application/json', b'{}'))
+
+        self.assertEqual(store.acquire('k', 'f1'), (False, {'fingerprint': 'f1', 'response': (201, 'application/json', b'{}')}))
+
+    def test_expired_key_can_be_taken_again(self):
+        store = DatabaseStore()
+        store.acquire('k', 'f1')
+        IdempotencyRecord.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(store.acquire('k', 'f2'), (False, None))
+        self.assertEqual(store.acquire('k', 'f2'), (True, None))
+
+
+class UUID7Tests(SimpleTestCase):
+    def test_layout(self):
+        value = ids.UUID7Generator()(0x0123456789AB)
+
+        self.assertEqual(value.version, 7)
+        self.assertEqual(value.variant, 'specified in RFC 4122')
+        self.assertEqual(value.int >> 80, 0x0123456789AB)
+
+    def test_strictly_increasing_within_a_millisecond(self):
+        generator = ids.UUID7Generator()
+
+        values = [generator(1_000) for _ in range(10_000)]
+
+        self.assertEqual(values, sorted(values))
+        self.assertEqual(len(set(values)), len(values))
+        # More than the 12-bit counter holds: later ones borrow the next milliseconds.
+        self.assertGreater(values[-1].int >> 80, 1_000)
+
+    def test_clock_going_back_keeps_order(self):
+        generator = ids.UUID7Generator()
+        first = generator(5_000)
+
+        self.assertGreater(generator(4_000), first)
+
+    def test_millisecond_orders_across_generators(self):
+        # Separate processes only agree on the millisecond.
+        earlier, later = ids.UUID7Generator(), ids.UUID7Generator()
+
+        self.assertLess(earlier(1_000), later(1_001))
+
+    def test_base32_sorts_like_the_uuid(self):
+        generator = ids.UUID7Generator()
+        values = [generator(ms) for ms in (1, 1, 2, 40_000, 2 ** 47)]
+
+        encoded = [ids.base32(value) for value in values]
+
+        self.assertEqual(encoded, sorted(encoded))
+        self.assertTrue(all(len(text) == 26 and set(text) <= set(ids.CROCKFORD) for text in encoded))
+
+
+class OutboxTests(TestCase):
+    def setUp(self):
+        self.delivered = []
+        handlers = mock.patch.dict(outbox._handlers, {'test.event': self.delivered.append})
+        handlers.start()
+        self.addCleanup(handlers.stop)
+
+    def test_delivers_each_topic_in_one_batch(self):
+        outbox.publish('test.event', n=1)
+        outbox.publish('test.event', n=2)
+
+        self.assertEqual(outbox.process_batch(), (2, 0))
+
+        self.assertEqual(self.delivered, [[{'n': 1}, {'n': 2}]])
+        self.assertFalse(OutboxEvent.objects.filter(processed_at__isnull=True).exists())
+        self.assertEqual(outbox.process_batch(), (0, 0))
+
+    def test_event_rolls_back_with_its_transaction(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            outbox.publish('test.event', n=1)
+            raise RuntimeError
+
+        self.assertEqual(outbox.process_batch(), (0, 0))
+
+    def test_failed_batch_is_retried_with_backoff(self):
+        writes = []
+
+        def flaky(payloads):
+            OutboxEvent.objects.create(topic='side.effect')
+            writes.append(payloads)
+            if len(writes) == 1:
+                raise ValueError("downstream unavailable")
+            self.delivered.append(payloads)
+
+        outbox._handlers['test.event'] = flaky
+        event = outbox.publish('test.event', n=1)
+
+        self.assertEqual(outbox.process_batch(), (0, 1))
+        event.refresh_from_db()
+        self.assertEqual((event.attempts, event.last_error), (1, 'ValueError: downstream unavailable'))
+        self.assertGreater(event.available_at, timezone.now())
+        # The handler's own writes were rolled back with it.
+        self.assertFalse(OutboxEvent.objects.filter(topic='side.effect').exists())
+        self.assertEqual(outbox.process_batch(), (0, 0))
+
+        OutboxEvent.objects.filter(pk=event.pk).update(available_at=timezone.now())
+        self.assertEqual(outbox.process_batch(), (1, 0))
+        self.assertEqual(self.delivered, [[{'n': 1}]])
+
+    def test_unknown_topic_fails(self):
+        event = outbox.publish('nobody.listens')
+
+        self.assertEqual(outbox.process_batch(), (0, 1))
+
+        event.refresh_from_db()
+        self.assertEqual(event.last_error, "No handler registered for 'nobody.listens'.")
+
+    def test_gives_up_after_max_attempts(self):
+        outbox.publish('test.event', n=1)
+        OutboxEvent.objects.update(attempts=outbox.MAX_ATTEMPTS)
+
+        self.assertEqual(outbox.process_batch(), (0, 0))
+        self.assertEqual(self.delivered, [])
+
+
+class RowSerializerTests(TestCase):
+    """``RowSerializer`` + ``FastJSONRenderer`` must render the same bytes as DRF."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('zoë', 'zoe@example.com', 'pw')
+        Wallet.objects.create(user=cls.user)
+        ledger.credit(cls.user.pk, Decimal('1234.5'), 'deposit', reference='DEP-1',
+                      description='line\u2028separator, "quotes", emoji 🚀 and \\ backslash')
+        ledger.debit(cls.user.pk, Decimal('0.1'), 'withdrawal', reference='WDR-1')
+        plan = InvestmentPlan.objects.create(
+            name='Gold ✨', min_amount=Decimal('10.00'), max_amount=Decimal('1000.00'),
+            daily_roi=Decimal('1.25'), duration_days=30, total_return=Decimal('137.50'),
+        )
+        investment = UserInvestment(user=cls.user, plan=plan, amount=Decimal('100.00'))
+        investment.save()
+        investment.calculate_expected_profit()
+        investment.save()
+        Deposit.objects.create(user=cls.user, amount=Decimal('50.00'), proof='deposits/proof é.png')
+        Deposit.objects.create(user=cls.user, amount=Decimal('75.25'), proof='')
+
+    def setUp(self):
+        cache.clear()
+
+    def context(self, query=''):
+        request = Request(APIRequestFactory().get(f'/{query}'))
+        return {'request': request}
+
+    def assertSameOutput(self, serializer_class, queryset, query=''):
+        context = self.context(query)
+        expected = JSONRenderer().render(serializer_class(queryset, many=True, context=context).data)
+        serializer = RowSerializer(serializer_class, context=context)
+        actual = FastJSONRenderer().render(serializer.to_representation(serializer.values(queryset)))
+        self.assertEqual(actual, expected)
+        return actual
+
+    def test_transactions(self):
+        body = self.assertSameOutput(TransactionHistorySerializer, TransactionHistory.objects.order_by('-id'))
+        self.assertIn(b'\\u2028', body)
+
+    def test_investments(self):
+        self.assertSameOutput(UserInvestmentSerializer, UserInvestment.objects.order_by('-start_date'))
+
+    def test_deposits_with_file_urls(self):
+        self.assertSameOutput(DepositSerializer, Deposit.objects.order_by('pk'))
+
+    def test_sparse_fields(self):
+        self.assertSameOutput(TransactionHistorySerializer, TransactionHistory.objects.order_by('-id'),
+                              '?fields=id,amount,status_display')
+
+    def test_expanded_relation(self):
+        body = self.assertSameOutput(DepositSerializer, Deposit.objects.order_by('pk'), '?expand=user')
+        self.assertIn('"username":"zoë"'.encode(), body)
+
+    def test_unknown_field_is_rejected(self):
+        with self.assertRaises(ValidationError):
+            RowSerializer(TransactionHistorySerializer, context=self.context('?fields=id,nope'))
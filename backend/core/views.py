@@ -0,0 +1,20 @@
+import hmac
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+
+from . import metrics as metrics_registry
+
+
+def metrics(request):
+    """
+    Prometheus scrape endpoint, behind ``Authorization: Bearer <METRICS_TOKEN>``.
+    Without a configured token it does not exist (404).
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if not token:
+        raise Http404
+    if not hmac.compare_digest(request.headers.get('Authorization', ''), f"Bearer {token}"):
+        return HttpResponseForbidden()
+    body, content_type = metrics_registry.render()
+    return HttpResponse(body, content_type=content_type)
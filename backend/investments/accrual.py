@@ -0,0 +1,109 @@
+"""
+Daily profit accrual for active user investments.
+
+Investments are walked in primary-key order in fixed-size chunks. Each chunk
+is priced from plain ``values_list`` tuples, credited to wallets through
+``wallets.ledger.bulk_credit`` (one grouped UPDATE + one bulk insert) and
+stamped with ``last_accrued_on`` in the same transaction. A chunk is either
+fully paid or not at all, and paid rows drop out of the next run's filter,
+so the job can be re-run for the same date without paying twice.
+"""
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DateField, DecimalField, F, Q, Value, When
+from django.utils import timezone
+
+from wallets import ledger
+from .interest import simple_profit
+from .models import UserInvestment
+
+
+@dataclass
+class AccrualResult:
+    scanned: int = 0
+    accrued: int = 0
+    total_profit: Decimal = Decimal("0.00")
+    seconds: float = 0.0
+
+
+def accrue_profits(accrual_date=None, chunk_size=1000):
+    """
+    Accrue profit on every active investment up to and including
+    ``accrual_date`` (defaults to today). Missed days are caught up.
+    """
+    accrual_date = accrual_date or timezone.localdate()
+    result = AccrualResult()
+    started = time.monotonic()
+    last_pk = 0
+
+    while True:
+        with transaction.atomic():
+            rows = list(
+                UserInvestment.objects
+                .filter(status='active', pk__gt=last_pk)
+                .filter(Q(last_accrued_on__isnull=True) | Q(last_accrued_on__lt=accrual_date))
+                .select_for_update(of=('self',))
+                .order_by('pk')
+                .values_list(
+                    'pk', 'user_id', 'amount', 'start_date', 'end_date', 'last_accrued_on',
+                    'accrued_profit', 'expected_profit', 'plan__daily_roi', 'plan__duration_days', 'plan__name',
+                )[:chunk_size]
+            )
+            if not rows:
+                break
+            last_pk = rows[-1][0]
+            result.scanned += len(rows)
+
+            accruals = _price_chunk(rows, accrual_date)
+            if accruals:
+                _apply_chunk(accruals)
+                result.accrued += len(accruals)
+                result.total_profit += sum(profit for _, _, profit, _, _ in accruals)
+
+    result.seconds = time.monotonic() - started
+    return result
+
+
+def _price_chunk(rows, accrual_date):
+    """Work out ``(pk, user_id, profit, accrued_to, plan_name)`` for each row that is due."""
+    accruals = []
+    for (pk, user_id, amount, start_date, end_date, last_accrued_on,
+         accrued_profit, expected_profit, daily_roi, duration_days, plan_name) in rows:
+        start_day = timezone.localdate(start_date)
+        maturity_day = timezone.localdate(end_date) if end_date else start_day + timedelta(days=duration_days)
+        accrued_from = last_accrued_on or start_day
+        accrued_to = min(accrual_date, maturity_day)
+        days = (accrued_to - accrued_from).days
+        if days <= 0:
+            continue
+
+        if accrued_to == maturity_day:
+            # Final accrual pays the remainder, so rounding never drifts from expected_profit.
+            profit = expected_profit - accrued_profit
+        else:
+            # Price cumulatively from the start date, so per-day rounding never accumulates.
+            profit = simple_profit(amount, daily_roi, (accrued_to - start_day).days) - accrued_profit
+        if profit > 0:
+            accruals.append((pk, user_id, profit, accrued_to, plan_name))
+    return accruals
+
+
+def _apply_chunk(accruals):
+    ledger.bulk_credit(
+        (user_id, profit, 'profit', f"ACR-{pk}-{accrued_to:%Y%m%d}", f"Daily profit from {plan_name} investment")
+        for pk, user_id, profit, accrued_to, plan_name in accruals
+    )
+    UserInvestment.objects.filter(pk__in=[pk for pk, *_ in accruals]).update(
+        accrued_profit=F('accrued_profit') + Case(
+            *[When(pk=pk, then=Value(profit)) for pk, _, profit, _, _ in accruals],
+            output_field=DecimalField(max_digits=12, decimal_places=2),
+        ),
+        last_accrued_on=Case(
+            *[When(pk=pk, then=Value(accrued_to)) for pk, _, _, accrued_to, _ in accruals],
+            output_field=DateField(),
+        ),
+    )
@@ -1,9 +1,15 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.utils.html import format_html
+from core.changelist import DateDrillDownFilter, LargeTableAdminMixin
+from core.db import ReplicaChangeListMixin
+from . import bulk
 from .models import (
     InvestmentPlan,
     UserInvestment,
     Deposit,
     Withdrawal,
+    DailyCashflow,
+    DailyPlanRollup,
 )
 
 
@@ -20,7 +26,7 @@ class InvestmentPlanAdmin(admin.ModelAdmin):
 
 
 @admin.register(UserInvestment)
-class UserInvestmentAdmin(admin.ModelAdmin):
+class UserInvestmentAdmin(ReplicaChangeListMixin, admin.ModelAdmin):
     list_display = ('user', 'plan', 'amount', 'status', 'start_date', 'end_date', 'expected_profit', 'total_payout')
     list_filter = ('status', 'plan')
     search_fields = ('user__username', 'plan__name')
@@ -29,27 +35,97 @@ class UserInvestmentAdmin(admin.ModelAdmin):
 
 
 
+# ==============================
+# 💰 Deposits & Withdrawals
+# ==============================
+def _report(modeladmin, request, results):
+    done = sum(1 for result in results if "error" not in result)
+    modeladmin.message_user(request, f"{done} of {len(results)} item(s) updated.", messages.SUCCESS)
+    for result in results:
+        if "error" in result:
+            modeladmin.message_user(request, f"#{result['id']}: {result['error']}", messages.WARNING)
+
+
 @admin.register(Deposit)
-class DepositAdmin(admin.ModelAdmin):
-    list_display = ('user', 'amount', 'status', 'created_at', 'updated_at')
-    list_filter = ('status',)
+class DepositAdmin(ReplicaChangeListMixin, LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ('user', 'amount', 'status', 'proof_preview', 'created_at', 'updated_at')
+    readonly_fields = ('proof_status', 'proof_sha256', 'proof_review')
+    exclude = ('proof_thumbnail', 'proof_web')
+    list_filter = ('status', ('created_at', DateDrillDownFilter))
+    list_select_related = ('user',)
     search_fields = ('user__username',)
-    date_hierarchy = 'created_at'
+    search_help_text = "Start of a username (case-sensitive)."
     ordering = ('-created_at',)
+    actions = ('approve_selected', 'reject_selected')
+
+    @admin.display(description="Proof")
+    def proof_preview(self, obj):
+        if not obj.proof_thumbnail:
+            return obj.get_proof_status_display()
+        return format_html('<img src="{}" style="max-height:60px" loading="lazy">', obj.proof_thumbnail.url)
+
+    @admin.display(description="Proof image")
+    def proof_review(self, obj):
+        if not obj.proof_web:
+            return obj.get_proof_status_display()
+        return format_html(
+            '<a href="{}" target="_blank"><img src="{}" style="max-width:640px"></a>',
+            obj.proof.url, obj.proof_web.url,
+        )
+
+    @admin.action(description="Approve selected deposits", permissions=['change'])
+    def approve_selected(self, request, queryset):
+        _report(self, request, bulk.approve_deposits(list(queryset.values_list('pk', flat=True))))
+
+    @admin.action(description="Reject selected deposits", permissions=['change'])
+    def reject_selected(self, request, queryset):
+        _report(self, request, bulk.reject_deposits(list(queryset.values_list('pk', flat=True))))
 
 
 @admin.register(Withdrawal)
-class WithdrawalAdmin(admin.ModelAdmin):
+class WithdrawalAdmin(ReplicaChangeListMixin, LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ('user', 'amount', 'status', 'created_at', 'updated_at')
-    list_filter = ('status',)
+    list_filter = ('status', ('created_at', DateDrillDownFilter))
+    list_select_related = ('user',)
     search_fields = ('user__username',)
-    date_hierarchy = 'created_at'
+    search_help_text = "Start of a username (case-sensitive)."
     ordering = ('-created_at',)
-    
-# Note: Consider adding actions for bulk approving/rejecting deposits and withdrawals in the future.
+    actions = ('approve_selected', 'reject_selected')
+
+    @admin.action(description="Approve selected withdrawals", permissions=['change'])
+    def approve_selected(self, request, queryset):
+        _report(self, request, bulk.approve_withdrawals(list(queryset.values_list('pk', flat=True))))
+
+    @admin.action(description="Reject selected withdrawals", permissions=['change'])
+    def reject_selected(self, request, queryset):
+        _report(self, request, bulk.reject_withdrawals(list(queryset.values_list('pk', flat=True))))
+
+
 # ==============================
-# 🧩 Developer Note
+# 📊 Analytics Rollups
 # ==============================
-# Note: Consider adding admin actions for bulk approving/rejecting
-# deposits and withdrawals in the future. This can streamline
-# admin workflow and reduce manual review time.
\ No newline at end of file
+class RollupAdmin(admin.ModelAdmin):
+    """Read-only: the rows are rebuilt by the build_rollups command."""
+    date_hierarchy = 'day'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(DailyCashflow)
+class DailyCashflowAdmin(RollupAdmin):
+    list_display = ('day', 'kind', 'status', 'count', 'total')
+    list_filter = ('kind', 'status')
+
+
+@admin.register(DailyPlanRollup)
+class DailyPlanRollupAdmin(RollupAdmin):
+    list_display = ('day', 'plan', 'new_investments', 'invested', 'matured', 'principal_returned', 'profit_paid')
+    list_filter = ('plan',)
+    list_select_related = ('plan',)
@@ -0,0 +1,82 @@
+"""
+Async versions of the dashboard read endpoints, for ASGI deployments.
+
+They return the same JSON as their DRF counterparts in ``views.py`` but never
+hold a thread while the client is slow: authentication and every query run in
+short-lived worker threads (``core.aio.run_concurrently``), and ``dashboard``
+loads all four sections at once instead of one after another.
+"""
+from functools import partial
+
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+from rest_framework.utils.encoders import JSONEncoder
+
+from core import aio
+from core.db import read_alias
+
+from . import dashboard as builders
+
+
+def _json(data, status=200):
+    # Same encoding as DRF's JSONRenderer.
+    return JsonResponse(
+        data, status=status, safe=False, encoder=JSONEncoder,
+        json_dumps_params={'separators': (',', ':'), 'ensure_ascii': False},
+    )
+
+
+def _authenticated(view):
+    async def wrapper(request):
+        user = await aio.authenticate(request)
+        if user is None:
+            return _json({"detail": "Authentication credentials were not provided or are invalid."}, status=401)
+        return await view(request, user)
+    wrapper.__name__ = view.__name__
+    wrapper.__doc__ = view.__doc__
+    return require_GET(wrapper)
+
+
+@_authenticated
+async def overview(request, user):
+    """Async WalletOverviewView."""
+    data, = await aio.run_concurrently(partial(builders.overview, user))
+    return _json(data)
+
+
+@_authenticated
+async def wallet(request, user):
+    """Async WalletView."""
+    data, = await aio.run_concurrently(partial(builders.wallet, user))
+    return _json(data)
+
+
+@_authenticated
+async def active_investments(request, user):
+    """Async ActiveInvestmentsView."""
+    data, = await aio.run_concurrently(partial(builders.active_investments, user, read_alias(request)))
+    return _json(data)
+
+
+@_authenticated
+async def recent_transactions(request, user):
+    """The user's latest transactions, newest first."""
+    data, = await aio.run_concurrently(partial(builders.recent_transactions, user, read_alias(request)))
+    return _json(data)
+
+
+@_authenticated
+async def dashboard(request, user):
+    """Overview, wallet, active investments and recent transactions in one response."""
+    alias = read_alias(request)
+    (overview_data, wallet_data), investments, transactions = await aio.run_concurrently(
+        partial(builders.overview_and_wallet, user),
+        partial(builders.active_investments, user, alias),
+        partial(builders.recent_transactions, user, alias),
+    )
+    return _json({
+        "overview": overview_data,
+        "wallet": wallet_data,
+        "active_investments": investments,
+        "recent_transactions": transactions,
+    })
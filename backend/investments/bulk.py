@@ -0,0 +1,97 @@
+"""
+Batch approval and rejection of deposits and withdrawals.
+
+Each call locks the requested rows once, moves all the money through one
+grouped ledger write (``wallets.ledger.bulk_credit`` / ``bulk_debit``) and
+flips statuses with one UPDATE, all in a single transaction. The result is a
+per-item report: ``[{"id": 1, "status": "approved"}, {"id": 2, "error": "..."}]``.
+Only pending rows change; anything already approved or rejected is reported
+as such and left alone.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from wallets import ledger
+from .models import Deposit, Withdrawal
+
+
+def approve_deposits(ids):
+    ids = _unique(ids)
+    with transaction.atomic():
+        found = _lock(Deposit, ids)
+        approvable = [row for row in found.values() if row[2] == 'pending']
+        ledger.bulk_credit(
+            (user_id, amount, 'deposit', f"DEP-{pk}", 'Deposit approved and credited to wallet')
+            for pk, user_id, _, amount in approvable
+        )
+        _set_status(Deposit, [row[0] for row in approvable], 'approved')
+
+    approved = {row[0] for row in approvable}
+    return [_result(pk, found, approved, 'approved', "Deposit") for pk in ids]
+
+
+def reject_deposits(ids):
+    return _reject(Deposit, "Deposit", _unique(ids))
+
+
+def approve_withdrawals(ids):
+    """Approve withdrawals in id order; any the wallet can't cover are rejected."""
+    ids = _unique(ids)
+    with transaction.atomic():
+        found = _lock(Withdrawal, ids)
+        pending = [found[pk] for pk in sorted(found) if found[pk][2] == 'pending']
+        entries = ledger.bulk_debit(
+            (user_id, amount, 'withdrawal', f"WDR-{pk}", 'Withdrawal approved and sent')
+            for pk, user_id, _, amount in pending
+        )
+        approved = {row[0] for row, entry in zip(pending, entries) if entry}
+        _set_status(Withdrawal, approved, 'approved')
+        _set_status(Withdrawal, {row[0] for row in pending} - approved, 'rejected')
+
+    results = []
+    for pk in ids:
+        if pk in found and found[pk][2] == 'pending' and pk not in approved:
+            results.append({"id": pk, "status": "rejected", "error": "Insufficient wallet balance."})
+        else:
+            results.append(_result(pk, found, approved, 'approved', "Withdrawal"))
+    return results
+
+
+def reject_withdrawals(ids):
+    return _reject(Withdrawal, "Withdrawal", _unique(ids))
+
+
+def _reject(model, label, ids):
+    with transaction.atomic():
+        found = _lock(model, ids)
+        rejectable = {pk for pk, _, status, _ in found.values() if status == 'pending'}
+        _set_status(model, rejectable, 'rejected')
+    return [_result(pk, found, rejectable, 'rejected', label) for pk in ids]
+
+
+def _unique(ids):
+    return list(dict.fromkeys(ids))
+
+
+def _lock(model, ids):
+    """Lock the rows and return ``{pk: (pk, user_id, status, amount)}``."""
+    rows = (
+        model.objects.select_for_update()
+        .filter(pk__in=ids)
+        .order_by('pk')
+        .values_list('pk', 'user_id', 'status', 'amount')
+    )
+    return {row[0]: row for row in rows}
+
+
+def _set_status(model, ids, status):
+    if ids:
+        model.objects.filter(pk__in=ids).update(status=status, updated_at=timezone.now())
+
+
+def _result(pk, found, changed, status, label):
+    if pk not in found:
+        return {"id": pk, "error": f"{label} not found."}
+    if pk not in changed:
+        return {"id": pk, "error": f"{label} is already {found[pk][2]}."}
+    return {"id": pk, "status": status}
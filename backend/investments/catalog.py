@@ -0,0 +1,65 @@
+"""
+Cached investment plan catalog.
+
+Plans are read on almost every investment request but change rarely, so the
+whole catalog is kept in Django's cache under a version token. Saving or
+deleting a plan bumps the token (see ``investments.signals``), which makes
+every cached entry unreachable at once. The token itself expires after
+``CATALOG_TIMEOUT`` so per-process caches (the local-memory default) pick up
+changes made by other processes within that window.
+"""
+import hashlib
+import json
+import uuid
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import InvestmentPlan
+
+VERSION_KEY = 'investments:plan-catalog:version'
+CATALOG_TIMEOUT = 300
+
+
+def get_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(VERSION_KEY, version, CATALOG_TIMEOUT):
+            version = cache.get(VERSION_KEY, version)
+    return version
+
+
+def bump_version():
+    cache.set(VERSION_KEY, uuid.uuid4().hex, CATALOG_TIMEOUT)
+
+
+def get_plans():
+    """Return ``{plan_id: InvestmentPlan}`` for every plan."""
+    key = f'investments:plan-catalog:{get_version()}:plans'
+    plans = cache.get(key)
+    if plans is None:
+        plans = {plan.pk: plan for plan in InvestmentPlan.objects.order_by('pk')}
+        cache.set(key, plans, CATALOG_TIMEOUT)
+    return plans
+
+
+def get_plan(plan_id):
+    return get_plans().get(plan_id)
+
+
+def get_plan_list():
+    """
+    Return ``(data, etag)`` for the public plan list. The ETag is a hash of
+    the payload, so it is identical across processes for identical data.
+    """
+    from .serializers import InvestmentPlanSerializer
+
+    key = f'investments:plan-catalog:{get_version()}:list'
+    cached = cache.get(key)
+    if cached is None:
+        data = InvestmentPlanSerializer(get_plans().values(), many=True).data
+        payload = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True).encode()
+        cached = (data, f'"{hashlib.md5(payload).hexdigest()}"')
+        cache.set(key, cached, CATALOG_TIMEOUT)
+    return cached
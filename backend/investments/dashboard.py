@@ -0,0 +1,75 @@
+"""
+Read models for the dashboard endpoints.
+
+Each builder is a plain blocking function returning serialized data, shared by
+the DRF views in ``views.py`` and the async views in ``async_views.py`` (which
+run several of them at once, each on its own connection, see ``core.aio``).
+"""
+from transactions.models import TransactionHistory
+from transactions.serializers import TransactionHistorySerializer
+from wallets.models import Wallet
+
+from .models import UserInvestment
+from .serializers import UserInvestmentSerializer, WalletSerializer
+
+RECENT_TRANSACTIONS = 10
+
+
+def _wallet(user):
+    wallet, _ = Wallet.objects.get_or_create(user=user)
+    return wallet
+
+
+def overview(user):
+    return _overview(_wallet(user))
+
+
+def wallet(user, context=None):
+    return WalletSerializer(_wallet(user), context=context or {}).data
+
+
+def overview_and_wallet(user, context=None):
+    """``overview`` and ``wallet`` together, from one read of the wallet row."""
+    wallet = _wallet(user)
+    return _overview(wallet), WalletSerializer(wallet, context=context or {}).data
+
+
+def _overview(wallet):
+    # Every figure is kept current on the wallet row by wallets.ledger,
+    # so this is a single row read (see rebuild_wallet_summaries).
+    last_transaction_data = (
+        {
+            "transaction_type": wallet.last_transaction_type,
+            "amount": wallet.last_transaction_amount,
+            "status": wallet.last_transaction_status,
+            "created_at": wallet.last_transaction_at,
+        }
+        if wallet.last_transaction_at
+        else None
+    )
+
+    return {
+        "balance": wallet.balance,
+        "total_deposits": wallet.total_deposited,
+        "total_withdrawals": wallet.total_withdrawn,
+        "total_profits": wallet.total_profit,
+        "last_transaction": last_transaction_data,
+    }
+
+
+def active_investments_queryset(user):
+    return UserInvestment.objects.filter(user=user, status="active").order_by("-start_date")
+
+
+def active_investments(user, using='default'):
+    return UserInvestmentSerializer(active_investments_queryset(user).using(using), many=True).data
+
+
+def recent_transactions(user, using='default', limit=RECENT_TRANSACTIONS):
+    queryset = (
+        TransactionHistory.objects.using(using)
+        .filter(user=user)
+        .select_related('user')
+        .order_by('-id')[:limit]
+    )
+    return TransactionHistorySerializer(queryset, many=True).data
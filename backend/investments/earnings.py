@@ -0,0 +1,162 @@
+"""
+Earnings schedules and projections for the dashboard charts.
+
+Every figure is what daily accrual (``investments.accrual``) pays: cumulative
+``simple_profit`` from the start date, with the maturity day topping up to
+``expected_profit``. Curves are computed whole rather than day by day. With
+amounts and rates as integer cents, day ``d``'s cumulative profit is
+``round_half_up(amount * rate * d / 10_000)`` cents, which gives a plan's whole
+curve in a single array expression. That uses NumPy when it is installed and
+the figures fit in 64 bits, and plain integers otherwise. Both paths match
+``simple_profit`` to the cent. Portfolios add the per-investment curves up by
+date.
+
+Curves are cached under the plan catalog version (``catalog.get_version``),
+so editing a plan retires every schedule and projection priced from it.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from . import catalog
+
+try:
+    import numpy as np
+except ImportError:  # optional; the integer path gives identical results
+    np = None
+
+INT64_MAX = 2 ** 63 - 1
+
+
+def cumulative_cents(amount, daily_roi, days):
+    """``simple_profit(amount, daily_roi, d)`` in cents for every ``d`` in ``1..days``."""
+    rate = _cents(amount) * _cents(daily_roi)
+    if np is not None and 2 * rate * days + 10_000 <= INT64_MAX:
+        return ((2 * rate * np.arange(1, days + 1, dtype=np.int64) + 10_000) // 20_000).tolist()
+    return [(2 * rate * day + 10_000) // 20_000 for day in range(1, days + 1)]
+
+
+def investment_curve(investment):
+    """Cumulative profit in cents for each day of ``investment``, cached per plan version."""
+    return _investment_curves([investment])[investment.pk]
+
+
+def schedule(investment):
+    """Day-by-day earnings of one ``UserInvestment``."""
+    plan = catalog.get_plan(investment.plan_id) or investment.plan
+    start_day = timezone.localdate(investment.start_date)
+    curve = investment_curve(investment)
+    return {
+        "investment": investment.pk,
+        "plan": plan.pk,
+        "plan_name": plan.name,
+        "amount": str(investment.amount),
+        "start_date": start_day,
+        "maturity_date": start_day + timedelta(days=len(curve)),
+        "expected_profit": str(investment.expected_profit),
+        "accrued_profit": str(investment.accrued_profit),
+        "accrued_through": investment.last_accrued_on,
+        "days": [
+            {
+                "day": day,
+                "date": start_day + timedelta(days=day),
+                "profit": _money(cents - previous),
+                "cumulative": _money(cents),
+            }
+            for day, (previous, cents) in enumerate(zip([0, *curve], curve), start=1)
+        ],
+    }
+
+
+def portfolio(investments):
+    """Combined daily earnings of several investments, by calendar date."""
+    investments = list(investments)
+    if not investments:
+        return {"investments": 0, "expected_profit": _money(0), "days": []}
+
+    curves = _investment_curves(investments)
+    starts = {investment.pk: timezone.localdate(investment.start_date) for investment in investments}
+    base = min(starts.values())
+    offsets = {pk: (start - base).days for pk, start in starts.items()}
+    first_day = base + timedelta(days=1)
+
+    # Each investment's daily profit, added into one list indexed by date.
+    daily = [0] * max(offsets[pk] + len(curve) for pk, curve in curves.items())
+    for pk, curve in curves.items():
+        previous = 0
+        for index, cents in enumerate(curve, start=offsets[pk]):
+            daily[index] += cents - previous
+            previous = cents
+
+    days = []
+    cumulative = 0
+    for index, cents in enumerate(daily):
+        cumulative += cents
+        days.append({
+            "date": first_day + timedelta(days=index),
+            "profit": _money(cents),
+            "cumulative": _money(cumulative),
+        })
+    return {"investments": len(investments), "expected_profit": _money(cumulative), "days": days}
+
+
+def projection(amount):
+    """What investing ``amount`` in each plan would earn, day by day."""
+    key = f'investments:earnings:{catalog.get_version()}:projection:{amount}'
+    result = cache.get(key)
+    if result is None:
+        result = []
+        for plan in catalog.get_plans().values():
+            curve = cumulative_cents(amount, plan.daily_roi, plan.duration_days)
+            profit = curve[-1] if curve else 0
+            result.append({
+                "plan": plan.pk,
+                "plan_name": plan.name,
+                "eligible": plan.min_amount <= amount <= plan.max_amount,
+                "duration_days": plan.duration_days,
+                "total_profit": _money(profit),
+                "total_payout": _money(_cents(amount) + profit),
+                "cumulative": [_money(cents) for cents in curve],
+            })
+        cache.set(key, result, catalog.CATALOG_TIMEOUT)
+    return result
+
+
+def _investment_curves(investments):
+    version = catalog.get_version()
+    keys = {
+        investment.pk: (
+            f'investments:earnings:{version}:investment:{investment.pk}:'
+            f'{investment.amount}:{investment.start_date:%Y%m%d}:{investment.expected_profit}'
+        )
+        for investment in investments
+    }
+    cached = cache.get_many(keys.values())
+    curves = {pk: cached[key] for pk, key in keys.items() if key in cached}
+
+    missing = {}
+    for investment in investments:
+        if investment.pk in curves:
+            continue
+        plan = catalog.get_plan(investment.plan_id) or investment.plan
+        curve = cumulative_cents(investment.amount, plan.daily_roi, plan.duration_days)
+        if curve:
+            # Maturity pays whatever is left of expected_profit.
+            curve[-1] = _cents(investment.expected_profit)
+        curves[investment.pk] = missing[keys[investment.pk]] = curve
+    if missing:
+        cache.set_many(missing, catalog.CATALOG_TIMEOUT)
+    return curves
+
+
+def _cents(value):
+    cents = Decimal(value) * 100
+    if cents != cents.to_integral_value():
+        raise ValueError(f"{value} has more than two decimal places.")
+    return int(cents)
+
+
+def _money(cents):
+    return str(Decimal(int(cents)).scaleb(-2))
@@ -0,0 +1,48 @@
+"""
+Decimal interest maths for investment plans.
+
+All results are money values rounded to the cent with ROUND_HALF_UP, and only
+the final figure is rounded. Compound growth uses per-plan tables of
+``(1 + daily_roi/100) ** day`` for day 0..duration_days, built once per plan
+and dropped as soon as the plan's ``daily_roi`` or ``duration_days`` changes.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+
+CENT = Decimal("0.01")
+
+# plan_id -> ((daily_roi, duration_days), factors)
+_growth_factors = {}
+
+
+def quantize_money(value):
+    """Round a Decimal to the cent (ROUND_HALF_UP)."""
+    return value.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def simple_profit(amount, daily_roi, days):
+    """Profit of ``amount`` at ``daily_roi`` percent a day for ``days`` days, without compounding."""
+    return quantize_money(amount * daily_roi * days / 100)
+
+
+def growth_factor(plan, days):
+    """``(1 + daily_roi/100) ** days`` for ``plan``, served from the per-plan cache."""
+    key = (plan.daily_roi, plan.duration_days)
+    cached = _growth_factors.get(plan.pk)
+    if cached is None or cached[0] != key:
+        rate = 1 + plan.daily_roi / 100
+        factors = [rate ** day for day in range(plan.duration_days + 1)]
+        cached = _growth_factors[plan.pk] = (key, factors)
+
+    factors = cached[1]
+    if days < len(factors):
+        return factors[days]
+    return factors[-1] * (1 + plan.daily_roi / 100) ** (days - len(factors) + 1)
+
+
+def compound_profit(amount, plan, days):
+    """Profit of ``amount`` compounded daily on ``plan`` for ``days`` days."""
+    return quantize_money(amount * (growth_factor(plan, days) - 1))
+
+
+def invalidate_growth_factors(plan_id):
+    _growth_factors.pop(plan_id, None)
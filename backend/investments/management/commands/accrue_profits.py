@@ -0,0 +1,28 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from investments.accrual import accrue_profits
+
+
+class Command(BaseCommand):
+    help = "Accrue daily profit on all active investments and credit it to wallets."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help="Accrue up to this day (YYYY-MM-DD). Defaults to today.")
+        parser.add_argument('--chunk-size', type=int, default=1000, help="Investments processed per transaction.")
+
+    def handle(self, *args, **options):
+        accrual_date = None
+        if options['date']:
+            try:
+                accrual_date = date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError("--date must be in YYYY-MM-DD format.")
+
+        result = accrue_profits(accrual_date, chunk_size=options['chunk_size'])
+        rate = result.scanned / result.seconds if result.seconds else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Scanned {result.scanned} investment(s), accrued {result.accrued} "
+            f"for ₦{result.total_profit} in {result.seconds:.1f}s ({rate:.0f}/s)."
+        ))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from investments.maturity import complete_matured
+
+
+class Command(BaseCommand):
+    help = "Complete expired investments and pay principal and remaining profit to wallets."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help="Investments processed per transaction.")
+
+    def handle(self, *args, **options):
+        result = complete_matured(chunk_size=options['chunk_size'])
+        rate = result.completed / result.seconds if result.seconds else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Completed {result.completed} investment(s), paid out ₦{result.total_payout} "
+            f"in {result.seconds:.1f}s ({rate:.0f}/s)."
+        ))
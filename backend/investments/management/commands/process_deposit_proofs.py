@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from investments.models import Deposit
+from investments.proofs import process_proof
+
+
+class Command(BaseCommand):
+    help = "Process deposit proof images that are still pending (e.g. after a restart)."
+
+    def handle(self, *args, **options):
+        ids = list(Deposit.objects.filter(proof_status='pending').order_by('pk').values_list('pk', flat=True))
+        for deposit_id in ids:
+            process_proof(deposit_id)
+        self.stdout.write(self.style.SUCCESS(f"Processed {len(ids)} deposit proof(s)."))
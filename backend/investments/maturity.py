@@ -0,0 +1,80 @@
+"""
+Maturity sweep: complete expired user investments and pay them out.
+
+Expired active investments are walked in primary-key order in fixed-size
+chunks. For each chunk the principal and whatever profit daily accrual has not
+yet paid (``total_payout - accrued_profit``) are credited through
+``wallets.ledger.bulk_credit`` and the statuses are flipped with one UPDATE,
+in the same transaction. A crash mid-sweep leaves every chunk either fully
+paid and completed or untouched, and completed rows drop out of the filter, so
+the sweep can simply be run again.
+"""
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from wallets import ledger
+from .models import UserInvestment
+
+
+@dataclass
+class MaturityResult:
+    completed: int = 0
+    total_payout: Decimal = Decimal("0.00")
+    seconds: float = 0.0
+
+
+def complete_matured(now=None, chunk_size=1000):
+    """
+    Complete and pay out every active investment whose end date is before
+    ``now``. Rows without an end date mature ``plan.duration_days`` after
+    their start, as daily accrual assumes (migration 0009 backfills them).
+    """
+    now = now or timezone.now()
+    result = MaturityResult()
+    started = time.monotonic()
+    last_pk = 0
+
+    while True:
+        with transaction.atomic():
+            scanned = list(
+                UserInvestment.objects
+                .filter(Q(end_date__lt=now) | Q(end_date__isnull=True), status='active', pk__gt=last_pk)
+                .select_for_update(of=('self',))
+                .order_by('pk')
+                .values_list(
+                    'pk', 'user_id', 'amount', 'total_payout', 'accrued_profit', 'plan__name',
+                    'end_date', 'start_date', 'plan__duration_days',
+                )[:chunk_size]
+            )
+            if not scanned:
+                break
+            last_pk = scanned[-1][0]
+            rows = [
+                row[:6] for row in scanned
+                if row[6] is not None or row[7] + timedelta(days=row[8]) < now
+            ]
+            if not rows:
+                continue
+
+            ledger.bulk_credit(_payout_entries(rows))
+            UserInvestment.objects.filter(pk__in=[row[0] for row in rows]).update(status='completed')
+            result.completed += len(rows)
+            result.total_payout += sum(total_payout - accrued_profit for _, _, _, total_payout, accrued_profit, _ in rows)
+
+    result.seconds = time.monotonic() - started
+    return result
+
+
+def _payout_entries(rows):
+    for pk, user_id, amount, total_payout, accrued_profit, plan_name in rows:
+        profit = total_payout - amount - accrued_profit
+        if profit > 0:
+            yield user_id, profit, 'profit', f"INVPROFIT-{pk}", f"Profit from {plan_name} investment"
+        if amount > 0:
+            yield user_id, amount, 'principal_return', f"INVRET-{pk}", f"Principal returned from {plan_name} investment"
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('investments', '0005_delete_userwallet'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userinvestment',
+            name='accrued_profit',
+            field=models.DecimalField(decimal_places=2, default=0.0, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='userinvestment',
+            name='last_accrued_on',
+            field=models.DateField(blank=True, help_text='Last day profit was accrued for', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='userinvestment',
+            index=models.Index(fields=['status', 'id'], name='userinv_status_id_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('investments', '0006_userinvestment_accrual'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deposit',
+            name='proof_sha256',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='deposit',
+            name='proof_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processed', 'Processed'), ('invalid', 'Invalid')], default='pending', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='deposit',
+            name='proof_thumbnail',
+            field=models.ImageField(blank=True, upload_to='deposits/thumbnails/'),
+        ),
+        migrations.AddField(
+            model_name='deposit',
+            name='proof_web',
+            field=models.ImageField(blank=True, upload_to='deposits/web/'),
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('investments', '0007_deposit_proof_renditions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyCashflow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('kind', models.CharField(choices=[('deposit', 'Deposit'), ('withdrawal', 'Withdrawal')], max_length=10)),
+                ('status', models.CharField(max_length=20)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+            ],
+            options={
+                'ordering': ['-day', 'kind', 'status'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyPlanRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('new_investments', models.PositiveIntegerField(default=0)),
+                ('invested', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('matured', models.PositiveIntegerField(default=0)),
+                ('principal_returned', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('profit_paid', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+            ],
+            options={
+                'ordering': ['-day', 'plan'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RollupState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('synced_to', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='deposit',
+            index=models.Index(fields=['created_at'], name='deposit_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='deposit',
+            index=models.Index(fields=['updated_at'], name='deposit_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userinvestment',
+            index=models.Index(fields=['start_date'], name='userinv_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='withdrawal',
+            index=models.Index(fields=['created_at'], name='withdrawal_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='withdrawal',
+            index=models.Index(fields=['updated_at'], name='withdrawal_updated_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailycashflow',
+            constraint=models.UniqueConstraint(fields=('day', 'kind', 'status'), name='cashflow_day_kind_status_uniq'),
+        ),
+        migrations.AddField(
+            model_name='dailyplanrollup',
+            name='plan',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='investments.investmentplan'),
+        ),
+        migrations.AddIndex(
+            model_name='dailyplanrollup',
+            index=models.Index(fields=['day', 'plan'], name='planrollup_day_plan_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+from datetime import timedelta
+
+from django.db import migrations
+
+CHUNK_SIZE = 2000
+
+
+def backfill_end_dates(apps, schema_editor):
+    """
+    Give investments saved before ``calculate_expected_profit`` set
+    ``end_date`` the maturity daily accrual already assumes for them:
+    ``start_date + plan.duration_days``. Rows with an end date are left alone,
+    so the step is safe to re-run.
+    """
+    UserInvestment = apps.get_model('investments', 'UserInvestment')
+    last_pk = 0
+    while True:
+        rows = list(
+            UserInvestment.objects
+            .filter(end_date__isnull=True, pk__gt=last_pk)
+            .order_by('pk')
+            .values_list('pk', 'start_date', 'plan__duration_days')[:CHUNK_SIZE]
+        )
+        if not rows:
+            break
+        last_pk = rows[-1][0]
+        UserInvestment.objects.bulk_update(
+            [
+                UserInvestment(pk=pk, end_date=start_date + timedelta(days=duration_days))
+                for pk, start_date, duration_days in rows
+            ],
+            ['end_date'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('investments', '0008_daily_rollups'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_end_dates, migrations.RunPython.noop),
+    ]
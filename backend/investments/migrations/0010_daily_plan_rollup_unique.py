@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:03
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def drop_duplicate_rollups(apps, schema_editor):
+    """
+    Keep one row per (day, plan) so the constraints can be added. Concurrent
+    builds could leave two; both were full recomputations, so either will do.
+    """
+    DailyPlanRollup = apps.get_model('investments', 'DailyPlanRollup')
+    duplicates = (
+        DailyPlanRollup.objects.order_by().values('day', 'plan')
+        .annotate(rows=Count('id'), keep=Max('id')).filter(rows__gt=1)
+    )
+    for row in duplicates:
+        DailyPlanRollup.objects.filter(day=row['day'], plan=row['plan']).exclude(pk=row['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('investments', '0009_backfill_userinvestment_end_date'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_rollups, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='dailyplanrollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('plan__isnull', False)), fields=('day', 'plan'), name='planrollup_day_plan_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyplanrollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('plan__isnull', True)), fields=('day',), name='planrollup_day_unattributed_uniq'),
+        ),
+    ]
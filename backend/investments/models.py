@@ -1,10 +1,12 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta
 from django.core.validators import MinValueValidator
 from decimal import Decimal
 
+from .interest import compound_profit, simple_profit
+
 User = settings.AUTH_USER_MODEL
 
 
@@ -42,13 +44,24 @@ class UserInvestment(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
     expected_profit = models.DecimalField(max_digits=12, decimal_places=2, default=0.00)
     total_payout = models.DecimalField(max_digits=12, decimal_places=2, default=0.00)
+    accrued_profit = models.DecimalField(max_digits=12, decimal_places=2, default=0.00)
+    last_accrued_on = models.DateField(null=True, blank=True, help_text="Last day profit was accrued for")
+
+    class Meta:
+        indexes = [
+            # Keyset scans over active investments (daily accrual).
+            models.Index(fields=['status', 'id'], name='userinv_status_id_idx'),
+            # Per-day rollups (investments.rollups).
+            models.Index(fields=['start_date'], name='userinv_start_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.plan.name}"
 
     def calculate_expected_profit(self):
-        daily_profit = (self.amount * self.plan.daily_roi) / 100
-        total_profit = daily_profit * self.plan.duration_days
+        if self.start_date and not self.end_date:
+            self.end_date = self.start_date + timedelta(days=self.plan.duration_days)
+        total_profit = simple_profit(self.amount, self.plan.daily_roi, self.plan.duration_days)
         self.expected_profit = total_profit
         self.total_payout = self.amount + total_profit
         return self.expected_profit
@@ -70,25 +83,22 @@ class Investment(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.ends_at:
-            self.ends_at = self.created_at + timedelta(days=self.plan.duration_days)
+            self.ends_at = (self.created_at or timezone.now()) + timedelta(days=self.plan.duration_days)
         super().save(*args, **kwargs)
 
-    def calculate_profit(self):
-        daily_rate = self.plan.daily_roi / 100
+    def calculate_profit(self, commit=True):
         days = self.plan.duration_days
 
         if self.compound_interest:
-            final_amount = float(self.amount)
-            for _ in range(days):
-                final_amount += final_amount * daily_rate
-            profit = final_amount - float(self.amount)
+            profit = compound_profit(self.amount, self.plan, days)
         else:
-            profit = float(self.amount) * daily_rate * days
+            profit = simple_profit(self.amount, self.plan.daily_roi, days)
 
         self.profit = profit
-        self.total_return = float(self.amount) + profit
+        self.total_return = self.amount + profit
         self.is_completed = timezone.now() >= self.ends_at
-        self.save()
+        if commit:
+            self.save()
         return profit
 
 
@@ -102,25 +112,61 @@ class Deposit(models.Model):
         ('rejected', 'Rejected'),
     ]
 
+    PROOF_STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processed', 'Processed'),
+        ('invalid', 'Invalid'),
+    ]
+
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="deposits")
     amount = models.DecimalField(max_digits=12, decimal_places=2, validators=[MinValueValidator(10)])
     proof = models.ImageField(upload_to='deposits/')
+    # Filled in off-request by investments.proofs
+    proof_status = models.CharField(max_length=10, choices=PROOF_STATUS_CHOICES, default='pending')
+    proof_sha256 = models.CharField(max_length=64, blank=True, db_index=True)
+    proof_thumbnail = models.ImageField(upload_to='deposits/thumbnails/', blank=True)
+    proof_web = models.ImageField(upload_to='deposits/web/', blank=True)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Per-day rollups and the dirty-day scan (investments.rollups).
+            models.Index(fields=['created_at'], name='deposit_created_idx'),
+            models.Index(fields=['updated_at'], name='deposit_updated_idx'),
+        ]
+
     def approve(self):
-        if self.status != 'approved':
-            self.status = 'approved'
-            self.save(update_fields=["status", "updated_at"])
+        """Approve the deposit and credit the wallet in one transaction; False if it wasn't pending."""
+        from wallets import ledger
+        with transaction.atomic():
+            # Conditional flip from pending, so the wallet is credited at most once
+            # and a rejected deposit can't be approved later.
+            flipped = Deposit.objects.filter(pk=self.pk, status='pending').update(
+                status='approved', updated_at=timezone.now()
+            )
+            if not flipped:
+                self.refresh_from_db(fields=['status', 'updated_at'])
+                return False
             # ✅ Update main wallet automatically (from wallets app)
-            from wallets.models import Wallet
-            wallet, _ = Wallet.objects.get_or_create(user=self.user)
-            wallet.credit(self.amount)
+            ledger.credit(
+                self.user_id, self.amount, 'deposit',
+                reference=f"DEP-{self.pk}",
+                description='Deposit approved and credited to wallet',
+            )
+        self.status = 'approved'
+        return True
 
     def reject(self):
+        """Reject the deposit if it is still pending; False if it wasn't."""
+        if not Deposit.objects.filter(pk=self.pk, status='pending').update(
+            status='rejected', updated_at=timezone.now()
+        ):
+            self.refresh_from_db(fields=['status', 'updated_at'])
+            return False
         self.status = 'rejected'
-        self.save(update_fields=["status", "updated_at"])
+        return True
 
     def __str__(self):
         return f"Deposit {self.id} - {self.user.username} - ₦{self.amount} ({self.status})"
@@ -143,19 +189,117 @@ class Withdrawal(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Per-day rollups and the dirty-day scan (investments.rollups).
+            models.Index(fields=['created_at'], name='withdrawal_created_idx'),
+            models.Index(fields=['updated_at'], name='withdrawal_updated_idx'),
+        ]
+
     def approve(self):
-        """Approve withdrawal only if user has enough balance."""
-        from wallets.models import Wallet
-        wallet, _ = Wallet.objects.get_or_create(user=self.user)
-        if wallet.debit(self.amount):
-            self.status = 'approved'
-        else:
-            self.status = 'rejected'
-        self.save(update_fields=["status", "updated_at"])
+        """
+        Approve withdrawal only if user has enough balance, else reject it.
+        False if it wasn't pending.
+        """
+        from wallets import ledger
+        with transaction.atomic():
+            # Claimed from pending only, so a rejected withdrawal is never paid out.
+            claimed = Withdrawal.objects.filter(pk=self.pk, status='pending').update(
+                status='approved', updated_at=timezone.now()
+            )
+            if not claimed:
+                self.refresh_from_db(fields=['status', 'updated_at'])
+                return False
+            try:
+                ledger.debit(
+                    self.user_id, self.amount, 'withdrawal',
+                    reference=f"WDR-{self.pk}",
+                    description='Withdrawal approved and sent',
+                )
+                self.status = 'approved'
+            except ledger.InsufficientFunds:
+                self.status = 'rejected'
+                Withdrawal.objects.filter(pk=self.pk).update(status='rejected', updated_at=timezone.now())
+        return True
 
     def reject(self):
+        """Reject the withdrawal if it is still pending; False if it wasn't."""
+        if not Withdrawal.objects.filter(pk=self.pk, status='pending').update(
+            status='rejected', updated_at=timezone.now()
+        ):
+            self.refresh_from_db(fields=['status', 'updated_at'])
+            return False
         self.status = 'rejected'
-        self.save(update_fields=["status", "updated_at"])
+        return True
 
     def __str__(self):
         return f"Withdrawal {self.id} - {self.user.username} ({self.status})"
+
+
+# -----------------------------
+# ANALYTICS ROLLUPS
+# -----------------------------
+class DailyCashflow(models.Model):
+    """Deposits or withdrawals created on one day, per current status. Built by investments.rollups."""
+    KIND_CHOICES = [
+        ('deposit', 'Deposit'),
+        ('withdrawal', 'Withdrawal'),
+    ]
+
+    day = models.DateField()
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20)
+    count = models.PositiveIntegerField(default=0)
+    total = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'kind', 'status'], name='cashflow_day_kind_status_uniq'),
+        ]
+        ordering = ['-day', 'kind', 'status']
+
+    def __str__(self):
+        return f"{self.day} {self.kind} {self.status}: {self.count} / ₦{self.total}"
+
+
+class DailyPlanRollup(models.Model):
+    """
+    One plan's activity on one day: investments started, investments matured
+    (principal returned) and profit paid. Built by investments.rollups.
+    ``plan`` is empty for profit credits that no investment can be traced to.
+    """
+    day = models.DateField()
+    plan = models.ForeignKey(InvestmentPlan, on_delete=models.CASCADE, null=True, blank=True, related_name='daily_rollups')
+    new_investments = models.PositiveIntegerField(default=0)
+    invested = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    matured = models.PositiveIntegerField(default=0)
+    principal_returned = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    profit_paid = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            # Two partial constraints, since NULL plans never collide in a plain one.
+            models.UniqueConstraint(
+                fields=['day', 'plan'], condition=models.Q(plan__isnull=False), name='planrollup_day_plan_uniq',
+            ),
+            models.UniqueConstraint(
+                fields=['day'], condition=models.Q(plan__isnull=True), name='planrollup_day_unattributed_uniq',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['day', 'plan'], name='planrollup_day_plan_idx'),
+        ]
+        ordering = ['-day', 'plan']
+
+    def __str__(self):
+        return f"{self.day} {self.plan or 'unattributed'}"
+
+
+class RollupState(models.Model):
+    """Single row: source changes up to ``synced_to`` are reflected in the rollups."""
+    synced_to = models.DateTimeField(null=True, blank=True)
+
+    @classmethod
+    def load(cls):
+        state, _ = cls.objects.get_or_create(pk=1)
+        return state
@@ -0,0 +1,142 @@
+"""
+Off-request processing of deposit proof images.
+
+After a deposit is committed its id is handed to a small in-process thread
+pool. The worker verifies the upload, records its SHA-256, rewrites the
+original without EXIF metadata, and stores a thumbnail and a web-sized
+rendition for the admin. Anything the pool never got to (e.g. the process was
+restarted) is picked up by the ``process_deposit_proofs`` command.
+
+Set ``DEPOSIT_PROOF_WORKERS = 0`` to process inline instead (useful in tests).
+"""
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .models import Deposit
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZE = (240, 240)
+WEB_SIZE = (1280, 1280)
+
+_executor = None
+
+
+def schedule(deposit_id):
+    """Process the deposit's proof once the current transaction commits."""
+    transaction.on_commit(lambda: _submit(deposit_id))
+
+
+def _submit(deposit_id):
+    global _executor
+    workers = getattr(settings, 'DEPOSIT_PROOF_WORKERS', 2)
+    if not workers:
+        process_proof(deposit_id)
+        return
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='deposit-proof')
+    _executor.submit(_run_in_worker, deposit_id)
+
+
+def _run_in_worker(deposit_id):
+    close_old_connections()
+    try:
+        process_proof(deposit_id)
+    except Exception:
+        logger.exception("Processing proof for deposit %s failed", deposit_id)
+    finally:
+        close_old_connections()
+
+
+# What Pillow raises for files that are not (complete, sane) images. Pixel
+# data is decoded lazily, so these can surface while re-encoding too.
+DECODE_ERRORS = (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError, ValueError)
+
+
+def process_proof(deposit_id):
+    """Verify, hash, strip and resize one deposit's proof image, if it is still pending."""
+    deposit = Deposit.objects.only('proof', 'proof_status').get(pk=deposit_id)
+    if deposit.proof_status != 'pending':
+        return
+    storage = deposit.proof.storage
+    original = deposit.proof.name
+    try:
+        with deposit.proof.open('rb') as upload:
+            data = upload.read()
+    except FileNotFoundError:
+        if not _pending(deposit_id).exists():
+            return  # processed (and the original replaced) by a concurrent run
+        raise
+    digest = hashlib.sha256(data).hexdigest()
+
+    try:
+        Image.open(BytesIO(data)).verify()
+        image = Image.open(BytesIO(data))
+        image_format = image.format
+        # Bake the EXIF orientation into the pixels before dropping the metadata.
+        image = ImageOps.exif_transpose(image)
+        stripped = _encode(image, image_format)
+        thumbnail = _resized(image, THUMBNAIL_SIZE)
+        web = _resized(image, WEB_SIZE)
+    except DECODE_ERRORS:
+        _pending(deposit_id).update(proof_status='invalid', proof_sha256=digest)
+        return
+
+    # Saved next to the original (storage picks a free name) and swapped in
+    # before the original is deleted, so the row never points at a missing file.
+    saved = []
+    try:
+        name = storage.save(original, stripped)
+        saved.append(name)
+        stem = os.path.splitext(os.path.basename(name))[0]
+        for field, content in ((deposit.proof_thumbnail.field, thumbnail), (deposit.proof_web.field, web)):
+            saved.append(storage.save(field.generate_filename(deposit, f"{stem}.jpg"), content))
+        # Only a still-pending row is claimed, so a concurrent run can't swap in its files twice.
+        claimed = _pending(deposit_id).update(
+            proof=name,
+            proof_status='processed',
+            proof_sha256=digest,
+            proof_thumbnail=saved[1],
+            proof_web=saved[2],
+        )
+    except BaseException:
+        _delete(storage, saved)
+        raise
+    if not claimed:
+        _delete(storage, saved)
+        return
+    storage.delete(original)
+
+
+def _pending(deposit_id):
+    return Deposit.objects.filter(pk=deposit_id, proof_status='pending')
+
+
+def _delete(storage, names):
+    for name in names:
+        storage.delete(name)
+
+
+def _encode(image, image_format):
+    """Re-encode without the source's EXIF/metadata."""
+    buffer = BytesIO()
+    clean = image.copy()
+    clean.info = {}
+    clean.save(buffer, format=image_format or 'PNG', quality=92)
+    return ContentFile(buffer.getvalue())
+
+
+def _resized(image, size):
+    copy = image.convert('RGB')
+    copy.thumbnail(size)
+    buffer = BytesIO()
+    copy.save(buffer, format='JPEG', quality=82, optimize=True)
+    return ContentFile(buffer.getvalue())
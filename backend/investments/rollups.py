@@ -0,0 +1,219 @@
+"""
+Daily analytics rollups.
+
+``DailyCashflow`` holds, per day, the deposits and withdrawals created that day
+by current status; ``DailyPlanRollup`` holds, per day and plan, investments
+started, investments matured and profit paid. Admin reporting reads these
+small tables instead of aggregating the source tables.
+
+``build`` keeps them current incrementally. Every source row carries a
+timestamp that moves when it changes (``updated_at`` on deposits and
+withdrawals, ``start_date`` on investments, ``created_at`` on the append-only
+ledger), so the days touched since the last build are found with indexed
+range scans and only those days are recomputed, each in one transaction.
+Maturities and profit are read from the ledger; the investment a payout
+belongs to is taken from its reference (see ``accrual`` and ``maturity``).
+
+Rows deleted from the source tables are not noticed; rebuild from a given day
+with ``build_rollups --since`` after such a cleanup.
+"""
+import re
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, time as dt_time
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from transactions.models import TransactionHistory
+from . import catalog
+from .models import DailyCashflow, DailyPlanRollup, Deposit, RollupState, UserInvestment, Withdrawal
+
+# Changes committed this long after their timestamp (slow transactions) are
+# still picked up, because every build re-reads this much before its cursor.
+LAG = timedelta(minutes=10)
+
+PAYOUT_TYPES = ('profit', 'principal_return')
+
+# ACR-<pk>-<date> (daily accrual), INVPROFIT-<pk> and INVRET-<pk> (maturity).
+INVESTMENT_REFERENCE = re.compile(r'^(?:ACR|INVPROFIT|INVRET)-(\d+)(?:-|$)')
+
+CASHFLOW_SOURCES = {'deposit': Deposit, 'withdrawal': Withdrawal}
+
+PLAN_FIGURES = ('new_investments', 'invested', 'matured', 'principal_returned', 'profit_paid')
+
+
+@dataclass
+class RollupResult:
+    days: int = 0
+    seconds: float = 0.0
+
+
+def build(since=None):
+    """
+    Recompute the days changed since the last build, or every day from
+    ``since`` (a date) to today. The first build covers all history.
+    """
+    started = time.monotonic()
+    state = RollupState.load()
+    cursor = timezone.now()
+    if since is not None:
+        today = timezone.localdate()
+        days = {since + timedelta(days=offset) for offset in range((today - since).days + 1)}
+    elif state.synced_to is None:
+        days = changed_days(None)
+    else:
+        days = changed_days(state.synced_to - LAG)
+
+    for day in sorted(days):
+        rebuild_day(day)
+
+    if since is None:
+        state.synced_to = cursor
+        state.save(update_fields=['synced_to'])
+    return RollupResult(days=len(days), seconds=time.monotonic() - started)
+
+
+def changed_days(since):
+    """Local days with source rows changed at or after ``since`` (every day with data if ``None``)."""
+    def after(field):
+        return {f'{field}__gte': since} if since else {}
+
+    days = set()
+    for model in CASHFLOW_SOURCES.values():
+        days.update(model.objects.filter(**after('updated_at')).dates('created_at', 'day'))
+    days.update(UserInvestment.objects.filter(**after('start_date')).dates('start_date', 'day'))
+    days.update(
+        TransactionHistory.objects.filter(transaction_type__in=PAYOUT_TYPES, **after('created_at'))
+        .dates('created_at', 'day')
+    )
+    return days
+
+
+def rebuild_day(day):
+    """Replace every rollup row for ``day`` with figures recomputed from the source tables."""
+    start = timezone.make_aware(datetime.combine(day, dt_time.min))
+    end = timezone.make_aware(datetime.combine(day + timedelta(days=1), dt_time.min))
+
+    cashflow = [
+        DailyCashflow(day=day, kind=kind, status=row['status'], count=row['count'], total=row['total'])
+        for kind, model in CASHFLOW_SOURCES.items()
+        for row in model.objects.filter(created_at__gte=start, created_at__lt=end)
+        .order_by()
+        .values('status')
+        .annotate(count=Count('id'), total=Sum('amount'))
+    ]
+
+    plans = defaultdict(lambda: DailyPlanRollup(day=day))
+    for row in (
+        UserInvestment.objects.filter(start_date__gte=start, start_date__lt=end)
+        .order_by()
+        .values('plan_id')
+        .annotate(count=Count('id'), total=Sum('amount'))
+    ):
+        rollup = plans[row['plan_id']]
+        rollup.new_investments = row['count']
+        rollup.invested = row['total']
+
+    payouts = (
+        TransactionHistory.objects
+        .filter(created_at__gte=start, created_at__lt=end, transaction_type__in=PAYOUT_TYPES, status='successful')
+        .values_list('transaction_type', 'amount', 'reference')
+        .iterator(chunk_size=5000)
+    )
+    batch = []
+    for payout in payouts:
+        batch.append(payout)
+        if len(batch) == 5000:
+            _add_payouts(plans, batch)
+            batch = []
+    _add_payouts(plans, batch)
+
+    # Upserted rather than deleted and reinserted, so that concurrent builds of
+    # the same day overwrite each other instead of duplicating rows.
+    with transaction.atomic():
+        DailyCashflow.objects.filter(day=day).exclude(
+            reduce(or_, (Q(kind=row.kind, status=row.status) for row in cashflow), Q(pk__in=[]))
+        ).delete()
+        DailyCashflow.objects.bulk_create(
+            cashflow, update_conflicts=True,
+            unique_fields=['day', 'kind', 'status'], update_fields=['count', 'total'],
+        )
+
+        stale = DailyPlanRollup.objects.filter(day=day).exclude(plan__in=[plan_id for plan_id in plans if plan_id])
+        if None in plans:
+            stale = stale.exclude(plan__isnull=True)
+        stale.delete()
+        # update_or_create: an upsert on the partial unique constraints can't
+        # name its conflict target portably. There are only a few plans a day.
+        for plan_id, rollup in plans.items():
+            DailyPlanRollup.objects.update_or_create(
+                day=day, plan_id=plan_id, defaults={field: getattr(rollup, field) for field in PLAN_FIGURES},
+            )
+
+
+def _add_payouts(plans, payouts):
+    investment_ids = {}
+    for _, _, reference in payouts:
+        match = INVESTMENT_REFERENCE.match(reference)
+        if match:
+            investment_ids[reference] = int(match.group(1))
+    plan_ids = dict(
+        UserInvestment.objects.filter(pk__in=set(investment_ids.values())).values_list('pk', 'plan_id')
+    )
+
+    for transaction_type, amount, reference in payouts:
+        rollup = plans[plan_ids.get(investment_ids.get(reference))]
+        if transaction_type == 'profit':
+            rollup.profit_paid += amount
+        else:
+            rollup.matured += 1
+            rollup.principal_returned += amount
+
+
+def summarize(start, end):
+    """Rollup figures for ``start``..``end`` (inclusive dates): per-day rows plus totals."""
+    days = defaultdict(lambda: {'deposits': {}, 'withdrawals': {}, 'plans': []})
+    totals = {'deposits': {}, 'withdrawals': {}, 'plans': {}}
+
+    for row in DailyCashflow.objects.filter(day__range=(start, end)).order_by('day', 'kind', 'status'):
+        key = f'{row.kind}s'
+        days[row.day][key][row.status] = {'count': row.count, 'total': str(row.total)}
+        total = totals[key].setdefault(row.status, {'count': 0, 'total': Decimal(0)})
+        total['count'] += row.count
+        total['total'] += row.total
+
+    for row in DailyPlanRollup.objects.filter(day__range=(start, end)).order_by('day', F('plan_id').asc(nulls_last=True)):
+        days[row.day]['plans'].append({
+            'plan': row.plan_id, 'plan_name': _plan_name(row.plan_id),
+            **{field: _plain(getattr(row, field)) for field in PLAN_FIGURES},
+        })
+        total = totals['plans'].setdefault(row.plan_id, dict.fromkeys(PLAN_FIGURES, 0))
+        for field in PLAN_FIGURES:
+            total[field] += getattr(row, field)
+
+    for key in ('deposits', 'withdrawals'):
+        for total in totals[key].values():
+            total['total'] = str(total['total'])
+    totals['plans'] = [
+        {'plan': plan_id, 'plan_name': _plan_name(plan_id), **{field: _plain(value) for field, value in total.items()}}
+        for plan_id, total in sorted(totals['plans'].items(), key=lambda item: (item[0] is None, item[0] or 0))
+    ]
+    return {
+        'days': [{'day': day, **figures} for day, figures in sorted(days.items())],
+        'totals': totals,
+    }
+
+
+def _plan_name(plan_id):
+    plan = catalog.get_plan(plan_id) if plan_id else None
+    return plan.name if plan else None
+
+
+def _plain(value):
+    return str(value) if isinstance(value, Decimal) else value
@@ -1,3 +1,5 @@
+from django.db import transaction
+from django.utils.functional import cached_property
 from rest_framework import serializers
 from .models import (
     InvestmentPlan,
@@ -5,13 +7,44 @@ from .models import (
     Deposit,
     Withdrawal,
 )
+from accounts.serializers import UserSummarySerializer
+from core.serialization import SparseFieldsMixin
 from wallets.models import Wallet
+from . import catalog
 
 
 # ==========================
 # 📈 INVESTMENT SERIALIZERS
 # ==========================
 
+class CatalogPlanField(serializers.PrimaryKeyRelatedField):
+    """Plan primary-key field that looks plans up in the cached catalog."""
+
+    def to_internal_value(self, data):
+        try:
+            plan = catalog.get_plan(int(data))
+        except (TypeError, ValueError):
+            plan = None
+        return plan or super().to_internal_value(data)
+
+
+class PlanNameField(serializers.ReadOnlyField):
+    """Plan name resolved from the cached catalog instead of a join."""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('source', 'plan_id')
+        super().__init__(**kwargs)
+
+    @cached_property
+    def plans(self):
+        # Read once per serializer, not once per row.
+        return catalog.get_plans()
+
+    def to_representation(self, plan_id):
+        plan = self.plans.get(plan_id)
+        return plan.name if plan else InvestmentPlan.objects.values_list('name', flat=True).get(pk=plan_id)
+
+
 class InvestmentPlanSerializer(serializers.ModelSerializer):
     """Serializer for listing available investment plans."""
     class Meta:
@@ -19,9 +52,24 @@ class InvestmentPlanSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class UserInvestmentSerializer(serializers.ModelSerializer):
+class PlanDetailField(PlanNameField):
+    """The whole plan from the cached catalog instead of a join (``?expand=plan``)."""
+
+    @cached_property
+    def serialized(self):
+        return {}
+
+    def to_representation(self, plan_id):
+        if plan_id not in self.serialized:
+            plan = self.plans.get(plan_id) or InvestmentPlan.objects.get(pk=plan_id)
+            self.serialized[plan_id] = dict(InvestmentPlanSerializer(plan).data)
+        return self.serialized[plan_id]
+
+
+class UserInvestmentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for creating and viewing user investments."""
-    plan_name = serializers.CharField(source='plan.name', read_only=True)
+    plan = CatalogPlanField(queryset=InvestmentPlan.objects.all())
+    plan_name = PlanNameField()
 
     class Meta:
         model = UserInvestment
@@ -29,6 +77,7 @@ class UserInvestmentSerializer(serializers.ModelSerializer):
             'id', 'user', 'plan', 'plan_name', 'amount', 'start_date', 'end_date',
             'status', 'expected_profit', 'total_payout'
         ]
+        expandable_fields = {'plan': (PlanDetailField, {})}
         read_only_fields = ['user', 'start_date', 'end_date', 'status', 'expected_profit', 'total_payout']
 
     def create(self, validated_data):
@@ -47,39 +96,48 @@ class UserInvestmentSerializer(serializers.ModelSerializer):
         if not wallet or wallet.balance < amount:
             raise serializers.ValidationError({"error": "Insufficient wallet balance."})
 
-        # ✅ Debit user wallet
-        wallet.debit(amount)
-
-        # ✅ Calculate expected profit
-        investment = UserInvestment.objects.create(
-            user=user,
-            plan=plan,
-            amount=amount,
-            expected_profit=0,
-        )
-        investment.calculate_expected_profit()
-        investment.save()
+        with transaction.atomic():
+            investment = UserInvestment.objects.create(
+                user=user,
+                plan=plan,
+                amount=amount,
+                expected_profit=0,
+            )
+
+            # ✅ Debit user wallet (the ledger re-checks the balance atomically)
+            if not wallet.debit(
+                amount, 'investment',
+                reference=f"INV-{investment.pk}",
+                description=f"Investment in {plan.name}",
+            ):
+                raise serializers.ValidationError({"error": "Insufficient wallet balance."})
+
+            # ✅ Calculate expected profit
+            investment.calculate_expected_profit()
+            investment.save()
         return investment
 
 
-class InvestmentProfitSerializer(serializers.ModelSerializer):
+class InvestmentProfitSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for showing investment profit."""
-    plan_name = serializers.CharField(source='plan.name', read_only=True)
+    plan_name = PlanNameField()
 
     class Meta:
         model = UserInvestment
         fields = ['id', 'plan_name', 'amount', 'expected_profit', 'status', 'total_payout']
+        expandable_fields = {'plan': (PlanDetailField, {})}
 
 
 # ==========================
 # 💰 DEPOSIT SERIALIZERS
 # ==========================
 
-class DepositSerializer(serializers.ModelSerializer):
+class DepositSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for user deposit creation and viewing."""
     class Meta:
         model = Deposit
         fields = ['id', 'user', 'amount', 'proof', 'status', 'created_at']
+        expandable_fields = {'user': (UserSummarySerializer, {'read_only': True})}
         read_only_fields = ['user', 'status', 'created_at']
 
 
@@ -91,24 +149,32 @@ class DepositApprovalSerializer(serializers.ModelSerializer):
 
     def update(self, instance, validated_data):
         status_choice = validated_data.get('status')
+        # False when the row was no longer pending; the view reports that as a conflict.
         if status_choice == 'approved':
-            instance.approve()
+            self.changed = instance.approve()
         elif status_choice == 'rejected':
-            instance.reject()
+            self.changed = instance.reject()
         else:
             raise serializers.ValidationError({"status": "Invalid status option."})
         return instance
 
 
+class BulkApprovalSerializer(serializers.Serializer):
+    """Admin serializer for approving/rejecting many deposits or withdrawals."""
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=5000)
+    status = serializers.ChoiceField(choices=['approved', 'rejected'])
+
+
 # ==========================
 # 💸 WITHDRAWAL SERIALIZERS
 # ==========================
 
-class WithdrawalSerializer(serializers.ModelSerializer):
+class WithdrawalSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for user withdrawals."""
     class Meta:
         model = Withdrawal
         fields = ['id', 'user', 'amount', 'wallet_address', 'status', 'created_at']
+        expandable_fields = {'user': (UserSummarySerializer, {'read_only': True})}
         read_only_fields = ['user', 'status', 'created_at']
 
     def validate_amount(self, value):
@@ -124,7 +190,8 @@ class WithdrawalSerializer(serializers.ModelSerializer):
         if not wallet or wallet.balance < amount:
             raise serializers.ValidationError({"error": "Insufficient wallet balance."})
 
-        withdrawal = Withdrawal.objects.create(user=user, **validated_data)
+        validated_data["user"] = user
+        withdrawal = Withdrawal.objects.create(**validated_data)
         return withdrawal
 
 
@@ -137,10 +204,11 @@ class WithdrawalApprovalSerializer(serializers.ModelSerializer):
 
     def update(self, instance, validated_data):
         status_choice = validated_data.get('status')
+        # False when the row was no longer pending; the view reports that as a conflict.
         if status_choice == 'approved':
-            instance.approve()
+            self.changed = instance.approve()
         elif status_choice == 'rejected':
-            instance.reject()
+            self.changed = instance.reject()
         else:
             raise serializers.ValidationError({"status": "Invalid status option."})
         return instance
@@ -150,10 +218,13 @@ class WithdrawalApprovalSerializer(serializers.ModelSerializer):
 # 👛 WALLET SERIALIZER
 # ==========================
 
-class WalletSerializer(serializers.ModelSerializer):
+class WalletSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for displaying wallet balance."""
+    last_updated = serializers.DateTimeField(source='updated_at', read_only=True)
+
     class Meta:
         model = Wallet
         fields = ['id', 'user', 'balance', 'last_updated']
-        read_only_fields = ['user', 'balance', 'last_updated']
+        expandable_fields = {'user': (UserSummarySerializer, {'read_only': True})}
+        read_only_fields = ['user', 'balance']
         
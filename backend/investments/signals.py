@@ -1,11 +1,20 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
+from django.db import transaction
 from django.dispatch import receiver
-from django.conf import settings
-from .models import UserWallet
+from . import catalog
+from .interest import invalidate_growth_factors
+from .models import InvestmentPlan
 
-User = settings.AUTH_USER_MODEL
 
-@receiver(post_save, sender=User)
-def create_user_wallet(sender, instance, created, **kwargs):
-    if created:
-        UserWallet.objects.create(user=instance)
+@receiver(post_save, sender=InvestmentPlan)
+@receiver(post_delete, sender=InvestmentPlan)
+def drop_plan_growth_factors(sender, instance, **kwargs):
+    """Forget cached growth factors when a plan's rate or duration may have changed."""
+    invalidate_growth_factors(instance.pk)
+
+
+@receiver(post_save, sender=InvestmentPlan)
+@receiver(post_delete, sender=InvestmentPlan)
+def bump_plan_catalog(sender, instance, **kwargs):
+    """Retire every cached copy of the plan catalog once the change is committed."""
+    transaction.on_commit(catalog.bump_version)
@@ -1,3 +1,666 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal, ROUND_HALF_UP, localcontext
+from io import BytesIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from transactions.models import TransactionHistory
+from wallets import ledger
+from wallets.models import Wallet
+from . import bulk, catalog, earnings, proofs, rollups
+from .accrual import accrue_profits
+from .interest import compound_profit, growth_factor, simple_profit
+from .maturity import complete_matured
+from .models import DailyCashflow, DailyPlanRollup, Deposit, Investment, InvestmentPlan, UserInvestment, Withdrawal
+
+User = get_user_model()
+
+
+def balance(user):
+    return Wallet.objects.get(user=user).balance
+
+
+class InvestmentTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'pw')
+        Wallet.objects.create(user=self.user)
+        self.plan = InvestmentPlan.objects.create(
+            name='Starter', min_amount=Decimal('10.00'), max_amount=Decimal('1000.00'),
+            daily_roi=Decimal('2.00'), duration_days=5, total_return=Decimal('110.00'),
+        )
+
+    def invest(self, days_ago, legacy=False):
+        """A 100.00 investment started ``days_ago``; ``legacy`` ones have no end_date."""
+        investment = UserInvestment.objects.create(user=self.user, plan=self.plan, amount=Decimal('100.00'))
+        investment.start_date = timezone.now() - timedelta(days=days_ago)
+        investment.calculate_expected_profit()
+        if legacy:
+            investment.end_date = None
+        investment.save()
+        return investment
+
+    def deposit(self, amount='50.00'):
+        return Deposit.objects.create(user=self.user, amount=Decimal(amount), proof='deposits/proof.png')
+
+    def withdrawal(self, amount='20.00'):
+        return Withdrawal.objects.create(user=self.user, amount=Decimal(amount), wallet_address='addr')
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        return client
+
+    def use_temp_media(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings = override_settings(MEDIA_ROOT=self.media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def admin_client(self):
+        admin = User.objects.create_user('admin', 'admin@example.com', 'pw', is_staff=True)
+        return self.client_for(admin)
+
+
+class InterestTests(InvestmentTestCase):
+    def compounded(self, amount, daily_roi, days):
+        """Day-by-day reference, at a precision well past the cent."""
+        with localcontext() as context:
+            context.prec = 60
+            value = amount
+            for _ in range(days):
+                value += value * daily_roi / 100
+            return (value - amount).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+    def test_simple_profit_rounds_half_up_once(self):
+        self.assertEqual(simple_profit(Decimal('0.50'), Decimal('1.00'), 1), Decimal('0.01'))
+        self.assertEqual(simple_profit(Decimal('33.33'), Decimal('1.50'), 3), Decimal('1.50'))
+        self.assertEqual(simple_profit(Decimal('100.00'), Decimal('2.00'), 5), Decimal('10.00'))
+
+    def test_compound_profit_matches_daily_compounding(self):
+        self.plan.daily_roi, self.plan.duration_days = Decimal('1.37'), 90
+        self.plan.save()
+
+        for amount, days in [(Decimal('100.00'), 1), (Decimal('12345.67'), 30), (Decimal('999.99'), 90)]:
+            with self.subTest(amount=amount, days=days):
+                self.assertEqual(compound_profit(amount, self.plan, days), self.compounded(amount, Decimal('1.37'), days))
+
+    def test_compound_profit_past_the_plan_duration(self):
+        self.assertEqual(compound_profit(Decimal('100.00'), self.plan, 8), self.compounded(Decimal('100.00'), Decimal('2.00'), 8))
+
+    def test_growth_factors_follow_plan_changes(self):
+        self.assertEqual(growth_factor(self.plan, 1), Decimal('1.02'))
+
+        self.plan.daily_roi = Decimal('3.00')
+        self.plan.save()
+
+        self.assertEqual(growth_factor(InvestmentPlan.objects.get(pk=self.plan.pk), 1), Decimal('1.03'))
+
+    def test_investment_prices_compound_and_simple_plans(self):
+        simple = Investment.objects.create(user=self.user, plan=self.plan, amount=Decimal('100.00'))
+        compound = Investment.objects.create(
+            user=self.user, plan=self.plan, amount=Decimal('100.00'), compound_interest=True,
+        )
+
+        self.assertEqual(simple.calculate_profit(), Decimal('10.00'))
+        self.assertEqual(compound.calculate_profit(), Decimal('10.41'))
+        compound.refresh_from_db()
+        self.assertEqual((compound.profit, compound.total_return), (Decimal('10.41'), Decimal('110.41')))
+
+    def test_expected_profit_and_end_date(self):
+        investment = self.invest(days_ago=0)
+
+        self.assertEqual(investment.expected_profit, Decimal('10.00'))
+        self.assertEqual(investment.total_payout, Decimal('110.00'))
+        self.assertEqual(investment.end_date, investment.start_date + timedelta(days=5))
+
+
+class AccrualTests(InvestmentTestCase):
+    def test_accrues_elapsed_days_once(self):
+        investment = self.invest(days_ago=2)
+
+        accrue_profits()
+        accrue_profits()
+
+        investment.refresh_from_db()
+        self.assertEqual(investment.accrued_profit, Decimal('4.00'))
+        self.assertEqual(investment.last_accrued_on, timezone.localdate())
+        self.assertEqual(balance(self.user), Decimal('4.00'))
+
+    def test_catches_up_missed_days(self):
+        investment = self.invest(days_ago=3)
+        accrue_profits(timezone.localdate() - timedelta(days=2))
+
+        accrue_profits()
+
+        investment.refresh_from_db()
+        self.assertEqual(investment.accrued_profit, Decimal('6.00'))
+        self.assertEqual(balance(self.user), Decimal('6.00'))
+
+    def test_stops_at_maturity(self):
+        investment = self.invest(days_ago=8)
+
+        accrue_profits()
+
+        investment.refresh_from_db()
+        self.assertEqual(investment.accrued_profit, investment.expected_profit)
+        self.assertEqual(balance(self.user), Decimal('10.00'))
+
+    def test_legacy_investment_matures_after_plan_duration(self):
+        investment = self.invest(days_ago=8, legacy=True)
+
+        accrue_profits()
+
+        investment.refresh_from_db()
+        self.assertEqual(investment.accrued_profit, Decimal('10.00'))
+
+
+class MaturityTests(InvestmentTestCase):
+    def test_pays_principal_and_unaccrued_profit(self):
+        investment = self.invest(days_ago=6)
+
+        result = complete_matured()
+
+        investment.refresh_from_db()
+        self.assertEqual(investment.status, 'completed')
+        self.assertEqual(result.completed, 1)
+        self.assertEqual(balance(self.user), Decimal('110.00'))
+        self.assertTrue(TransactionHistory.objects.filter(reference=f'INVRET-{investment.pk}').exists())
+
+    def test_accrued_profit_is_not_paid_twice(self):
+        investment = self.invest(days_ago=6)
+        accrue_profits()
+
+        complete_matured()
+
+        investment.refresh_from_db()
+        self.assertEqual(investment.status, 'completed')
+        self.assertEqual(balance(self.user), Decimal('110.00'))
+
+    def test_leaves_running_investments_alone(self):
+        investment = self.invest(days_ago=2)
+
+        complete_matured()
+
+        investment.refresh_from_db()
+        self.assertEqual(investment.status, 'active')
+        self.assertEqual(balance(self.user), Decimal('0.00'))
+
+    def test_completes_legacy_investments_without_end_date(self):
+        matured = self.invest(days_ago=6, legacy=True)
+        running = self.invest(days_ago=2, legacy=True)
+        accrue_profits()
+
+        result = complete_matured(chunk_size=1)
+
+        matured.refresh_from_db()
+        running.refresh_from_db()
+        self.assertEqual((matured.status, running.status), ('completed', 'active'))
+        self.assertEqual(result.completed, 1)
+        # 10.00 profit and 100.00 principal from the matured one, 4.00 accrued on the running one.
+        self.assertEqual(balance(self.user), Decimal('114.00'))
+
+
+class CatalogTests(InvestmentTestCase):
+    def test_plan_list_is_served_from_the_cache(self):
+        client = APIClient()
+        first = client.get('/api/investments/plans/')
+
+        with self.assertNumQueries(0):
+            again = client.get('/api/investments/plans/', HTTP_IF_NONE_MATCH=first['ETag'])
+
+        self.assertEqual([plan['name'] for plan in first.json()], ['Starter'])
+        self.assertEqual(again.status_code, 304)
+        self.assertIn('max-age=300', again['Cache-Control'])
+
+    def test_saving_a_plan_retires_the_catalog(self):
+        etag = APIClient().get('/api/investments/plans/')['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.plan.name = 'Starter+'
+            self.plan.save()
+
+        response = APIClient().get('/api/investments/plans/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['name'], 'Starter+')
+
+    def test_plan_name_comes_from_the_catalog(self):
+        self.invest(days_ago=0)
+        catalog.get_plans()
+        # Bypasses the signals, so only a catalog read still sees the old name.
+        InvestmentPlan.objects.filter(pk=self.plan.pk).update(name='Renamed')
+
+        response = self.client_for(self.user).get('/api/investments/my/')
+
+        self.assertEqual([row['plan_name'] for row in response.json()], ['Starter'])
+
+
+class EarningsTests(InvestmentTestCase):
+    def test_curve_matches_simple_profit_on_both_paths(self):
+        for amount, daily_roi in ((Decimal('33.33'), Decimal('1.25')), (Decimal('0.01'), Decimal('0.5'))):
+            expected = [int(simple_profit(amount, daily_roi, day) * 100) for day in range(1, 31)]
+            for numpy in (earnings.np, None):
+                with self.subTest(amount=amount, numpy=bool(numpy)), mock.patch.object(earnings, 'np', numpy):
+                    self.assertEqual(earnings.cumulative_cents(amount, daily_roi, 30), expected)
+
+    def test_schedule_ends_at_expected_profit(self):
+        investment = self.invest(days_ago=1)
+        client = self.client_for(self.user)
+
+        response = client.get(f'/api/investments/my/{investment.pk}/earnings/')
+
+        days = response.json()['days']
+        self.assertEqual([day['profit'] for day in days], ['2.00'] * 5)
+        self.assertEqual(days[-1]['cumulative'], '10.00')
+        bob = User.objects.create_user('bob', 'bob@example.com', 'pw')
+        self.assertEqual(self.client_for(bob).get(f'/api/investments/my/{investment.pk}/earnings/').status_code, 404)
+
+    def test_portfolio_adds_investments_up_by_date(self):
+        self.invest(days_ago=2)
+        self.invest(days_ago=0)
+
+        response = self.client_for(self.user).get('/api/investments/earnings/')
+
+        data = response.json()
+        self.assertEqual((data['investments'], data['expected_profit']), (2, '20.00'))
+        self.assertEqual([day['profit'] for day in data['days']], ['2.00', '2.00', '4.00', '4.00', '4.00', '2.00', '2.00'])
+
+    def test_projection(self):
+        response = APIClient().get('/api/investments/plans/projection/', {'amount': '5.00'})
+
+        plan, = response.json()['plans']
+        self.assertEqual((plan['eligible'], plan['total_profit'], plan['total_payout']), (False, '0.50', '5.50'))
+        self.assertEqual(plan['cumulative'], ['0.10', '0.20', '0.30', '0.40', '0.50'])
+        for amount in ('abc', '0', '1.005'):
+            with self.subTest(amount=amount):
+                self.assertEqual(APIClient().get('/api/investments/plans/projection/', {'amount': amount}).status_code, 400)
+
+
+class ApprovalTests(InvestmentTestCase):
+    def test_deposit_is_credited_once(self):
+        deposit = self.deposit()
+
+        self.assertTrue(deposit.approve())
+        self.assertFalse(deposit.approve())
+
+        self.assertEqual(deposit.status, 'approved')
+        self.assertEqual(balance(self.user), Decimal('50.00'))
+
+    def test_rejected_deposit_cannot_be_approved(self):
+        deposit = self.deposit()
+        deposit.reject()
+
+        self.assertFalse(deposit.approve())
+
+        self.assertEqual(deposit.status, 'rejected')
+        self.assertEqual(Deposit.objects.get(pk=deposit.pk).status, 'rejected')
+        self.assertEqual(balance(self.user), Decimal('0.00'))
+
+    def test_approved_deposit_cannot_be_rejected(self):
+        deposit = self.deposit()
+        deposit.approve()
+
+        self.assertFalse(deposit.reject())
+
+        self.assertEqual(Deposit.objects.get(pk=deposit.pk).status, 'approved')
+
+    def test_withdrawal_without_funds_is_rejected(self):
+        withdrawal = self.withdrawal()
+
+        self.assertTrue(withdrawal.approve())
+
+        self.assertEqual(withdrawal.status, 'rejected')
+        self.assertEqual(Withdrawal.objects.get(pk=withdrawal.pk).status, 'rejected')
+
+    def test_rejected_withdrawal_cannot_be_approved(self):
+        ledger.credit(self.user.pk, Decimal('100.00'), 'deposit', reference='DEP-0')
+        withdrawal = self.withdrawal()
+        withdrawal.reject()
+
+        self.assertFalse(withdrawal.approve())
+
+        self.assertEqual(withdrawal.status, 'rejected')
+        self.assertEqual(balance(self.user), Decimal('100.00'))
+
+    def test_approve_deposit_view(self):
+        deposit = self.deposit()
+        client = self.admin_client()
+
+        response = client.patch(f'/api/investments/approve-deposit/{deposit.pk}/', {'status': 'approved'}, format='json')
+        again = client.patch(f'/api/investments/approve-deposit/{deposit.pk}/', {'status': 'approved'}, format='json')
+        reject = client.patch(f'/api/investments/approve-deposit/{deposit.pk}/', {'status': 'rejected'}, format='json')
+
+        self.assertEqual((response.status_code, response.json()), (200, {'message': 'Deposit approved successfully.'}))
+        self.assertEqual((again.status_code, again.json()), (409, {'error': 'Deposit is already approved.'}))
+        self.assertEqual((reject.status_code, reject.json()), (409, {'error': 'Deposit is already approved.'}))
+        self.assertEqual(balance(self.user), Decimal('50.00'))
+
+    def test_approve_withdrawal_view(self):
+        ledger.credit(self.user.pk, Decimal('30.00'), 'deposit', reference='DEP-0')
+        paid, unfunded, rejected = self.withdrawal('20.00'), self.withdrawal('20.00'), self.withdrawal('5.00')
+        rejected.reject()
+        client = self.admin_client()
+
+        def approve(withdrawal):
+            return client.patch(f'/api/investments/approve-withdrawal/{withdrawal.pk}/', {'status': 'approved'}, format='json')
+
+        responses = [approve(paid), approve(unfunded), approve(rejected), approve(paid)]
+
+        self.assertEqual([(response.status_code, response.json()) for response in responses], [
+            (200, {'message': 'Withdrawal approved successfully.'}),
+            (400, {'error': 'Insufficient wallet balance.'}),
+            (409, {'error': 'Withdrawal is already rejected.'}),
+            (409, {'error': 'Withdrawal is already approved.'}),
+        ])
+        self.assertEqual(balance(self.user), Decimal('10.00'))
+
+
+class BulkApprovalTests(InvestmentTestCase):
+    def test_approve_deposits(self):
+        first, second = self.deposit('50.00'), self.deposit('25.00')
+        second.reject()
+
+        results = bulk.approve_deposits([first.pk, second.pk, first.pk, 999])
+
+        self.assertEqual(results, [
+            {'id': first.pk, 'status': 'approved'},
+            {'id': second.pk, 'error': 'Deposit is already rejected.'},
+            {'id': 999, 'error': 'Deposit not found.'},
+        ])
+        self.assertEqual(balance(self.user), Decimal('50.00'))
+        self.assertEqual(bulk.approve_deposits([first.pk]), [{'id': first.pk, 'error': 'Deposit is already approved.'}])
+        self.assertEqual(balance(self.user), Decimal('50.00'))
+
+    def test_approve_withdrawals_in_id_order(self):
+        ledger.credit(self.user.pk, Decimal('30.00'), 'deposit', reference='DEP-0')
+        first, second, third = self.withdrawal('20.00'), self.withdrawal('20.00'), self.withdrawal('10.00')
+
+        results = bulk.approve_withdrawals([third.pk, second.pk, first.pk])
+
+        self.assertEqual(results, [
+            {'id': third.pk, 'status': 'approved'},
+            {'id': second.pk, 'status': 'rejected', 'error': 'Insufficient wallet balance.'},
+            {'id': first.pk, 'status': 'approved'},
+        ])
+        self.assertEqual(balance(self.user), Decimal('0.00'))
+        self.assertEqual(Withdrawal.objects.get(pk=second.pk).status, 'rejected')
+
+    def test_rejected_withdrawals_are_not_approved(self):
+        ledger.credit(self.user.pk, Decimal('30.00'), 'deposit', reference='DEP-0')
+        withdrawal = self.withdrawal()
+        bulk.reject_withdrawals([withdrawal.pk])
+
+        results = bulk.approve_withdrawals([withdrawal.pk])
+
+        self.assertEqual(results, [{'id': withdrawal.pk, 'error': 'Withdrawal is already rejected.'}])
+        self.assertEqual(balance(self.user), Decimal('30.00'))
+
+    def test_reject_only_touches_pending(self):
+        approved, pending = self.deposit(), self.deposit()
+        approved.approve()
+
+        results = bulk.reject_deposits([approved.pk, pending.pk])
+
+        self.assertEqual(results, [
+            {'id': approved.pk, 'error': 'Deposit is already approved.'},
+            {'id': pending.pk, 'status': 'rejected'},
+        ])
+        self.assertEqual(bulk.approve_deposits([pending.pk]), [{'id': pending.pk, 'error': 'Deposit is already rejected.'}])
+        self.assertEqual(balance(self.user), Decimal('50.00'))
+
+    def test_endpoint_is_admin_only(self):
+        deposit = self.deposit()
+        body = {'ids': [deposit.pk], 'status': 'approved'}
+
+        forbidden = self.client_for(self.user).post('/api/investments/approve-deposits/', body, format='json')
+        response = self.admin_client().post('/api/investments/approve-deposits/', body, format='json')
+
+        self.assertEqual(forbidden.status_code, 403)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'results': [{'id': deposit.pk, 'status': 'approved'}]})
+        self.assertEqual(balance(self.user), Decimal('50.00'))
+
+
+class RollupTests(InvestmentTestCase):
+    def setUp(self):
+        super().setUp()
+        self.today = timezone.localdate()
+        self.investment = self.invest(days_ago=0)
+        ledger.credit(self.user.pk, Decimal('2.00'), 'profit', reference=f'ACR-{self.investment.pk}-{self.today}')
+        ledger.credit(self.user.pk, Decimal('1.00'), 'profit', reference='BONUS-1')
+        self.deposit('50.00')
+
+    def plan_rows(self):
+        return sorted(
+            DailyPlanRollup.objects.filter(day=self.today).values_list('plan_id', 'new_investments', 'profit_paid'),
+            key=lambda row: row[0] or 0,
+        )
+
+    def test_rebuilding_a_day_updates_rows_in_place(self):
+        rollups.rebuild_day(self.today)
+        self.investment.delete()
+        self.invest(days_ago=0)
+        self.deposit('25.00')
+
+        rollups.rebuild_day(self.today)
+
+        self.assertEqual(self.plan_rows(), [(None, 0, Decimal('3.00')), (self.plan.pk, 1, Decimal('0.00'))])
+        self.assertEqual(
+            list(DailyCashflow.objects.filter(day=self.today).values_list('kind', 'status', 'count', 'total')),
+            [('deposit', 'pending', 2, Decimal('75.00'))],
+        )
+
+    def test_rows_no_longer_computed_are_removed(self):
+        rollups.rebuild_day(self.today)
+        UserInvestment.objects.all().delete()
+        TransactionHistory.objects.filter(transaction_type='profit').delete()
+        Deposit.objects.update(status='approved')
+
+        rollups.rebuild_day(self.today)
+
+        self.assertEqual(self.plan_rows(), [])
+        self.assertEqual(
+            list(DailyCashflow.objects.filter(day=self.today).values_list('status', flat=True)), ['approved'],
+        )
+
+    def test_one_row_per_day_and_plan(self):
+        rollups.rebuild_day(self.today)
+
+        for plan in (self.plan, None):
+            with self.subTest(plan=plan), self.assertRaises(IntegrityError), transaction.atomic():
+                DailyPlanRollup.objects.create(day=self.today, plan=plan)
+
+
+class ProofTests(InvestmentTestCase):
+    def setUp(self):
+        super().setUp()
+        self.use_temp_media()
+
+    def upload(self, content, name='proof.jpg'):
+        return Deposit.objects.create(
+            user=self.user, amount=Decimal('50.00'), proof=SimpleUploadedFile(name, content, 'image/jpeg'),
+        )
+
+    def jpeg(self, size=(600, 400)):
+        image = Image.effect_noise(size, 64).convert('RGB')
+        exif = Image.Exif()
+        exif[0x010F] = 'Camera maker'  # Make
+        exif[0x0112] = 6               # Orientation: rotate 90° clockwise
+        buffer = BytesIO()
+        image.save(buffer, format='JPEG', exif=exif)
+        return buffer.getvalue()
+
+    def files(self):
+        return sorted(
+            os.path.relpath(os.path.join(root, name), self.media_root)
+            for root, _, names in os.walk(self.media_root) for name in names
+        )
+
+    def test_processes_a_valid_image(self):
+        deposit = self.upload(self.jpeg())
+        original = deposit.proof.name
+
+        proofs.process_proof(deposit.pk)
+
+        deposit.refresh_from_db()
+        self.assertEqual(deposit.proof_status, 'processed')
+        self.assertEqual(len(deposit.proof_sha256), 64)
+        self.assertNotEqual(deposit.proof.name, original)
+        self.assertEqual(self.files(), sorted([deposit.proof.name, deposit.proof_thumbnail.name, deposit.proof_web.name]))
+        with Image.open(deposit.proof.path) as stripped:
+            self.assertEqual(stripped.size, (400, 600))
+            self.assertEqual(len(stripped.getexif()), 0)
+        with Image.open(deposit.proof_thumbnail.path) as thumbnail:
+            self.assertLessEqual(max(thumbnail.size), 240)
+
+    def test_truncated_image_is_invalid_and_leaves_no_files(self):
+        data = self.jpeg()
+        deposit = self.upload(data[:len(data) // 2])
+
+        proofs.process_proof(deposit.pk)
+
+        deposit.refresh_from_db()
+        self.assertEqual(deposit.proof_status, 'invalid')
+        self.assertEqual(self.files(), [deposit.proof.name])
+
+    def test_non_image_is_invalid(self):
+        deposit = self.upload(b'%PDF-1.4 not an image', name='proof.pdf')
+
+        proofs.process_proof(deposit.pk)
+
+        self.assertEqual(Deposit.objects.get(pk=deposit.pk).proof_status, 'invalid')
+
+    def test_processed_rows_are_skipped(self):
+        deposit = self.upload(self.jpeg())
+        proofs.process_proof(deposit.pk)
+        files = self.files()
+
+        proofs.process_proof(deposit.pk)
+
+        self.assertEqual(self.files(), files)
+
+    def test_run_that_loses_the_race_discards_its_files(self):
+        deposit = self.upload(self.jpeg())
+        original = deposit.proof.name
+        save = FileSystemStorage.save
+
+        def save_after_another_run(storage, name, content, *args, **kwargs):
+            # Another run finishes while this one is writing its files.
+            Deposit.objects.filter(pk=deposit.pk).update(proof_status='processed')
+            return save(storage, name, content, *args, **kwargs)
+
+        with mock.patch.object(FileSystemStorage, 'save', save_after_another_run):
+            proofs.process_proof(deposit.pk)
+
+        self.assertEqual(Deposit.objects.get(pk=deposit.pk).proof.name, original)
+        self.assertEqual(self.files(), [original])
+
+    def test_storage_errors_leave_the_row_pending(self):
+        deposit = self.upload(self.jpeg())
+        original = deposit.proof.name
+        save = FileSystemStorage.save
+        calls = []
+
+        def failing_save(storage, name, content, *args, **kwargs):
+            calls.append(name)
+            if len(calls) == 2:
+                raise OSError("disk full")
+            return save(storage, name, content, *args, **kwargs)
+
+        with mock.patch.object(FileSystemStorage, 'save', failing_save), self.assertRaises(OSError):
+            proofs.process_proof(deposit.pk)
+
+        self.assertEqual(Deposit.objects.get(pk=deposit.pk).proof_status, 'pending')
+        self.assertEqual(self.files(), [original])
+
+
+class IdempotencyTests(InvestmentTestCase):
+    def setUp(self):
+        super().setUp()
+        ledger.credit(self.user.pk, Decimal('500.00'), 'deposit', reference='DEP-0')
+        self.client = self.client_for(self.user)
+
+    def start(self, amount, key):
+        return self.client.post(
+            '/api/investments/start/', {'plan': self.plan.pk, 'amount': amount}, format='json',
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_retry_replays_the_first_response(self):
+        first = self.start('100.00', 'retry-1')
+        retry = self.start('100.00', 'retry-1')
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.content, first.content)
+        self.assertEqual(UserInvestment.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(balance(self.user), Decimal('400.00'))
+
+    def test_reused_key_with_another_body_is_422(self):
+        self.start('100.00', 'retry-1')
+
+        response = self.start('200.00', 'retry-1')
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(UserInvestment.objects.filter(user=self.user).count(), 1)
+
+    def test_other_keys_run_again(self):
+        self.start('100.00', 'retry-1')
+        self.start('100.00', 'retry-2')
+
+        self.assertEqual(UserInvestment.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(balance(self.user), Decimal('300.00'))
+
+    def test_keys_are_per_user(self):
+        self.start('100.00', 'retry-1')
+        bob = User.objects.create_user('bob', 'bob@example.com', 'pw')
+        Wallet.objects.create(user=bob)
+        ledger.credit(bob.pk, Decimal('100.00'), 'deposit', reference='DEP-B')
+
+        response = self.client_for(bob).post(
+            '/api/investments/start/', {'plan': self.plan.pk, 'amount': '100.00'}, format='json',
+            HTTP_IDEMPOTENCY_KEY='retry-1',
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(balance(bob), Decimal('0.00'))
+
+    def test_multipart_fingerprint_covers_fields_and_files(self):
+        self.use_temp_media()
+
+        def deposit(amount, color):
+            buffer = BytesIO()
+            Image.new('RGB', (4, 4), color).save(buffer, format='PNG')
+            proof = SimpleUploadedFile('proof.png', buffer.getvalue(), 'image/png')
+            return self.client.post(
+                '/api/investments/deposit/', {'amount': amount, 'proof': proof}, format='multipart',
+                HTTP_IDEMPOTENCY_KEY='upload-1',
+            )
+
+        self.assertEqual(deposit('50.00', 'red').status_code, 201)
+        self.assertEqual(deposit('50.00', 'red')['Idempotent-Replayed'], 'true')
+        # Same length, different bytes or fields: not the same request.
+        self.assertEqual(deposit('50.00', 'blue').status_code, 422)
+        self.assertEqual(deposit('51.00', 'red').status_code, 422)
+        self.assertEqual(Deposit.objects.filter(user=self.user).count(), 1)
+
+
+@override_settings(IDEMPOTENCY={'STORE': 'cache'})
+class CacheStoreIdempotencyTests(IdempotencyTests):
+    """The same behaviour with records in the (here process-local) cache."""
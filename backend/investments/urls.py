@@ -1,4 +1,5 @@
 from django.urls import path
+from . import async_views
 from .views import (
     # 📈 Investment Views
     InvestmentPlanListView,
@@ -6,21 +7,28 @@ from .views import (
     UserInvestmentListView,
     UserInvestmentDetailView,
     InvestmentProfitView,
+    InvestmentEarningsView,
+    PortfolioEarningsView,
+    PlanProjectionView,
     ActiveInvestmentsView,
     CompleteExpiredInvestmentsView,
+    AnalyticsView,
 
     # 💰 Deposit Views
     DepositCreateView,
     DepositListView,
     ApproveDepositView,
+    BulkApproveDepositsView,
 
     # 💸 Withdrawal Views
     WithdrawalCreateView,
     WithdrawalListView,
     ApproveWithdrawalView,
+    BulkApproveWithdrawalsView,
 
-    # 👛 Wallet View
+    # 👛 Wallet Views
     WalletView,
+    WalletOverviewView,
 )
 
 urlpatterns = [
@@ -32,8 +40,12 @@ urlpatterns = [
     path('my/', UserInvestmentListView.as_view(), name='my-investments'),                  # View user’s investments
     path('my/<int:pk>/', UserInvestmentDetailView.as_view(), name='investment-detail'),    # View single investment details
     path('my/<int:pk>/profit/', InvestmentProfitView.as_view(), name='investment-profit'), # Check profit on investment
+    path('my/<int:pk>/earnings/', InvestmentEarningsView.as_view(), name='investment-earnings'),  # Day-by-day earnings schedule
+    path('earnings/', PortfolioEarningsView.as_view(), name='portfolio-earnings'),         # Earnings schedule of all active investments
+    path('plans/projection/', PlanProjectionView.as_view(), name='plan-projection'),       # Projected earnings for ?amount= in each plan
     path('active/', ActiveInvestmentsView.as_view(), name='active-investments'),           # View all active investments
     path('complete-expired/', CompleteExpiredInvestmentsView.as_view(), name='complete-expired'),  # Admin: complete expired investments
+    path('analytics/', AnalyticsView.as_view(), name='analytics'),                         # Admin: daily rollup figures
 
     # ==========================
     # 💰 DEPOSIT ROUTES
@@ -41,6 +53,7 @@ urlpatterns = [
     path('deposit/', DepositCreateView.as_view(), name='create-deposit'),                  # User uploads deposit proof
     path('deposits/', DepositListView.as_view(), name='list-deposits'),                    # Admin: view all deposits
     path('approve-deposit/<int:pk>/', ApproveDepositView.as_view(), name='approve-deposit'),  # Admin: approve/reject deposit
+    path('approve-deposits/', BulkApproveDepositsView.as_view(), name='bulk-approve-deposits'),          # Admin: approve/reject many deposits
 
     # ==========================
     # 💸 WITHDRAWAL ROUTES
@@ -48,9 +61,20 @@ urlpatterns = [
     path('withdraw/', WithdrawalCreateView.as_view(), name='create-withdrawal'),           # User requests withdrawal
     path('withdrawals/', WithdrawalListView.as_view(), name='list-withdrawals'),           # Admin: view all withdrawals
     path('approve-withdrawal/<int:pk>/', ApproveWithdrawalView.as_view(), name='approve-withdrawal'),  # Admin: approve/reject withdrawal
+    path('approve-withdrawals/', BulkApproveWithdrawalsView.as_view(), name='bulk-approve-withdrawals'), # Admin: approve/reject many withdrawals
 
     # ==========================
     # 👛 WALLET ROUTE
     # ==========================
     path('wallet/', WalletView.as_view(), name='user-wallet'),                             # View user’s wallet balance
+    path('overview/', WalletOverviewView.as_view(), name='wallet-overview'),               # Dashboard overview summary
+
+    # ==========================
+    # ⚡ ASYNC DASHBOARD ROUTES (serve under ASGI)
+    # ==========================
+    path('dashboard/', async_views.dashboard, name='dashboard'),                                        # Every section below in one response
+    path('dashboard/overview/', async_views.overview, name='dashboard-overview'),                       # Same as overview/
+    path('dashboard/wallet/', async_views.wallet, name='dashboard-wallet'),                             # Same as wallet/
+    path('dashboard/active/', async_views.active_investments, name='dashboard-active-investments'),     # Same as active/
+    path('dashboard/transactions/', async_views.recent_transactions, name='dashboard-recent-transactions'),  # Latest transactions
 ]
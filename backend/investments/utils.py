@@ -4,16 +4,12 @@ from decimal import Decimal
 def update_investment_profits(user):
     from .models import Investment
 
-    investments = Investment.objects.filter(user=user, is_completed=False)
-    updated = 0
+    investments = list(Investment.objects.filter(user=user, is_completed=False).select_related('plan'))
+    now = timezone.now()
 
     for inv in investments:
-        if timezone.now() >= inv.ends_at:
-            inv.calculate_profit()
-            inv.is_completed = True
-            inv.save()
-        else:
-            inv.calculate_profit()
-        updated += 1
+        inv.calculate_profit(commit=False)
+        inv.is_completed = now >= inv.ends_at
 
-    return updated
+    Investment.objects.bulk_update(investments, ['profit', 'total_return', 'is_completed'])
+    return len(investments)
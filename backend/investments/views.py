@@ -1,19 +1,28 @@
+from datetime import date, timedelta
+from decimal import Decimal, InvalidOperation
+
 from rest_framework import generics, status, permissions
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.exceptions import ValidationError
-from decimal import Decimal
-from django.db import models
 from django.utils import timezone
-from transactions.models import TransactionHistory
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
 from .models import (
     InvestmentPlan,
+    RollupState,
     UserInvestment,
     Deposit,
     Withdrawal,
 )
+from core.conditional import ConditionalGetMixin
+from core.db import ReplicaReadMixin, read_alias
+from core.idempotency import IdempotentMixin
+from core.serialization import FastListMixin
+from wallets import ledger
 from wallets.models import Wallet  # ✅ Correct wallet import
+from . import bulk, catalog, dashboard, earnings, maturity, proofs, rollups
 
 from .serializers import (
     InvestmentPlanSerializer,
@@ -21,9 +30,9 @@ from .serializers import (
     InvestmentProfitSerializer,
     DepositSerializer,
     WithdrawalSerializer,
-    WalletSerializer,
     DepositApprovalSerializer,
-    WithdrawalApprovalSerializer
+    WithdrawalApprovalSerializer,
+    BulkApprovalSerializer,
 )
 
 
@@ -32,22 +41,38 @@ from .serializers import (
 # ==========================
 
 class InvestmentPlanListView(generics.ListAPIView):
-    """List all available investment plans."""
+    """List all available investment plans (served from the cached plan catalog)."""
     queryset = InvestmentPlan.objects.all()
     serializer_class = InvestmentPlanSerializer
     permission_classes = [permissions.AllowAny]
 
+    def list(self, request, *args, **kwargs):
+        data, etag = catalog.get_plan_list()
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(data, status=status.HTTP_200_OK)
+        response["ETag"] = etag
+        patch_cache_control(response, public=True, max_age=catalog.CATALOG_TIMEOUT)
+        return response
+
 
-class UserInvestmentListView(generics.ListAPIView):
+class UserInvestmentListView(ConditionalGetMixin, FastListMixin, ReplicaReadMixin, generics.ListAPIView):
     """List all investments by the authenticated user."""
     serializer_class = UserInvestmentSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    def get_version(self):
+        # Investments are opened, accrued and paid out through the ledger;
+        # plan names come from the catalog.
+        version = ledger.version(self.request.user.pk, using=read_alias(self.request))
+        return (*version, catalog.get_version()), version[0]
+
     def get_queryset(self):
         return UserInvestment.objects.filter(user=self.request.user).order_by("-start_date")
 
 
-class StartInvestmentView(generics.CreateAPIView):
+class StartInvestmentView(IdempotentMixin, generics.CreateAPIView):
     """Start a new investment."""
     serializer_class = UserInvestmentSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -75,51 +100,134 @@ class InvestmentProfitView(APIView):
         except UserInvestment.DoesNotExist:
             return Response({"error": "Investment not found."}, status=status.HTTP_404_NOT_FOUND)
 
-        serializer = InvestmentProfitSerializer(investment)
+        serializer = InvestmentProfitSerializer(investment, context={"request": request})
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class ActiveInvestmentsView(generics.ListAPIView):
+class InvestmentEarningsView(APIView):
+    """Day-by-day earnings schedule of one investment."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk):
+        try:
+            investment = UserInvestment.objects.get(pk=pk, user=request.user)
+        except UserInvestment.DoesNotExist:
+            return Response({"error": "Investment not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(earnings.schedule(investment), status=status.HTTP_200_OK)
+
+
+class PortfolioEarningsView(APIView):
+    """Combined day-by-day earnings of the user's active investments."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        investments = dashboard.active_investments_queryset(request.user).using(read_alias(request))
+        return Response(earnings.portfolio(investments), status=status.HTTP_200_OK)
+
+
+class PlanProjectionView(APIView):
+    """What investing ``?amount=`` in each plan would earn, day by day."""
+    permission_classes = [permissions.AllowAny]
+    max_amount = Decimal("1000000000")
+
+    def get(self, request):
+        try:
+            amount = Decimal(request.query_params.get("amount", ""))
+        except InvalidOperation:
+            raise ValidationError({"amount": "A number is required."})
+        if not amount.is_finite() or not 0 < amount <= self.max_amount or amount != amount.quantize(Decimal("0.01")):
+            raise ValidationError({"amount": f"Must be above 0 and at most {self.max_amount}, with at most two decimal places."})
+
+        response = Response({"amount": str(amount), "plans": earnings.projection(amount)}, status=status.HTTP_200_OK)
+        patch_cache_control(response, public=True, max_age=catalog.CATALOG_TIMEOUT)
+        return response
+
+
+class ActiveInvestmentsView(FastListMixin, generics.ListAPIView):
     """List active investments."""
     serializer_class = UserInvestmentSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return UserInvestment.objects.filter(user=self.request.user, status="active").order_by("-start_date")
+        return dashboard.active_investments_queryset(self.request.user)
 
 
 class CompleteExpiredInvestmentsView(APIView):
-    """Admin: Automatically complete expired investments."""
+    """Admin: Complete expired investments and pay them out to wallets."""
     permission_classes = [permissions.IsAdminUser]
 
     def post(self, request):
-        now = timezone.now()
-        expired_investments = UserInvestment.objects.filter(end_date__lt=now, status="active")
-        count = expired_investments.update(status="completed")
-        return Response({"message": f"{count} investment(s) marked as completed."}, status=status.HTTP_200_OK)
+        chunk_size = request.data.get("chunk_size", 1000)
+        try:
+            chunk_size = int(chunk_size)
+        except (TypeError, ValueError):
+            raise ValidationError({"chunk_size": "Must be an integer."})
+        if not 1 <= chunk_size <= 10000:
+            raise ValidationError({"chunk_size": "Must be between 1 and 10000."})
+
+        result = maturity.complete_matured(chunk_size=chunk_size)
+        return Response({
+            "message": f"{result.completed} investment(s) marked as completed.",
+            "completed": result.completed,
+            "total_payout": str(result.total_payout),
+            "seconds": round(result.seconds, 3),
+            "per_second": round(result.completed / result.seconds) if result.seconds else 0,
+        }, status=status.HTTP_200_OK)
+
+
+class AnalyticsView(APIView):
+    """Admin: Daily deposits, withdrawals and per-plan activity, read from the rollup tables."""
+    permission_classes = [permissions.IsAdminUser]
+    max_days = 366
+
+    def get(self, request):
+        end = self.parse_date('end') or timezone.localdate()
+        start = self.parse_date('start') or end - timedelta(days=6)
+        if start > end:
+            raise ValidationError({"start": "Must not be after end."})
+        if (end - start).days >= self.max_days:
+            raise ValidationError({"start": f"The range may cover at most {self.max_days} days."})
+
+        return Response({
+            "start": start,
+            "end": end,
+            # Rollups reflect changes up to here (see build_rollups).
+            "synced_to": RollupState.load().synced_to,
+            **rollups.summarize(start, end),
+        }, status=status.HTTP_200_OK)
+
+    def parse_date(self, param):
+        value = self.request.query_params.get(param)
+        if not value:
+            return None
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise ValidationError({param: "Use YYYY-MM-DD format."})
 
 
 # ==========================
 # 💰 DEPOSIT VIEWS
 # ==========================
 
-class DepositCreateView(generics.CreateAPIView):
+class DepositCreateView(IdempotentMixin, generics.CreateAPIView):
     """User uploads payment proof for deposit."""
     serializer_class = DepositSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user, status="pending")
+        deposit = serializer.save(user=self.request.user, status="pending")
+        proofs.schedule(deposit.pk)  # 🖼️ verify/strip/resize off the request path
 
 
-class DepositListView(generics.ListAPIView):
+class DepositListView(FastListMixin, ReplicaReadMixin, generics.ListAPIView):
     """Admin: View all deposits."""
     queryset = Deposit.objects.all().order_by('-created_at')
     serializer_class = DepositSerializer
     permission_classes = [permissions.IsAdminUser]
 
 
-class ApproveDepositView(generics.UpdateAPIView):
+class ApproveDepositView(IdempotentMixin, generics.UpdateAPIView):
     """Admin approves or rejects a deposit."""
     queryset = Deposit.objects.all()
     serializer_class = DepositApprovalSerializer
@@ -129,22 +237,34 @@ class ApproveDepositView(generics.UpdateAPIView):
         instance = self.get_object()
         serializer = self.get_serializer(instance, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        serializer.save()  # 💵 approve() credits the wallet through the ledger
 
-        # 💵 Update wallet if approved
-        if instance.status == "approved":
-            wallet, _ = Wallet.objects.get_or_create(user=instance.user)
-            wallet.balance += instance.amount
-            wallet.save()
+        if not serializer.changed:
+            return Response({"error": f"Deposit is already {instance.status}."}, status=status.HTTP_409_CONFLICT)
 
         return Response({"message": f"Deposit {instance.status} successfully."}, status=status.HTTP_200_OK)
 
 
+class BulkApproveDepositsView(IdempotentMixin, APIView):
+    """Admin approves or rejects many deposits in one transaction."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def post(self, request):
+        serializer = BulkApprovalSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data["ids"]
+        if serializer.validated_data["status"] == "approved":
+            results = bulk.approve_deposits(ids)
+        else:
+            results = bulk.reject_deposits(ids)
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+
 # ==========================
 # 💸 WITHDRAWAL VIEWS
 # ==========================
 
-class WithdrawalCreateView(generics.CreateAPIView):
+class WithdrawalCreateView(IdempotentMixin, generics.CreateAPIView):
     """User requests a withdrawal."""
     serializer_class = WithdrawalSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -159,14 +279,14 @@ class WithdrawalCreateView(generics.CreateAPIView):
         serializer.save(user=self.request.user, status="pending")
 
 
-class WithdrawalListView(generics.ListAPIView):
+class WithdrawalListView(FastListMixin, ReplicaReadMixin, generics.ListAPIView):
     """Admin: View all withdrawal requests."""
     queryset = Withdrawal.objects.all().order_by('-created_at')
     serializer_class = WithdrawalSerializer
     permission_classes = [permissions.IsAdminUser]
 
 
-class ApproveWithdrawalView(generics.UpdateAPIView):
+class ApproveWithdrawalView(IdempotentMixin, generics.UpdateAPIView):
     """Admin approves or rejects a withdrawal."""
     queryset = Withdrawal.objects.all()
     serializer_class = WithdrawalApprovalSerializer
@@ -176,32 +296,47 @@ class ApproveWithdrawalView(generics.UpdateAPIView):
         instance = self.get_object()
         serializer = self.get_serializer(instance, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        serializer.save()  # 💸 approve() debits the wallet through the ledger
+
+        if not serializer.changed:
+            return Response({"error": f"Withdrawal is already {instance.status}."}, status=status.HTTP_409_CONFLICT)
 
-        # 💸 Update wallet if approved
-        if instance.status == "approved":
-            wallet, _ = Wallet.objects.get_or_create(user=instance.user)
-            if wallet.balance >= instance.amount:
-                wallet.balance -= instance.amount
-                wallet.save()
-            else:
-                return Response({"error": "Insufficient wallet balance."}, status=status.HTTP_400_BAD_REQUEST)
+        # approve() rejects the withdrawal instead when the wallet can't cover it
+        if serializer.validated_data.get("status") == "approved" and instance.status != "approved":
+            return Response({"error": "Insufficient wallet balance."}, status=status.HTTP_400_BAD_REQUEST)
 
         return Response({"message": f"Withdrawal {instance.status} successfully."}, status=status.HTTP_200_OK)
 
 
+class BulkApproveWithdrawalsView(IdempotentMixin, APIView):
+    """Admin approves or rejects many withdrawals in one transaction."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def post(self, request):
+        serializer = BulkApprovalSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data["ids"]
+        if serializer.validated_data["status"] == "approved":
+            results = bulk.approve_withdrawals(ids)
+        else:
+            results = bulk.reject_withdrawals(ids)
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+
 # ==========================
 # 👛 WALLET VIEWS
 # ==========================
 
-class WalletView(APIView):
+class WalletView(ConditionalGetMixin, APIView):
     """Get current wallet balance."""
     permission_classes = [IsAuthenticated]
 
+    def get_version(self):
+        version = ledger.version(self.request.user.pk)
+        return version, version[0]
+
     def get(self, request):
-        wallet, _ = Wallet.objects.get_or_create(user=request.user)
-        serializer = WalletSerializer(wallet)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return Response(dashboard.wallet(request.user, context={"request": request}), status=status.HTTP_200_OK)
 
 
 # ==========================
@@ -213,50 +348,4 @@ class WalletOverviewView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        user = request.user
-        wallet, _ = Wallet.objects.get_or_create(user=user)
-
-        total_deposits = (
-            Deposit.objects.filter(user=user, status="approved")
-            .aggregate(total=models.Sum("amount"))
-            .get("total") or Decimal("0.00")
-        )
-
-        total_withdrawals = (
-            Withdrawal.objects.filter(user=user, status="approved")
-            .aggregate(total=models.Sum("amount"))
-            .get("total") or Decimal("0.00")
-        )
-
-        total_profits = (
-            UserInvestment.objects.filter(user=user, status="completed")
-            .aggregate(total=models.Sum("expected_profit"))
-            .get("total") or Decimal("0.00")
-        )
-
-        last_txn = (
-            TransactionHistory.objects.filter(user=user)
-            .order_by("-created_at")
-            .first()
-        )
-
-        last_transaction_data = (
-            {
-                "transaction_type": last_txn.transaction_type,
-                "amount": last_txn.amount,
-                "status": last_txn.status,
-                "created_at": last_txn.created_at,
-            }
-            if last_txn
-            else None
-        )
-
-        data = {
-            "balance": wallet.balance,
-            "total_deposits": total_deposits,
-            "total_withdrawals": total_withdrawals,
-            "total_profits": total_profits,
-            "last_transaction": last_transaction_data,
-        }
-
-        return Response(data, status=status.HTTP_200_OK)
+        return Response(dashboard.overview(request.user), status=status.HTTP_200_OK)
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 from datetime import timedelta
 
@@ -37,15 +38,18 @@ INSTALLED_APPS = [
     'investments',
     'transactions',
     'wallets',
+    'core',
 ]
 
 MIDDLEWARE = [
+    "core.middleware.MetricsMiddleware",  # first, so its timing covers the whole stack
     "corsheaders.middleware.CorsMiddleware",
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.ReadYourWritesMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -92,6 +96,31 @@ DATABASES = {
     }
 }
 
+# Optional read replica for list/reporting views (core.db). To try it locally
+# with SQLite: cp db.sqlite3 db-replica.sqlite3 && REPLICA_DB=db-replica.sqlite3
+if os.environ.get('REPLICA_DB'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / os.environ['REPLICA_DB'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['core.db.PrimaryReplicaRouter']
+
+# How long a user's reads stay on the primary after they write.
+REPLICA_PIN_SECONDS = 5
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'metaltropic',
+    }
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -129,6 +158,27 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+MEDIA_URL = 'media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Thread-pool size for deposit proof processing (0 = process inline).
+DEPOSIT_PROOF_WORKERS = 2
+
+# Idempotency-Key handling for money-moving endpoints (core.idempotency).
+# STORE is "database" (core.IdempotencyRecord) or "cache" (default cache alias).
+# "cache" needs a cache every worker shares (Redis, Memcached); the local-memory
+# cache above is per process, so duplicates on different workers would both run.
+IDEMPOTENCY = {
+    "STORE": "database",
+    "TTL": 60 * 60 * 24,     # how long a stored response is replayed
+    "LOCK_TIMEOUT": 60,      # how long an in-flight request holds its key
+    "WAIT_TIMEOUT": 10,      # how long a concurrent duplicate waits for it
+}
+
+# Bearer token required to scrape /metrics; while it is unset the endpoint is a 404.
+# For multi-process servers also set PROMETHEUS_MULTIPROC_DIR (see core.metrics).
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -137,7 +187,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "accounts.authentication.CachedJWTAuthentication",
         "rest_framework.authentication.SessionAuthentication",
         "rest_framework.authentication.BasicAuthentication",           # optional, for testing
     ),
@@ -147,6 +197,13 @@ REST_FRAMEWORK = {
 }
 
 
+# Users authenticated by JWT are cached (with their wallet) for this many
+# seconds; saves invalidate them immediately (accounts.cache). Only with a
+# shared cache: on a process-local one the user is read on every request.
+AUTH_USER_CACHE_TIMEOUT = 60
+AUTH_USER_CACHE_WALLET = True
+
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=60),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
@@ -1,9 +1,11 @@
 from django.contrib import admin
+from core.changelist import DateDrillDownFilter, LargeTableAdminMixin
+from core.db import ReplicaChangeListMixin
 from .models import TransactionHistory
 
 
 @admin.register(TransactionHistory)
-class TransactionHistoryAdmin(admin.ModelAdmin):
+class TransactionHistoryAdmin(ReplicaChangeListMixin, LargeTableAdminMixin, admin.ModelAdmin):
     list_display = (
         'user',
         'transaction_type',
@@ -14,9 +16,11 @@ class TransactionHistoryAdmin(admin.ModelAdmin):
         'reference',
         'created_at',
     )
-    list_filter = ('transaction_type', 'status', 'created_at')
-    search_fields = ('user__username', 'reference', 'description')
-    ordering = ('-created_at',)
+    list_filter = ('transaction_type', 'status', ('created_at', DateDrillDownFilter))
+    list_select_related = ('user',)
+    search_fields = ('user__username', 'reference')
+    search_help_text = "Start of a username or reference (case-sensitive)."
+    ordering = ('-id',)
     readonly_fields = (
         'user',
         'transaction_type',
@@ -31,5 +35,4 @@ class TransactionHistoryAdmin(admin.ModelAdmin):
     )
 
     list_per_page = 25
-    date_hierarchy = 'created_at'
     save_on_top = True
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0002_transactionhistory_balance_before_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='transactionhistory',
+            name='transaction_type',
+            field=models.CharField(choices=[('deposit', 'Deposit'), ('withdrawal', 'Withdrawal'), ('profit', 'Profit'), ('manual_credit', 'Manual Credit'), ('manual_debit', 'Manual Debit'), ('transfer', 'Transfer'), ('investment', 'Investment')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0003_transactionhistory_investment_type'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transactionhistory',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='txn_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transactionhistory',
+            index=models.Index(fields=['user', 'transaction_type', '-created_at', '-id'], name='txn_user_type_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transactionhistory',
+            index=models.Index(fields=['user', 'status', '-created_at', '-id'], name='txn_user_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transactionhistory',
+            index=models.Index(fields=['-created_at', '-id'], name='txn_created_idx'),
+        ),
+    ]
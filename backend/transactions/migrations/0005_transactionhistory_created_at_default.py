@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:46
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0004_transactionhistory_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='transactionhistory',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:55
+
+import core.ids
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Q
+
+CHUNK_SIZE = 2000
+
+
+def rewrite_ids(apps, schema_editor):
+    """
+    Re-key existing rows with UUIDv7s built from their ``created_at``, in
+    (created_at, id) order, so ordering by id matches the old history order.
+    References already handed out are left as they are. Rows that already
+    have a version 7 id are skipped, so the step is safe to re-run.
+    """
+    TransactionHistory = apps.get_model('transactions', 'TransactionHistory')
+    generator = core.ids.UUID7Generator()
+    last = None
+    while True:
+        rows = TransactionHistory.objects.order_by('created_at', 'id')
+        if last:
+            rows = rows.filter(Q(created_at__gt=last[0]) | Q(created_at=last[0], id__gt=last[1]))
+        rows = list(rows.values_list('created_at', 'id')[:CHUNK_SIZE])
+        if not rows:
+            break
+        last = rows[-1]
+        for created_at, pk in rows:
+            if pk.version != 7:
+                new_pk = generator(int(created_at.timestamp() * 1000))
+                TransactionHistory.objects.filter(pk=pk).update(id=new_pk)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0006_principal_return_type'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='transactionhistory',
+            options={'ordering': ['-id'], 'verbose_name': 'Transaction History', 'verbose_name_plural': 'Transaction Histories'},
+        ),
+        migrations.RemoveIndex(
+            model_name='transactionhistory',
+            name='txn_user_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='transactionhistory',
+            name='txn_user_type_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='transactionhistory',
+            name='txn_user_status_created_idx',
+        ),
+        migrations.AlterField(
+            model_name='transactionhistory',
+            name='id',
+            field=models.UUIDField(default=core.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.RunPython(rewrite_ids, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='transactionhistory',
+            index=models.Index(fields=['user', '-id'], name='txn_user_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transactionhistory',
+            index=models.Index(fields=['user', 'transaction_type', '-id'], name='txn_user_type_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transactionhistory',
+            index=models.Index(fields=['user', 'status', '-id'], name='txn_user_status_id_idx'),
+        ),
+    ]
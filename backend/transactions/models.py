@@ -1,7 +1,8 @@
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
-import uuid
+
+from core.ids import base32, uuid7
 
 User = settings.AUTH_USER_MODEL
 
@@ -19,6 +20,8 @@ class TransactionHistory(models.Model):
         ('manual_credit', 'Manual Credit'),
         ('manual_debit', 'Manual Debit'),
         ('transfer', 'Transfer'),
+        ('investment', 'Investment'),
+        ('principal_return', 'Principal Return'),
     ]
 
     STATUS_CHOICES = [
@@ -27,7 +30,9 @@ class TransactionHistory(models.Model):
         ('failed', 'Failed'),
     ]
 
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    # Time-ordered (UUIDv7), so new rows append to the primary-key index and
+    # ordering by id is ordering by creation time.
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="transactions")
     transaction_type = models.CharField(max_length=20, choices=TRANSACTION_TYPES)
     amount = models.DecimalField(max_digits=12, decimal_places=2)
@@ -37,70 +42,35 @@ class TransactionHistory(models.Model):
     balance_before = models.DecimalField(max_digits=12, decimal_places=2, default=0.00)
     balance_after = models.DecimalField(max_digits=12, decimal_places=2, default=0.00)
     reference = models.CharField(max_length=50, unique=True, blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add: the wallet ledger stamps the row with the same instant it
+    # records on the wallet summary.
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
-        ordering = ['-created_at']
+        ordering = ['-id']
+        indexes = [
+            # Match the history list's filter paths, all ending in the id
+            # keyset used for pagination.
+            models.Index(fields=['user', '-id'], name='txn_user_id_idx'),
+            models.Index(fields=['user', 'transaction_type', '-id'], name='txn_user_type_id_idx'),
+            models.Index(fields=['user', 'status', '-id'], name='txn_user_status_id_idx'),
+            # Date-range filters and the admin date hierarchy.
+            models.Index(fields=['-created_at', '-id'], name='txn_created_idx'),
+        ]
         verbose_name = "Transaction History"
         verbose_name_plural = "Transaction Histories"
 
     def save(self, *args, **kwargs):
         """Automatically create a transaction reference if missing."""
         if not self.reference:
-            self.reference = f"TXN-{uuid.uuid4().hex[:10].upper()}"
+            self.reference = self.reference_for(self.id)
         super().save(*args, **kwargs)
 
+    @staticmethod
+    def reference_for(pk):
+        """``TXN-`` plus the id in base32: unique, and sorts by creation time."""
+        return f"TXN-{base32(pk)}"
+
     def __str__(self):
         return f"{self.user.username} - {self.transaction_type} - ₦{self.amount}"
 
-
-# --- SIGNALS SECTION ---
-from django.db.models.signals import post_save
-from django.dispatch import receiver
-from investments.models import Deposit, Withdrawal
-from wallets.models import Wallet
-
-
-
-@receiver(post_save, sender=Deposit)
-def log_deposit_transaction(sender, instance, created, **kwargs):
-    """
-    Automatically log a transaction when a deposit is approved.
-    """
-    if instance.status == 'approved':
-        wallet, _ = UserWallet.objects.get_or_create(user=instance.user)
-        before_balance = wallet.balance
-        wallet.balance += instance.amount
-        wallet.save()
-
-        TransactionHistory.objects.create(
-            user=instance.user,
-            transaction_type='deposit',
-            amount=instance.amount,
-            balance_before=before_balance,
-            balance_after=wallet.balance,
-            status='successful',
-            description=f"Deposit approved: {instance.transaction_id}",
-        )
-
-
-@receiver(post_save, sender=Withdrawal)
-def log_withdrawal_transaction(sender, instance, created, **kwargs):
-    """
-    Automatically log a transaction when a withdrawal is approved.
-    """
-    if instance.status == 'approved':
-        wallet, _ = UserWallet.objects.get_or_create(user=instance.user)
-        before_balance = wallet.balance
-        wallet.balance -= instance.amount
-        wallet.save()
-
-        TransactionHistory.objects.create(
-            user=instance.user,
-            transaction_type='withdrawal',
-            amount=instance.amount,
-            balance_before=before_balance,
-            balance_after=wallet.balance,
-            status='successful',
-            description=f"Withdrawal approved: {instance.transaction_id}",
-        )
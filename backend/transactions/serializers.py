@@ -1,8 +1,10 @@
 from rest_framework import serializers
+from accounts.serializers import UserSummarySerializer
+from core.serialization import SparseFieldsMixin
 from .models import TransactionHistory
 
 
-class TransactionHistorySerializer(serializers.ModelSerializer):
+class TransactionHistorySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     username = serializers.CharField(source="user.username", read_only=True)
     transaction_type_display = serializers.CharField(source="get_transaction_type_display", read_only=True)
     status_display = serializers.CharField(source="get_status_display", read_only=True)
@@ -23,6 +25,7 @@ class TransactionHistorySerializer(serializers.ModelSerializer):
             'balance_after',
             'created_at',
         ]
+        expandable_fields = {'user': (UserSummarySerializer, {'read_only': True})}
         read_only_fields = [
             'id',
             'username',
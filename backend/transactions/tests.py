@@ -1,3 +1,213 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.changelist import DateDrillDownFilter, EstimatedCountPaginator
+from wallets import ledger
+from wallets.models import Wallet
+from .models import TransactionHistory
+
+User = get_user_model()
+
+
+class HistoryConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'pw')
+        Wallet.objects.create(user=self.user)
+        ledger.credit(self.user.pk, Decimal('100.00'), 'deposit', reference='DEP-1')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def test_unchanged_history_answers_304(self):
+        first = self.client.get('/api/transactions/')
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(len(first.json()['results']), 1)
+
+        again = self.client.get('/api/transactions/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(again.status_code, 304)
+        self.assertIn('private', again['Cache-Control'])
+
+    def test_new_entry_answers_200(self):
+        etag = self.client.get('/api/transactions/')['ETag']
+        ledger.debit(self.user.pk, Decimal('40.00'), 'withdrawal', reference='WDR-1')
+
+        response = self.client.get('/api/transactions/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['reference'] for row in response.json()['results']], ['WDR-1', 'DEP-1'])
+
+    def test_filters_have_their_own_etag(self):
+        etag = self.client.get('/api/transactions/')['ETag']
+
+        response = self.client.get('/api/transactions/?type=withdrawal', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], [])
+
+    def test_other_users_history_has_its_own_etag(self):
+        etag = self.client.get('/api/transactions/')['ETag']
+        bob = User.objects.create_user('bob', 'bob@example.com', 'pw')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(bob)}')
+
+        response = self.client.get('/api/transactions/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], [])
+
+    def test_sparse_fields_have_their_own_etag(self):
+        etag = self.client.get('/api/transactions/')['ETag']
+
+        response = self.client.get('/api/transactions/?fields=id,amount', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.json()['results'][0]), ['id', 'amount'])
+
+    def test_unknown_field_is_400(self):
+        response = self.client.get('/api/transactions/?fields=id,nope')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('nope', str(response.json()['fields']))
+
+
+class HistoryPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'pw')
+        Wallet.objects.create(user=self.user)
+        for n in range(1, 6):
+            ledger.credit(self.user.pk, Decimal('10.00'), 'deposit', reference=f'DEP-{n}')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def references(self, response):
+        return [row['reference'] for row in response.json()['results']]
+
+    def test_pages_follow_the_cursor_newest_first(self):
+        pages = []
+        url = '/api/transactions/?page_size=2&type=deposit'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append(self.references(response))
+            url = response.json()['next']
+
+        self.assertEqual(pages, [['DEP-5', 'DEP-4'], ['DEP-3', 'DEP-2'], ['DEP-1']])
+
+    def test_next_keeps_the_filters(self):
+        response = self.client.get('/api/transactions/?page_size=1&type=deposit')
+
+        self.assertIn('type=deposit', response.json()['next'])
+        self.assertIn('page_size=1', response.json()['next'])
+
+    def test_page_size_is_clamped(self):
+        self.assertEqual(len(self.references(self.client.get('/api/transactions/?page_size=0'))), 1)
+        self.assertEqual(len(self.references(self.client.get('/api/transactions/?page_size=abc'))), 5)
+
+    def test_invalid_cursor_is_404(self):
+        response = self.client.get('/api/transactions/?cursor=not-a-cursor')
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_date_range_is_inclusive(self):
+        today = timezone.localdate()
+        TransactionHistory.objects.filter(reference='DEP-1').update(created_at=timezone.now() - timedelta(days=3))
+
+        response = self.client.get(f'/api/transactions/?date_from={today}&date_to={today}')
+        self.assertEqual(self.references(response), ['DEP-5', 'DEP-4', 'DEP-3', 'DEP-2'])
+
+        response = self.client.get('/api/transactions/?date_from=yesterday')
+        self.assertEqual(response.status_code, 400)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'pw')
+        Wallet.objects.create(user=self.user)
+        ledger.credit(self.user.pk, Decimal('100.00'), 'deposit', reference='DEP-1', description='first, "quoted"')
+        ledger.debit(self.user.pk, Decimal('40.00'), 'withdrawal', reference='WDR-1')
+        bob = User.objects.create_user('bob', 'bob@example.com', 'pw')
+        Wallet.objects.create(user=bob)
+        ledger.credit(bob.pk, Decimal('5.00'), 'deposit', reference='DEP-2')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def test_csv(self):
+        response = self.client.get('/api/transactions/export/')
+
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="transactions.csv"')
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0][:5], ['id', 'username', 'reference', 'transaction_type', 'amount'])
+        self.assertEqual([row[2] for row in rows[1:]], ['WDR-1', 'DEP-1'])
+        self.assertEqual(rows[2][6], 'first, "quoted"')
+
+    def test_ndjson_with_filters(self):
+        response = self.client.get('/api/transactions/export/?format=ndjson&type=deposit')
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        records = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([(record['reference'], record['amount']) for record in records], [('DEP-1', '100.00')])
+        self.assertTrue(records[0]['created_at'].endswith('Z'))
+
+    def test_bad_filter_is_a_json_400(self):
+        response = self.client.get('/api/transactions/export/?date_to=31-01-2025')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'date_to': 'Use the YYYY-MM-DD format.'})
+
+
+class ChangelistTests(TestCase):
+    url = '/admin/transactions/transactionhistory/'
+
+    def setUp(self):
+        cache.clear()
+        for username, reference in (('alice', 'DEP-1'), ('alina', 'WDR-7'), ('bob', 'DEP-2')):
+            user = User.objects.create_user(username, f'{username}@example.com', 'pw')
+            Wallet.objects.create(user=user)
+            ledger.credit(user.pk, Decimal('10.00'), 'deposit', reference=reference)
+        admin = User.objects.create_superuser('root', 'root@example.com', 'pw')
+        self.client.force_login(admin)
+
+    def references(self, response):
+        return sorted(entry.reference for entry in response.context['cl'].result_list)
+
+    def test_search_matches_username_or_reference_prefixes(self):
+        self.assertEqual(self.references(self.client.get(self.url, {'q': 'ali'})), ['DEP-1', 'WDR-7'])
+        self.assertEqual(self.references(self.client.get(self.url, {'q': 'DEP-'})), ['DEP-1', 'DEP-2'])
+        # Case-sensitive, and a prefix rather than a substring.
+        self.assertEqual(self.references(self.client.get(self.url, {'q': 'Ali'})), [])
+        self.assertEqual(self.references(self.client.get(self.url, {'q': 'lice'})), [])
+
+    def test_paginator_counts_small_lists_exactly(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.context['cl'].result_count, 3)
+
+    def test_paginator_caps_large_filtered_counts(self):
+        with mock.patch.object(EstimatedCountPaginator, 'exact_limit', 2):
+            response = self.client.get(self.url, {'transaction_type__exact': 'deposit'})
+
+        self.assertEqual(response.context['cl'].result_count, 2)
+
+    def test_date_drill_down(self):
+        TransactionHistory.objects.filter(reference='DEP-2').update(created_at=timezone.now() - timedelta(days=400))
+        this_year, last_year = timezone.localdate().year, (timezone.now() - timedelta(days=400)).year
+
+        response = self.client.get(self.url)
+        links = [choice['display'] for spec in response.context['cl'].filter_specs
+                 if isinstance(spec, DateDrillDownFilter) for choice in spec.choices(response.context['cl'])]
+        self.assertEqual(links, ['Any date', *map(str, range(this_year, last_year - 1, -1))])
 
-# Create your tests here.
+        since = timezone.make_aware(datetime(last_year, 1, 1))
+        response = self.client.get(self.url, {
+            'created_at__gte': str(since), 'created_at__lt': str(since.replace(year=last_year + 1)),
+        })
+        self.assertEqual(self.references(response), ['DEP-2'])
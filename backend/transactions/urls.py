@@ -1,6 +1,7 @@
 from django.urls import path
-from .views import TransactionHistoryListView
+from .views import TransactionHistoryListView, TransactionHistoryExportView
 
 urlpatterns = [
     path('', TransactionHistoryListView.as_view(), name='transaction-history'),
+    path('export/', TransactionHistoryExportView.as_view(), name='transaction-export'),
 ]
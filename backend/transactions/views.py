@@ -1,20 +1,26 @@
+from datetime import datetime, time, timedelta
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from rest_framework import generics, permissions, filters
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework.renderers import JSONRenderer
+from core.conditional import ConditionalGetMixin
+from core.db import ReplicaReadMixin, read_alias
+from core.serialization import FastListMixin
+from wallets import ledger
+from .export import STREAMS, CSVRenderer, NDJSONRenderer
 from .models import TransactionHistory
+from .pagination import TransactionCursorPagination
 from .serializers import TransactionHistorySerializer
 
 
-class TransactionHistoryListView(generics.ListAPIView):
+class TransactionHistoryFilterMixin:
     """
-    🔹 Returns all transactions for the logged-in user.
-    🔹 Supports filtering by:
-         - ?type=deposit
-         - ?status=successful
-         - ?search=reference (search by reference ID)
-    🔹 Admin users can view all users’ transactions.
+    Shared queryset for the history list and export.
+    Filters: ?type=, ?status=, ?date_from=YYYY-MM-DD, ?date_to=YYYY-MM-DD (inclusive).
     """
-    serializer_class = TransactionHistorySerializer
-    permission_classes = [IsAuthenticated]
     filter_backends = [filters.SearchFilter]
     search_fields = ['reference']
 
@@ -23,9 +29,9 @@ class TransactionHistoryListView(generics.ListAPIView):
 
         # Admins can view all users' transactions
         if user.is_staff or user.is_superuser:
-            queryset = TransactionHistory.objects.all().order_by('-created_at')
+            queryset = TransactionHistory.objects.all().order_by('-id')
         else:
-            queryset = TransactionHistory.objects.filter(user=user).order_by('-created_at')
+            queryset = TransactionHistory.objects.filter(user=user).order_by('-id')
 
         # Optional filter by transaction type (deposit, withdrawal, profit, etc.)
         transaction_type = self.request.query_params.get('type')
@@ -37,4 +43,78 @@ class TransactionHistoryListView(generics.ListAPIView):
         if status_filter:
             queryset = queryset.filter(status=status_filter)
 
+        # Optional date range, as created_at bounds so the indexes still apply
+        date_from = self.parse_date('date_from')
+        if date_from:
+            queryset = queryset.filter(created_at__gte=self.start_of_day(date_from))
+        date_to = self.parse_date('date_to')
+        if date_to:
+            queryset = queryset.filter(created_at__lt=self.start_of_day(date_to + timedelta(days=1)))
+
         return queryset
+
+    def parse_date(self, param):
+        value = self.request.query_params.get(param)
+        if not value:
+            return None
+        try:
+            return datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            raise ValidationError({param: "Use the YYYY-MM-DD format."})
+
+    @staticmethod
+    def start_of_day(day):
+        return timezone.make_aware(datetime.combine(day, time.min))
+
+
+class TransactionHistoryListView(ConditionalGetMixin, FastListMixin, ReplicaReadMixin, TransactionHistoryFilterMixin,
+                                 generics.ListAPIView):
+    """
+    🔹 Returns all transactions for the logged-in user.
+    🔹 Supports filtering by:
+         - ?type=deposit
+         - ?status=successful
+         - ?date_from=2025-01-01 / ?date_to=2025-01-31
+         - ?search=reference (search by reference ID)
+    🔹 Cursor-paginated, newest first (?cursor=..., ?page_size=...).
+    🔹 Admin users can view all users’ transactions.
+    🔹 Answers 304 Not Modified while the ledger is unchanged (ETag / Last-Modified).
+    """
+    serializer_class = TransactionHistorySerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = TransactionCursorPagination
+
+    def get_version(self):
+        user = self.request.user
+        using = read_alias(self.request)
+        if user.is_staff or user.is_superuser:
+            # Everyone's history: the newest ledger entry overall.
+            latest = TransactionHistory.objects.using(using).order_by('-id').values_list('id', 'created_at').first()
+            return latest or (None, None), latest and latest[1]
+        version = ledger.version(user.pk, using=using)
+        return version, version[0]
+
+
+class TransactionHistoryExportView(ReplicaReadMixin, TransactionHistoryFilterMixin, generics.GenericAPIView):
+    """
+    🔹 Streams the same history as the list view as a file download.
+    🔹 ?format=csv (default) or ?format=ndjson, plus the list view's filters.
+    """
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [CSVRenderer, NDJSONRenderer]
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.accepted_renderer.format
+        queryset = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(
+            STREAMS[export_format](queryset),
+            content_type=f'{request.accepted_renderer.media_type}; charset={request.accepted_renderer.charset}',
+        )
+        response['Content-Disposition'] = f'attachment; filename="transactions.{export_format}"'
+        return response
+
+    def handle_exception(self, exc):
+        # Errors go out as JSON, like the rest of the API.
+        self.request.accepted_renderer = JSONRenderer()
+        self.request.accepted_media_type = JSONRenderer.media_type
+        return super().handle_exception(exc)
@@ -1,7 +1,18 @@
 from django.contrib import admin
-from .models import Wallet
+from core.db import ReplicaChangeListMixin
+from .models import ReconciliationRun, Wallet
 
 @admin.register(Wallet)
-class WalletAdmin(admin.ModelAdmin):
+class WalletAdmin(ReplicaChangeListMixin, admin.ModelAdmin):
     list_display = ('user', 'balance', 'total_invested', 'total_withdrawn', 'created_at')
     search_fields = ('user__username',)
+
+
+@admin.register(ReconciliationRun)
+class ReconciliationRunAdmin(admin.ModelAdmin):
+    list_display = ('id', 'started_at', 'finished_at', 'cursor', 'wallets_checked', 'entries_checked',
+                    'balance_mismatches', 'chain_breaks', 'wallets_repaired', 'entries_repaired')
+    readonly_fields = [field.name for field in ReconciliationRun._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
@@ -5,4 +5,4 @@ class WalletsConfig(AppConfig):
     name = 'wallets'
 
     def ready(self):
-        import wallets.signals
+        import wallets.events
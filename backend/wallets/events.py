@@ -0,0 +1,13 @@
+from accounts import cache as user_cache
+from core import outbox
+from .models import Wallet
+
+
+@outbox.handler('user.registered')
+def provision_wallets(payloads):
+    """Create wallets for newly registered users (readers create one lazily until then)."""
+    Wallet.objects.bulk_create(
+        [Wallet(user_id=payload['user_id']) for payload in payloads],
+        ignore_conflicts=True,
+    )
+    user_cache.wallet_changed(*(payload['user_id'] for payload in payloads))
@@ -0,0 +1,232 @@
+"""
+Wallet ledger.
+
+Every balance change goes through this module. The wallet row is changed with
+a single conditional ``F()`` UPDATE (no Python read-modify-write), and the
+matching ``TransactionHistory`` row is written in the same transaction, so
+concurrent writers on one wallet can neither lose updates nor overdraw it.
+The same UPDATE keeps the wallet's summary columns (running totals and last
+transaction) current, so the dashboard never has to aggregate the ledger.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, CharField, DecimalField, F, OuterRef, Subquery, Value, When
+from django.utils import timezone
+
+from accounts import cache as user_cache
+from core import metrics
+from transactions.models import TransactionHistory
+from .models import Wallet
+
+
+class InsufficientFunds(Exception):
+    """Raised when a debit would take a wallet below zero."""
+
+
+# Running totals kept on the wallet row for some transaction types.
+TOTAL_FIELDS = {
+    'deposit': 'total_deposited',
+    'withdrawal': 'total_withdrawn',
+    'investment': 'total_invested',
+    'profit': 'total_profit',
+}
+
+
+def credit(user, amount, transaction_type, reference='', description=''):
+    """Add ``amount`` to the user's wallet and return the ledger entry."""
+    return _apply(user, Decimal(amount), transaction_type, reference, description)
+
+
+def debit(user, amount, transaction_type, reference='', description=''):
+    """
+    Take ``amount`` from the user's wallet and return the ledger entry.
+    Raises ``InsufficientFunds`` if the balance does not cover it.
+    """
+    return _apply(user, -Decimal(amount), transaction_type, reference, description)
+
+
+def bulk_credit(entries):
+    """
+    Credit many wallets at once and return the created ledger entries.
+
+    ``entries`` is an iterable of ``(user_id, amount, transaction_type,
+    reference, description)`` tuples; a user may appear more than once.
+    The affected wallets are locked once, all increments are applied with a
+    single grouped UPDATE and the ledger rows are written with one
+    ``bulk_create``, all inside one transaction.
+    """
+    return _bulk_apply(entries, 1)
+
+
+def bulk_debit(entries):
+    """
+    Debit many wallets at once, like ``bulk_credit``. Entries are applied in
+    order; one the wallet can no longer cover is skipped and has ``None`` in
+    its place in the returned list.
+    """
+    return _bulk_apply(entries, -1)
+
+
+def version(user_id, using='default'):
+    """
+    ``(updated_at, last_entry_id)`` for the user's wallet, both ``None`` if it
+    has none. Every ledger write moves both, so together they change whenever
+    the user's balance, totals, history or the investments paid through the
+    ledger do. One indexed row read, for conditional GETs (``core.conditional``).
+    """
+    last_entry = TransactionHistory.objects.filter(user_id=OuterRef('user_id')).order_by('-id').values('id')[:1]
+    row = (
+        Wallet.objects.using(using)
+        .filter(user_id=user_id)
+        .values_list('updated_at', Subquery(last_entry))
+        .first()
+    )
+    return row or (None, None)
+
+
+def _bulk_apply(entries, sign):
+    entries = [(user_id, Decimal(amount), *rest) for user_id, amount, *rest in entries]
+    if not entries:
+        return []
+
+    user_ids = {entry[0] for entry in entries}
+    with transaction.atomic():
+        balances = dict(
+            Wallet.objects.select_for_update()
+            .filter(user_id__in=user_ids)
+            .values_list('user_id', 'balance')
+        )
+        missing = user_ids - balances.keys()
+        if missing:
+            Wallet.objects.bulk_create([Wallet(user_id=user_id) for user_id in missing], ignore_conflicts=True)
+            balances.update(
+                Wallet.objects.select_for_update()
+                .filter(user_id__in=missing)
+                .values_list('user_id', 'balance')
+            )
+
+        increments = {}
+        rows = []
+        results = []
+        now = timezone.now()
+        for user_id, amount, transaction_type, reference, description in entries:
+            if amount <= 0:
+                raise ValueError("Bulk ledger amounts must be positive.")
+            balance_before = balances[user_id]
+            if balance_before + sign * amount < 0:
+                metrics.LEDGER_REJECTED.labels(transaction_type).inc()
+                results.append(None)
+                continue
+            balances[user_id] = balance_before + sign * amount
+            for field, change in (('balance', sign * amount), (TOTAL_FIELDS.get(transaction_type), amount)):
+                if field:
+                    per_user = increments.setdefault(field, {})
+                    per_user[user_id] = per_user.get(user_id, 0) + change
+            row = TransactionHistory(
+                user_id=user_id,
+                transaction_type=transaction_type,
+                amount=amount,
+                description=description,
+                status='successful',
+                balance_before=balance_before,
+                balance_after=balances[user_id],
+                created_at=now,
+            )
+            row.reference = reference or TransactionHistory.reference_for(row.id)
+            rows.append(row)
+            results.append(row)
+        if not rows:
+            return results
+
+        # Ids are time-ordered, so the last row per user is the newest one.
+        last_transactions = {row.user_id: row for row in rows}
+
+        money = DecimalField(max_digits=20, decimal_places=2)
+        changes = {
+            field: F(field) + _per_user(values, money, default=0)
+            for field, values in increments.items()
+        }
+        changes.update(_summary_changes(
+            _per_user({user_id: row.transaction_type for user_id, row in last_transactions.items()}, CharField()),
+            _per_user({user_id: row.amount for user_id, row in last_transactions.items()}, money),
+            now,
+        ))
+        Wallet.objects.filter(user_id__in=last_transactions).update(**changes)
+        TransactionHistory.objects.bulk_create(rows)
+        _record(sign, [(row.transaction_type, row.amount) for row in rows])
+        user_cache.wallet_changed(*user_ids)
+        return results
+
+
+def _apply(user, delta, transaction_type, reference, description):
+    if not delta:
+        raise ValueError("Ledger amounts must be non-zero.")
+
+    user_id = getattr(user, 'pk', user)
+    now = timezone.now()
+    changes = {
+        'balance': F('balance') + delta,
+        **_summary_changes(transaction_type, abs(delta), now),
+    }
+    total_field = TOTAL_FIELDS.get(transaction_type)
+    if total_field:
+        changes[total_field] = F(total_field) + abs(delta)
+
+    wallets = Wallet.objects.filter(user_id=user_id)
+    if delta < 0:
+        # The balance check is part of the UPDATE itself, so two concurrent
+        # debits can never both pass it.
+        wallets = wallets.filter(balance__gte=-delta)
+
+    with transaction.atomic():
+        updated = wallets.update(**changes)
+        if not updated:
+            _, created = Wallet.objects.get_or_create(user_id=user_id)
+            if created:
+                updated = wallets.update(**changes)
+        if not updated:
+            metrics.LEDGER_REJECTED.labels(transaction_type).inc()
+            raise InsufficientFunds(f"Wallet balance is too low for a debit of ₦{-delta}.")
+
+        # The row stays locked by our UPDATE until commit, so this read sees
+        # exactly the balance we produced.
+        balance_after = Wallet.objects.filter(user_id=user_id).values_list('balance', flat=True).get()
+        _record(delta, [(transaction_type, abs(delta))])
+        user_cache.wallet_changed(user_id)
+        return TransactionHistory.objects.create(
+            user_id=user_id,
+            transaction_type=transaction_type,
+            amount=abs(delta),
+            description=description,
+            status='successful',
+            balance_before=balance_after - delta,
+            balance_after=balance_after,
+            reference=reference,
+            created_at=now,
+        )
+
+
+def _record(sign, entries):
+    """Count the entries in the ledger metrics once the transaction commits."""
+    direction = 'credit' if sign > 0 else 'debit'
+    transaction.on_commit(lambda: metrics.record_ledger(direction, entries))
+
+
+def _summary_changes(transaction_type, amount, now):
+    return {
+        'last_transaction_type': transaction_type,
+        'last_transaction_amount': amount,
+        'last_transaction_status': 'successful',
+        'last_transaction_at': now,
+        'updated_at': now,
+    }
+
+
+def _per_user(values, output_field, default=None):
+    """A CASE expression picking each wallet's value from ``{user_id: value}``."""
+    return Case(
+        *[When(user_id=user_id, then=Value(value)) for user_id, value in values.items()],
+        default=None if default is None else Value(default),
+        output_field=output_field,
+    )
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from transactions.models import TransactionHistory
+from wallets import summaries
+from wallets.models import Wallet
+
+
+class Command(BaseCommand):
+    help = "Recompute wallet summary columns from the transaction ledger and repair any drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help="Wallets rebuilt per transaction.")
+        parser.add_argument('--dry-run', action='store_true', help="Report drift without writing.")
+
+    def handle(self, *args, **options):
+        checked, drifted = summaries.rebuild(
+            Wallet, TransactionHistory, chunk_size=options['chunk_size'], dry_run=options['dry_run'],
+        )
+        verb = "Found" if options['dry_run'] else "Repaired"
+        self.stdout.write(self.style.SUCCESS(f"Checked {checked} wallet(s). {verb} {drifted} with drift."))
@@ -0,0 +1,98 @@
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from wallets import reconcile
+from wallets.models import ReconciliationRun
+
+
+class Command(BaseCommand):
+    help = "Check every wallet's balance against its transaction ledger, optionally repairing mismatches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help="Worker processes; 1 checks in this process.")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Wallets per unit of work.")
+        parser.add_argument('--repair', action='store_true',
+                            help="Rewrite broken balance_before/balance_after values on ledger rows "
+                                 "(except where the rows' order is ambiguous).")
+        parser.add_argument('--repair-balances', action='store_true',
+                            help="Set wallets that disagree with their ledger to the ledger balance.")
+        parser.add_argument('--resume', action='store_true',
+                            help="Continue the latest unfinished run, with its repair options.")
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1 or options['batch_size'] < 1:
+            raise CommandError("--workers and --batch-size must be at least 1.")
+        if options['resume']:
+            run = ReconciliationRun.objects.filter(finished_at__isnull=True).first()
+            if run is None:
+                raise CommandError("There is no unfinished reconciliation run to resume.")
+            self.stdout.write(f"Resuming run {run.pk} after user {run.cursor}.")
+        else:
+            run = ReconciliationRun.objects.create(
+                repair=options['repair'], repair_balances=options['repair_balances'],
+            )
+
+        started = time.perf_counter()
+        ranges = reconcile.user_ranges(run.cursor, options['batch_size'])
+        args = (run.repair, run.repair_balances)
+        if options['workers'] == 1:
+            for first, last in ranges:
+                self.record(run, reconcile.check_range(first, last, *args))
+        else:
+            # Spawned, not forked: each worker sets Django up and opens its
+            # own connection instead of inheriting ours.
+            with ProcessPoolExecutor(
+                options['workers'],
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=django.setup,
+            ) as pool:
+                pending = deque()
+                for first, last in ranges:
+                    pending.append(pool.submit(reconcile.check_range, first, last, *args))
+                    # Keep every worker busy, and take results in order so the
+                    # cursor only ever passes wallets that have been checked.
+                    if len(pending) >= options['workers'] * 2:
+                        self.record(run, pending.popleft().result())
+                while pending:
+                    self.record(run, pending.popleft().result())
+
+        run.finished_at = timezone.now()
+        run.save(update_fields=['finished_at', 'updated_at'])
+        elapsed = time.perf_counter() - started
+        rate = run.entries_checked / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {run.wallets_checked} wallet(s) and {run.entries_checked} ledger entries "
+            f"in {elapsed:.1f}s ({rate:.0f}/s). {run.balance_mismatches} balance mismatch(es), "
+            f"{run.chain_breaks} broken entries ({run.entries_ambiguous} ambiguous); repaired {run.wallets_repaired} wallet(s) "
+            f"and {run.entries_repaired} entries."
+        ))
+
+    def record(self, run, result):
+        for mismatch in result.mismatches:
+            note = " (repaired)" if mismatch.repaired else ""
+            self.stdout.write(self.style.WARNING(
+                f"User {mismatch.user_id}: wallet ₦{mismatch.wallet_balance}, "
+                f"ledger ₦{mismatch.ledger_balance}{note}"
+            ))
+        for user_id, count in result.ambiguous:
+            self.stdout.write(self.style.WARNING(
+                f"User {user_id}: {count} broken entries written too close together to order; "
+                f"not repaired, review manually."
+            ))
+        run.cursor = result.last_user_id
+        run.wallets_checked += result.wallets
+        run.entries_checked += result.entries
+        run.chain_breaks += result.chain_breaks
+        run.entries_ambiguous += result.entries_ambiguous
+        run.balance_mismatches += len(result.mismatches)
+        run.entries_repaired += result.entries_repaired
+        run.wallets_repaired += result.wallets_repaired
+        run.save()
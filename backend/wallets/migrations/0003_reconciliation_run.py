@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallets', '0002_wallet_summary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReconciliationRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('repair', models.BooleanField(default=False)),
+                ('repair_balances', models.BooleanField(default=False)),
+                ('cursor', models.BigIntegerField(default=0)),
+                ('wallets_checked', models.PositiveBigIntegerField(default=0)),
+                ('entries_checked', models.PositiveBigIntegerField(default=0)),
+                ('chain_breaks', models.PositiveBigIntegerField(default=0)),
+                ('balance_mismatches', models.PositiveBigIntegerField(default=0)),
+                ('entries_repaired', models.PositiveBigIntegerField(default=0)),
+                ('wallets_repaired', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+    ]
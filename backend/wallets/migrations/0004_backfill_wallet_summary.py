@@ -0,0 +1,23 @@
+from django.db import migrations
+
+from wallets import summaries
+
+
+def backfill_summaries(apps, schema_editor):
+    """
+    Fill in the summary columns 0002 added (at their zero defaults) for
+    wallets that already had a ledger, as ``rebuild_wallet_summaries`` does.
+    """
+    summaries.rebuild(apps.get_model('wallets', 'Wallet'), apps.get_model('transactions', 'TransactionHistory'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallets', '0003_reconciliation_run'),
+        ('transactions', '0007_time_ordered_ids'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
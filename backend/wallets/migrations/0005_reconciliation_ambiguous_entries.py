@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallets', '0004_backfill_wallet_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reconciliationrun',
+            name='entries_ambiguous',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
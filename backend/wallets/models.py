@@ -1,6 +1,8 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 
+from accounts import cache as user_cache
+
 User = get_user_model()
 
 class Wallet(models.Model):
@@ -8,8 +10,66 @@ class Wallet(models.Model):
     balance = models.DecimalField(max_digits=20, decimal_places=2, default=0)
     total_invested = models.DecimalField(max_digits=20, decimal_places=2, default=0)
     total_withdrawn = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    # Dashboard summary, kept current by wallets.ledger on every balance change.
+    total_deposited = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    total_profit = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    last_transaction_type = models.CharField(max_length=20, blank=True)
+    last_transaction_amount = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    last_transaction_status = models.CharField(max_length=20, blank=True)
+    last_transaction_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.user.username}'s Wallet"
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Cached users carry their wallet (accounts.cache).
+        user_cache.wallet_changed(self.user_id)
+
+    def credit(self, amount, transaction_type='manual_credit', reference='', description=''):
+        """Credit the wallet through the ledger and return the ledger entry."""
+        from .ledger import credit
+        entry = credit(self.user_id, amount, transaction_type, reference, description)
+        self.balance = entry.balance_after
+        return entry
+
+    def debit(self, amount, transaction_type='manual_debit', reference='', description=''):
+        """Debit the wallet through the ledger. Returns None if the balance is too low."""
+        from .ledger import debit, InsufficientFunds
+        try:
+            entry = debit(self.user_id, amount, transaction_type, reference, description)
+        except InsufficientFunds:
+            return None
+        self.balance = entry.balance_after
+        return entry
+
+
+class ReconciliationRun(models.Model):
+    """
+    Progress and findings of one ``reconcile_ledger`` run. ``cursor`` is the
+    highest user id whose wallet has been fully checked, so an interrupted run
+    can be resumed from there.
+    """
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    repair = models.BooleanField(default=False)
+    repair_balances = models.BooleanField(default=False)
+    cursor = models.BigIntegerField(default=0)
+    wallets_checked = models.PositiveBigIntegerField(default=0)
+    entries_checked = models.PositiveBigIntegerField(default=0)
+    chain_breaks = models.PositiveBigIntegerField(default=0)
+    # Breaks among rows written too close together to order; never repaired.
+    entries_ambiguous = models.PositiveBigIntegerField(default=0)
+    balance_mismatches = models.PositiveBigIntegerField(default=0)
+    entries_repaired = models.PositiveBigIntegerField(default=0)
+    wallets_repaired = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-started_at']
+
+    def __str__(self):
+        state = "finished" if self.finished_at else f"at user {self.cursor}"
+        return f"Reconciliation {self.pk} ({state})"
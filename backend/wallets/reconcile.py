@@ -0,0 +1,224 @@
+"""
+Ledger reconciliation.
+
+A wallet is consistent when its successful ``TransactionHistory`` rows, taken
+in the order they were written from a zero balance, form an unbroken chain —
+each row's ``balance_before`` is the previous row's ``balance_after`` and the
+two differ by the row's amount — ending at ``Wallet.balance``.
+
+The order they were written is only known approximately. Rows are sorted by
+``(created_at, id)``, but ``created_at`` is taken before the writer waits for
+the wallet lock and ids only order one process's writes (``core.ids``), so two
+writes within ``ORDER_TOLERANCE`` of each other may be in either order. Inside
+such a cluster the chain itself decides the order: the next row is the one
+that continues it. A break that remains inside a cluster is counted as
+ambiguous and never repaired automatically, since "fixing" it could rewrite
+correct rows.
+
+Users are checked in ranges of consecutive user ids (``check_range``), one
+range per worker process. Each range is read with two streaming queries: the
+wallets, then the ledger ordered by ``(user_id, id)``, which the
+``txn_user_id_idx`` index serves without a sort (each user's rows are then
+sorted in memory). Nothing is locked during that pass. A wallet that looks
+wrong is checked again with its row locked (writers may simply have moved on
+between the two reads) and only then reported or repaired.
+"""
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import timedelta
+from decimal import Decimal
+from itertools import groupby
+
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from accounts import cache as user_cache
+from transactions.models import TransactionHistory
+from .models import Wallet
+
+# Types that take money out of a wallet. Rows written by wallets.ledger carry
+# their direction in balance_before/balance_after; this is only needed for
+# rows whose chain fields were never filled in.
+DEBIT_TYPES = {'withdrawal', 'investment', 'manual_debit', 'transfer'}
+
+LEDGER_FIELDS = ('user_id', 'id', 'created_at', 'transaction_type', 'amount', 'balance_before', 'balance_after')
+
+# Ledger rows written this close together may be in either order (see above).
+ORDER_TOLERANCE = timedelta(seconds=1)
+
+
+@dataclass
+class Mismatch:
+    user_id: int
+    wallet_balance: Decimal
+    ledger_balance: Decimal
+    repaired: bool
+
+
+@dataclass
+class RangeResult:
+    first_user_id: int
+    last_user_id: int
+    wallets: int = 0
+    entries: int = 0
+    chain_breaks: int = 0
+    entries_ambiguous: int = 0
+    entries_repaired: int = 0
+    wallets_repaired: int = 0
+    mismatches: list = field(default_factory=list)
+    # (user_id, ambiguous break count) for wallets left for manual review.
+    ambiguous: list = field(default_factory=list)
+
+
+def user_ranges(after=0, size=1000):
+    """Yield ``(first, last)`` user-id ranges of up to ``size`` wallets, starting after ``after``."""
+    while True:
+        user_ids = list(
+            Wallet.objects.filter(user_id__gt=after)
+            .order_by('user_id')
+            .values_list('user_id', flat=True)[:size]
+        )
+        if not user_ids:
+            return
+        yield user_ids[0], user_ids[-1]
+        after = user_ids[-1]
+
+
+def check_range(first_user_id, last_user_id, repair=False, repair_balances=False):
+    """
+    Verify every wallet with a user id in ``[first_user_id, last_user_id]``.
+
+    With ``repair`` broken ``balance_before``/``balance_after`` values are
+    rewritten from the chain (except ambiguous ones, see module docs); with ``repair_balances`` a wallet whose balance
+    disagrees with its ledger is set to the ledger's figure.
+    """
+    close_old_connections()
+    result = RangeResult(first_user_id, last_user_id)
+    balances = dict(
+        Wallet.objects.filter(user__gte=first_user_id, user__lte=last_user_id)
+        .values_list('user_id', 'balance')
+    )
+    rows = (
+        _ledger(TransactionHistory.objects.filter(user__gte=first_user_id, user__lte=last_user_id))
+        .order_by('user_id', 'id')
+        .values_list(*LEDGER_FIELDS)
+        .iterator(chunk_size=5000)
+    )
+    seen = set()
+    for user_id, entries in groupby(rows, key=lambda row: row[0]):
+        seen.add(user_id)
+        _check_user(result, user_id, balances.get(user_id), entries, repair, repair_balances)
+    for user_id in balances.keys() - seen:
+        _check_user(result, user_id, balances[user_id], (), repair, repair_balances)
+    close_old_connections()
+    return result
+
+
+def _ledger(queryset):
+    # Pending and failed rows never moved a balance.
+    return queryset.filter(status='successful')
+
+
+def _check_user(result, user_id, wallet_balance, entries, repair, repair_balances):
+    entries = sorted(entries, key=_written)
+    ledger_balance, breaks, ambiguous = chain(entries)
+    if wallet_balance is not None:
+        result.wallets += 1
+    result.entries += len(entries)
+    if not breaks and not ambiguous and ledger_balance == wallet_balance:
+        return
+
+    # Confirm with the wallet locked, so no ledger write can land mid-check.
+    with transaction.atomic():
+        wallet_balance = (
+            Wallet.objects.select_for_update()
+            .filter(user_id=user_id)
+            .values_list('balance', flat=True)
+            .first()
+        )
+        entries = list(
+            _ledger(TransactionHistory.objects.filter(user_id=user_id))
+            .order_by('created_at', 'id')
+            .values_list(*LEDGER_FIELDS)
+        )
+        ledger_balance, breaks, ambiguous = chain(entries)
+        result.chain_breaks += len(breaks) + len(ambiguous)
+        if ambiguous:
+            result.entries_ambiguous += len(ambiguous)
+            result.ambiguous.append((user_id, len(ambiguous)))
+        if breaks and repair:
+            TransactionHistory.objects.bulk_update(
+                [TransactionHistory(id=pk, balance_before=before, balance_after=after) for pk, before, after in breaks],
+                ['balance_before', 'balance_after'],
+                batch_size=1000,
+            )
+            result.entries_repaired += len(breaks)
+            _touch(user_id)
+
+        if wallet_balance is None or ledger_balance == wallet_balance:
+            return
+        repaired = False
+        if repair_balances:
+            Wallet.objects.filter(user_id=user_id).update(balance=ledger_balance)
+            _touch(user_id)
+            result.wallets_repaired += 1
+            repaired = True
+        result.mismatches.append(Mismatch(user_id, wallet_balance, ledger_balance, repaired))
+
+
+def _touch(user_id):
+    """Mark a repaired wallet as changed for conditional GETs and the user cache."""
+    Wallet.objects.filter(user_id=user_id).update(updated_at=timezone.now())
+    user_cache.wallet_changed(user_id)
+
+
+def chain(entries):
+    """
+    Walk one user's ledger rows (``LEDGER_FIELDS`` tuples in ``(created_at,
+    id)`` order). Return the resulting balance, ``(id, balance_before,
+    balance_after)`` for every row whose stored values break the chain, and
+    the same for breaks whose order is ambiguous (not to be repaired).
+    """
+    balance = Decimal(0)
+    breaks, ambiguous = [], []
+    for cluster in _clusters(entries):
+        remaining = deque(cluster)
+        while remaining:
+            # The row that continues the chain, else the earliest one left.
+            if not _continues(remaining[0], balance):
+                remaining.rotate(-next((i for i, row in enumerate(remaining) if _continues(row, balance)), 0))
+            row = remaining.popleft()
+            delta = _delta(row)
+            if not _continues(row, balance):
+                (ambiguous if len(cluster) > 1 else breaks).append((row[1], balance, balance + delta))
+            balance += delta
+    return balance, breaks, ambiguous
+
+
+def _written(row):
+    return row[2], row[1]
+
+
+def _clusters(entries):
+    """Split rows into runs whose neighbours are less than ``ORDER_TOLERANCE`` apart."""
+    cluster = []
+    for row in entries:
+        if cluster and row[2] - cluster[-1][2] >= ORDER_TOLERANCE:
+            yield cluster
+            cluster = []
+        cluster.append(row)
+    if cluster:
+        yield cluster
+
+
+def _delta(row):
+    _, _, _, transaction_type, amount, balance_before, balance_after = row
+    if balance_after - balance_before == amount:
+        return amount
+    if balance_before - balance_after == amount:
+        return -amount
+    return -amount if transaction_type in DEBIT_TYPES else amount
+
+
+def _continues(row, balance):
+    return row[5] == balance and row[6] == balance + _delta(row)
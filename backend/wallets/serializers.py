@@ -1,7 +1,10 @@
 from rest_framework import serializers
+from accounts.serializers import UserSummarySerializer
+from core.serialization import SparseFieldsMixin
 from .models import Wallet
 
-class WalletSerializer(serializers.ModelSerializer):
+class WalletSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Wallet
         fields = ['balance', 'total_invested', 'total_withdrawn', 'created_at', 'updated_at']
+        expandable_fields = {'user': (UserSummarySerializer, {'read_only': True})}
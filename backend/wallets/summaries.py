@@ -0,0 +1,84 @@
+"""
+Rebuild of the wallet summary columns from the transaction ledger.
+
+``wallets.ledger`` keeps ``Wallet``'s running totals and last-transaction
+columns current on every write; ``rebuild`` recomputes them from
+``TransactionHistory`` for wallets that predate those columns or drifted. It
+takes the two model classes so that migrations can run it with their
+historical models (``rebuild_wallet_summaries`` passes the real ones).
+"""
+from django.db import transaction
+from django.db.models import OuterRef, Q, Subquery, Sum
+
+from .ledger import TOTAL_FIELDS
+
+SUMMARY_FIELDS = [
+    *TOTAL_FIELDS.values(),
+    'last_transaction_type', 'last_transaction_amount', 'last_transaction_status', 'last_transaction_at',
+]
+
+
+def rebuild(Wallet, TransactionHistory, chunk_size=1000, dry_run=False):
+    """Recompute every wallet's summary; return ``(checked, drifted)`` wallet counts."""
+    checked = drifted = 0
+    last_pk = 0
+
+    while True:
+        with transaction.atomic():
+            latest = (
+                TransactionHistory.objects.filter(user_id=OuterRef('user_id'))
+                .order_by('-created_at', '-id')
+                .values('id')[:1]
+            )
+            wallets = list(
+                Wallet.objects.select_for_update()
+                .filter(pk__gt=last_pk)
+                .annotate(last_transaction_id=Subquery(latest))
+                .order_by('pk')[:chunk_size]
+            )
+            if not wallets:
+                break
+            last_pk = wallets[-1].pk
+            checked += len(wallets)
+
+            user_ids = [wallet.user_id for wallet in wallets]
+            totals = {
+                row.pop('user_id'): row
+                for row in TransactionHistory.objects.filter(user_id__in=user_ids, status='successful')
+                .order_by()
+                .values('user_id')
+                .annotate(**{
+                    field: Sum('amount', filter=Q(transaction_type=transaction_type))
+                    for transaction_type, field in TOTAL_FIELDS.items()
+                })
+            }
+            last_transactions = TransactionHistory.objects.in_bulk(
+                [wallet.last_transaction_id for wallet in wallets if wallet.last_transaction_id]
+            )
+
+            changed = [
+                wallet for wallet in wallets
+                if _rebuild_wallet(wallet, totals.get(wallet.user_id, {}), last_transactions.get(wallet.last_transaction_id))
+            ]
+            drifted += len(changed)
+            if changed and not dry_run:
+                Wallet.objects.bulk_update(changed, SUMMARY_FIELDS)
+
+    return checked, drifted
+
+
+def _rebuild_wallet(wallet, totals, last_transaction):
+    """Set the wallet's summary from ledger figures; return True if anything changed."""
+    expected = {field: totals.get(field) or 0 for field in TOTAL_FIELDS.values()}
+    expected.update(
+        last_transaction_type=last_transaction.transaction_type if last_transaction else '',
+        last_transaction_amount=last_transaction.amount if last_transaction else None,
+        last_transaction_status=last_transaction.status if last_transaction else '',
+        last_transaction_at=last_transaction.created_at if last_transaction else None,
+    )
+    changed = False
+    for field, value in expected.items():
+        if getattr(wallet, field) != value:
+            setattr(wallet, field, value)
+            changed = True
+    return changed
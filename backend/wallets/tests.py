@@ -1,3 +1,269 @@
+from datetime import timedelta
+from decimal import Decimal
+from importlib import import_module
+from io import StringIO
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.models import OutboxEvent
+from investments import dashboard
+from transactions.models import TransactionHistory
+from . import ledger
+from .models import ReconciliationRun, Wallet
+
+User = get_user_model()
+
+
+class LedgerTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'pw')
+        self.wallet = Wallet.objects.create(user=self.user)
+
+    def balance(self):
+        return Wallet.objects.get(pk=self.wallet.pk).balance
+
+    def test_credit_and_debit_write_history(self):
+        ledger.credit(self.user.pk, Decimal('100.00'), 'deposit', reference='DEP-1')
+        entry = ledger.debit(self.user.pk, Decimal('30.00'), 'withdrawal', reference='WDR-1')
+
+        self.assertEqual(self.balance(), Decimal('70.00'))
+        self.assertEqual((entry.balance_before, entry.balance_after), (Decimal('100.00'), Decimal('70.00')))
+        wallet = Wallet.objects.get(pk=self.wallet.pk)
+        self.assertEqual(wallet.total_deposited, Decimal('100.00'))
+        self.assertEqual(wallet.total_withdrawn, Decimal('30.00'))
+        self.assertEqual(TransactionHistory.objects.filter(user=self.user).count(), 2)
+
+    def test_debit_beyond_balance_changes_nothing(self):
+        ledger.credit(self.user.pk, Decimal('10.00'), 'deposit', reference='DEP-1')
+
+        with self.assertRaises(ledger.InsufficientFunds):
+            ledger.debit(self.user.pk, Decimal('10.01'), 'withdrawal', reference='WDR-1')
+
+        self.assertEqual(self.balance(), Decimal('10.00'))
+        self.assertFalse(TransactionHistory.objects.filter(reference='WDR-1').exists())
+
+    def test_wallet_debit_returns_none_when_balance_is_too_low(self):
+        self.assertIsNone(self.wallet.debit(Decimal('1.00')))
+        self.assertEqual(self.balance(), Decimal('0.00'))
+
+    def test_bulk_debit_skips_entries_the_wallet_cannot_cover(self):
+        ledger.credit(self.user.pk, Decimal('50.00'), 'deposit', reference='DEP-1')
+
+        entries = ledger.bulk_debit([
+            (self.user.pk, Decimal('30.00'), 'withdrawal', 'WDR-1', ''),
+            (self.user.pk, Decimal('30.00'), 'withdrawal', 'WDR-2', ''),
+            (self.user.pk, Decimal('20.00'), 'withdrawal', 'WDR-3', ''),
+        ])
+
+        self.assertEqual([entry and entry.reference for entry in entries], ['WDR-1', None, 'WDR-3'])
+        self.assertEqual(self.balance(), Decimal('0.00'))
+        self.assertFalse(TransactionHistory.objects.filter(reference='WDR-2').exists())
+
+
+class SummaryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'pw')
+        Wallet.objects.create(user=self.user)
+        ledger.credit(self.user.pk, Decimal('200.00'), 'deposit', reference='DEP-1')
+        ledger.credit(self.user.pk, Decimal('7.50'), 'profit', reference='ACR-1')
+        ledger.debit(self.user.pk, Decimal('50.00'), 'investment', reference='INV-1')
+        ledger.debit(self.user.pk, Decimal('20.00'), 'withdrawal', reference='WDR-1')
+
+    def assertSummary(self, wallet):
+        self.assertEqual(
+            (wallet.total_deposited, wallet.total_profit, wallet.total_invested, wallet.total_withdrawn),
+            (Decimal('200.00'), Decimal('7.50'), Decimal('50.00'), Decimal('20.00')),
+        )
+        self.assertEqual((wallet.last_transaction_type, wallet.last_transaction_amount), ('withdrawal', Decimal('20.00')))
+
+    def clear_summary(self):
+        Wallet.objects.filter(user=self.user).update(
+            total_deposited=0, total_profit=0, total_invested=0, total_withdrawn=0,
+            last_transaction_type='', last_transaction_amount=None, last_transaction_status='', last_transaction_at=None,
+        )
+
+    def test_ledger_keeps_summary_current(self):
+        self.assertSummary(Wallet.objects.get(user=self.user))
+
+    def test_overview_reads_the_summary(self):
+        overview = dashboard.overview(self.user)
+
+        self.assertEqual(overview['balance'], Decimal('137.50'))
+        self.assertEqual(overview['total_deposits'], Decimal('200.00'))
+        self.assertEqual(overview['total_withdrawals'], Decimal('20.00'))
+        self.assertEqual(overview['total_profits'], Decimal('7.50'))
+        self.assertEqual(overview['last_transaction']['transaction_type'], 'withdrawal')
+
+    def test_dashboard_reads_the_wallet_once(self):
+        with self.assertNumQueries(1):
+            overview, wallet = dashboard.overview_and_wallet(self.user)
+
+        self.assertEqual(overview, dashboard.overview(self.user))
+        self.assertEqual(wallet, dashboard.wallet(self.user))
+
+    def test_rebuild_command_repairs_drift(self):
+        self.clear_summary()
+        out = StringIO()
+
+        call_command('rebuild_wallet_summaries', '--dry-run', stdout=out)
+        self.assertIn('Found 1 with drift', out.getvalue())
+        self.assertEqual(Wallet.objects.get(user=self.user).total_deposited, Decimal('0.00'))
+
+        call_command('rebuild_wallet_summaries', stdout=out)
+        self.assertSummary(Wallet.objects.get(user=self.user))
+
+    def test_migration_backfills_existing_wallets(self):
+        self.clear_summary()
+        migration = import_module('wallets.migrations.0004_backfill_wallet_summary')
+
+        migration.backfill_summaries(apps, None)
+
+        self.assertSummary(Wallet.objects.get(user=self.user))
+
+
+class ReconcileTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'pw')
+        Wallet.objects.create(user=self.user)
+        self.first = ledger.credit(self.user.pk, Decimal('100.00'), 'deposit', reference='DEP-1')
+        self.second = ledger.credit(self.user.pk, Decimal('50.00'), 'deposit', reference='DEP-2')
+        self.now = timezone.now()
+
+    def written(self, entry, seconds_ago):
+        TransactionHistory.objects.filter(pk=entry.pk).update(created_at=self.now - timedelta(seconds=seconds_ago))
+
+    def stored(self, entry):
+        entry = TransactionHistory.objects.get(pk=entry.pk)
+        return entry.balance_before, entry.balance_after
+
+    def reconcile(self, *args):
+        out = StringIO()
+        call_command('reconcile_ledger', '--workers', '1', *args, stdout=out)
+        return ReconciliationRun.objects.first(), out.getvalue()
+
+    def test_consistent_ledger_passes(self):
+        run, out = self.reconcile()
+
+        self.assertEqual((run.wallets_checked, run.entries_checked, run.chain_breaks), (1, 2, 0))
+        self.assertIn('0 balance mismatch(es), 0 broken entries', out)
+
+    def test_break_is_repaired(self):
+        self.written(self.first, 60)
+        self.written(self.second, 30)
+        TransactionHistory.objects.filter(pk=self.second.pk).update(balance_before=0, balance_after=50)
+
+        run, _ = self.reconcile('--repair')
+
+        self.assertEqual((run.chain_breaks, run.entries_ambiguous, run.entries_repaired), (1, 0, 1))
+        self.assertEqual(self.stored(self.second), (Decimal('100.00'), Decimal('150.00')))
+        self.assertEqual(self.reconcile()[0].chain_breaks, 0)
+
+    def test_order_within_tolerance_follows_the_chain(self):
+        # Another process took the later id but wrote first.
+        TransactionHistory.objects.filter(pk=self.second.pk).update(balance_before=0, balance_after=50)
+        TransactionHistory.objects.filter(pk=self.first.pk).update(balance_before=50, balance_after=150)
+        self.written(self.first, 0)
+        self.written(self.second, 0)
+
+        run, _ = self.reconcile('--repair')
+
+        self.assertEqual((run.chain_breaks, run.entries_repaired), (0, 0))
+        self.assertEqual(self.stored(self.first), (Decimal('50.00'), Decimal('150.00')))
+
+    def test_ambiguous_break_is_not_repaired(self):
+        self.written(self.first, 0)
+        self.written(self.second, 0)
+        TransactionHistory.objects.filter(pk=self.second.pk).update(balance_before=0, balance_after=50)
+
+        run, out = self.reconcile('--repair')
+
+        self.assertEqual((run.chain_breaks, run.entries_ambiguous, run.entries_repaired), (1, 1, 0))
+        self.assertEqual(self.stored(self.second), (Decimal('0.00'), Decimal('50.00')))
+        self.assertIn(f'User {self.user.pk}: 1 broken entries written too close together to order', out)
+
+    def test_balance_mismatch_is_repaired_on_request(self):
+        Wallet.objects.filter(user=self.user).update(balance=Decimal('999.00'))
+
+        run, out = self.reconcile()
+        self.assertEqual((run.balance_mismatches, run.wallets_repaired), (1, 0))
+        self.assertIn('wallet ₦999.00, ledger ₦150.00', out)
+
+        run, _ = self.reconcile('--repair-balances')
+        self.assertEqual(run.wallets_repaired, 1)
+        self.assertEqual(Wallet.objects.get(user=self.user).balance, Decimal('150.00'))
+
+
+class WalletProvisioningTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def register(self, username):
+        password = 'A-long-passphrase-42'
+        response = APIClient().post('/api/accounts/register/', {
+            'username': username, 'email': f'{username}@example.com', 'password': password, 'password2': password,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        return User.objects.get(username=username)
+
+    def test_registration_creates_the_wallet_through_the_outbox(self):
+        alice, bob = self.register('alice'), self.register('bob')
+        self.assertFalse(Wallet.objects.exists())
+        out = StringIO()
+
+        call_command('process_outbox', stdout=out)
+
+        self.assertIn('Processed 2 event(s), 0 failed.', out.getvalue())
+        self.assertEqual(set(Wallet.objects.values_list('user_id', flat=True)), {alice.pk, bob.pk})
+
+    def test_redelivery_is_harmless(self):
+        alice = self.register('alice')
+        call_command('process_outbox', stdout=StringIO())
+        ledger.credit(alice.pk, Decimal('5.00'), 'deposit', reference='DEP-1')
+
+        OutboxEvent.objects.update(processed_at=None)
+        call_command('process_outbox', stdout=StringIO())
+
+        self.assertEqual(Wallet.objects.get(user=alice).balance, Decimal('5.00'))
+
+
+class WalletConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'pw')
+        Wallet.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def test_unchanged_wallet_answers_304(self):
+        first = self.client.get('/api/wallet/')
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('ETag', first)
+
+        again = self.client.get('/api/wallet/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again['ETag'], first['ETag'])
+        self.assertEqual(again.content, b'')
+
+    def test_ledger_change_answers_200(self):
+        etag = self.client.get('/api/wallet/')['ETag']
+        ledger.credit(self.user.pk, Decimal('5.00'), 'deposit', reference='DEP-1')
+
+        response = self.client.get('/api/wallet/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['balance'], '5.00')
+
+    def test_expanded_user(self):
+        response = self.client.get('/api/wallet/?fields=balance,user&expand=user')
 
-# Create your tests here.
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            'balance': '0.00', 'user': {'id': self.user.pk, 'username': 'alice', 'email': 'alice@example.com'},
+        })
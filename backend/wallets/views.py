@@ -1,10 +1,17 @@
 from rest_framework import generics, permissions
+from core.conditional import ConditionalGetMixin
+from . import ledger
 from .models import Wallet
 from .serializers import WalletSerializer
 
-class WalletDetailView(generics.RetrieveAPIView):
+class WalletDetailView(ConditionalGetMixin, generics.RetrieveAPIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = WalletSerializer
 
+    def get_version(self):
+        version = ledger.version(self.request.user.pk)
+        return version, version[0]
+
     def get_object(self):
-        return self.request.user.wallet
+        wallet, _ = Wallet.objects.get_or_create(user=self.request.user)
+        return wallet